@@ -0,0 +1 @@
+"""Cache backends and LLM response memoization shared by the agent apps."""
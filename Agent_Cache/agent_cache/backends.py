@@ -0,0 +1,187 @@
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # Optional dependency: only needed for the Redis backend
+    redis = None
+
+
+class CacheBackend(ABC):
+    """
+    Minimal key/value interface shared by the cache backends.
+    Values must be JSON-serializable; every entry carries its own TTL.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Process-local LRU with per-entry expiry."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    File-backed cache shared by the processes on one host (e.g. Streamlit + API).
+    LRU is approximated with a last-access timestamp; expired rows are purged on write.
+    """
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_last_access ON cache_entries(last_access)")
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=str), now + ttl, now),
+            )
+            self._conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+            overflow = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_size
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN "
+                    "(SELECT key FROM cache_entries ORDER BY last_access ASC LIMIT ?)", (overflow,)
+                )
+                self.evictions += overflow
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis (or any RESP-compatible server) shared across hosts.
+    Expiry uses native TTLs; size-based LRU is delegated to the server's
+    `maxmemory-policy allkeys-lru`, so max_size is not enforced client-side.
+    """
+
+    def __init__(self, url: str, namespace: str):
+        if redis is None:
+            raise ImportError("The Redis cache backend requires the `redis` package.")
+        self.namespace = namespace
+        self._client = redis.Redis.from_url(url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._client.set(self._key(key), json.dumps(value, default=str), ex=max(1, int(ttl)))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._key(key))
+
+    def clear(self) -> None:
+        for key in self._client.scan_iter(f"{self.namespace}:*"):
+            self._client.delete(key)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._client.scan_iter(f"{self.namespace}:*"))
+
+
+def build_backend(kind: str, *, namespace: str, max_size: int, sqlite_path: str, redis_url: str) -> CacheBackend:
+    if kind == "memory":
+        return MemoryCacheBackend(max_size)
+    if kind == "sqlite":
+        return SQLiteCacheBackend(sqlite_path, max_size)
+    if kind == "redis":
+        return RedisCacheBackend(redis_url, namespace)
+    raise ValueError(f"Unsupported cache backend: {kind}")
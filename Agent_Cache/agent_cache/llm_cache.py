@@ -0,0 +1,110 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, NamedTuple, Optional
+from pydantic import TypeAdapter
+from agent_cache.backends import CacheBackend
+
+
+class CachedRunResult(NamedTuple):
+    """Stand-in for AgentRunResult on a cache hit (nodes only read `.output`)."""
+    output: Any
+    cached: bool = True
+
+
+class LLMResponseCache:
+    """
+    Memoized Agent.run outputs, keyed by everything that determines the answer:
+    model, system prompt, user prompt, output schema and model settings (incl. seed).
+    Values are stored as JSON and re-validated against the output type on a hit.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.saved_s = 0.0  # Provider latency avoided by hits
+
+    @staticmethod
+    def key(model_name: str, system_prompt: str, user_prompt: str, output_type: Any, settings: Dict[str, Any]) -> str:
+        raw = json.dumps({
+            "model": model_name,
+            "system": system_prompt,
+            "input": user_prompt,
+            "schema": TypeAdapter(output_type).json_schema(),
+            "settings": settings or {},
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, output_type: Any) -> Optional[Any]:
+        try:
+            entry = self.backend.get(key)
+            output = TypeAdapter(output_type).validate_python(entry["output"]) if entry is not None else None
+        except Exception as e:
+            # Unreadable / outdated entry: treat as a miss, the fresh answer overwrites it
+            self.errors += 1
+            print(f"   > [LLMCache] Lookup failed: {e}")
+            entry, output = None, None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_s += entry.get("latency_s", 0.0)
+        return output
+
+    def set(self, key: str, output: Any, output_type: Any, latency_s: float) -> None:
+        try:
+            value = {"output": TypeAdapter(output_type).dump_python(output, mode="json"), "latency_s": latency_s}
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            print(f"   > [LLMCache] Store failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "saved_s": round(self.saved_s, 2),
+        }
+
+
+class MemoizedAgent:
+    """
+    Agent proxy whose `run(prompt[, deps=str])` is served from an LLMResponseCache.
+    Calls with other arguments (history, overrides) are not memoized;
+    every other attribute is forwarded to the wrapped Agent.
+    """
+
+    def __init__(self, agent, cache: LLMResponseCache, model_name: str, system_prompt: str,
+                 output_type: Any, settings: Dict[str, Any]):
+        self._agent = agent
+        self._cache = cache
+        self._output_type = output_type
+        self._key_parts = (model_name, system_prompt, output_type, dict(settings))
+
+    async def run(self, user_prompt=None, **kwargs):
+        deps = kwargs.get("deps")
+        if set(kwargs) - {"deps"} or not isinstance(user_prompt, str) or not isinstance(deps, (str, type(None))):
+            return await self._agent.run(user_prompt, **kwargs)
+
+        model_name, system_prompt, output_type, settings = self._key_parts
+        if deps:
+            system_prompt = f"{system_prompt}\n\n{deps}"
+        key = self._cache.key(model_name, system_prompt, user_prompt, output_type, settings)
+        output = self._cache.get(key, self._output_type)
+        if output is not None:
+            print("   > [LLMCache] Hit (provider call skipped)")
+            return CachedRunResult(output)
+
+        start = time.perf_counter()
+        result = await self._agent.run(user_prompt, **kwargs)
+        self._cache.set(key, result.output, self._output_type, time.perf_counter() - start)
+        return result
+
+    def __getattr__(self, name: str):
+        return getattr(self._agent, name)
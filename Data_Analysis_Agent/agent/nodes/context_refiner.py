@@ -50,7 +50,8 @@ async def context_refining_node(state: AgentState):
     agent = build_agent(
         output_type=BusinessContextOutput,
         system_prompt=CONTEXT_REFINER_PROMPT,
-        reasoning="low"
+        reasoning="low",
+        memoize=True,
     )
 
     # 3. Construct Prompt
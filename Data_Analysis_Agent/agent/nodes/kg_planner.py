@@ -56,7 +56,8 @@ async def kg_planning_node(state: AgentState):
     agent = build_agent(
         output_type=AgentPlan,
         system_prompt=KG_PLANNER_PROMPT,
-        reasoning="medium" 
+        reasoning="medium",
+        memoize=True,
     )
 
     # 2. Construct the Prompt
@@ -77,7 +77,8 @@ async def sql_planning_node(state: AgentState) -> dict:
     planner_agent = build_agent(
         output_type=AgentPlan,
         system_prompt=system_prompt,
-        reasoning="high"
+        reasoning="high",
+        memoize=True,
     )
     
     try:
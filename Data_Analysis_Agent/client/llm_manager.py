@@ -9,6 +9,7 @@ from pydantic_ai.models.openai import OpenAIResponsesModel
 from pydantic_ai.providers.openai import OpenAIProvider
 from resources.schema.pydantic_schemas import NaturalAnswerOutput
 from config import OPENAI_API_KEY, OPENAI_MODEL_NAME
+from client.llm_cache import MemoizedAgent, get_llm_cache
 
 # Base settings for all agents
 BASE_MODEL_SETTINGS = ModelSettings(
@@ -46,7 +47,9 @@ def build_agent(
     system_prompt: str,
     *,
     reasoning: Literal["low", "medium", "high"] = "low",
+    memoize: bool = False,
 ) -> Agent:
+    # memoize=True: identical (instructions, input) pairs are answered from the local LLM cache
 
     # Merge base settings with per-agent reasoning knobs
     per_agent_settings = ModelSettings(**BASE_MODEL_SETTINGS)
@@ -54,7 +57,7 @@ def build_agent(
     if "o1" in OPENAI_MODEL_NAME or "o3" in OPENAI_MODEL_NAME:
         per_agent_settings["openai_reasoning_effort"] = reasoning
 
-    return Agent(
+    agent = Agent(
         model=model,
         output_type=output_type,
         instructions=system_prompt,
@@ -62,6 +65,11 @@ def build_agent(
         model_settings=per_agent_settings,
     )
 
+    cache = get_llm_cache() if memoize else None
+    if cache is not None:
+        return MemoizedAgent(agent, cache, OPENAI_MODEL_NAME, system_prompt, output_type, per_agent_settings)
+    return agent
+
 ## --- ONLY FOR TEST --- ##
 async def main():
     agent = build_agent(
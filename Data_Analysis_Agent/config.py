@@ -10,4 +10,10 @@ CHAT_MODEL_API_VERSION = ""
 AZURE_AI_API_KEY = ""
 AZURE_AI_ENDPOINT = ""
 OPENAI_API_KEY = "<API-KEY-HERE>"
-OPENAI_MODEL_NAME = "gpt-4o"
\ No newline at end of file
+OPENAI_MODEL_NAME = "gpt-4o"
+
+# LLM response cache ==================
+LLM_CACHE_ENABLED = True                 # Nodes still opt in with build_agent(memoize=True)
+LLM_CACHE_PATH = "llm_cache.sqlite3"
+LLM_CACHE_MAX_ENTRIES = 5000             # Least-recently-used responses are evicted beyond this
+LLM_CACHE_TTL = 7 * 24 * 3600            # Seconds
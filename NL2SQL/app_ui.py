@@ -5,6 +5,8 @@ from datetime import datetime
 from db_agent.graph_builder import build_graph
 from db_agent.graph.sql_checkpointer import SQLServerSaver 
 from db_agent.client.az_sql import SQLQueryExecutor
+from db_agent.client.az_llm import close_shared_models
+from db_agent.cache.value_index import get_value_index
 
 # =============================================================================
 # 1. THEME CONFIGURATION (Anthropic Light Inspired)
@@ -104,9 +106,10 @@ st.markdown("""
 # 2. SESSION LOGIC (Sidebar)
 # =============================================================================
 def get_all_sessions():
+    # Session catalog maintained by SQLServerSaver (no DISTINCT scan over checkpoint history)
     query = """
-    IF OBJECT_ID('agent_checkpoints', 'U') IS NOT NULL
-        SELECT DISTINCT thread_id FROM agent_checkpoints ORDER BY thread_id DESC
+    IF OBJECT_ID('agent_sessions', 'U') IS NOT NULL
+        SELECT TOP 200 thread_id FROM agent_sessions ORDER BY updated_at DESC
     ELSE
         SELECT '' AS thread_id WHERE 1=0
     """
@@ -201,6 +204,9 @@ async def run_agent(user_input):
     
     # Setup
     checkpointer = SQLServerSaver()
+    checkpointer.setup()
+    if get_value_index() is not None:
+        get_value_index().start()  # Idempotent: first run loads the categorical values in the background
     workflow = build_graph()
     app = workflow.compile(checkpointer=checkpointer)
     config = {"configurable": {"thread_id": st.session_state.current_thread_id}}
@@ -253,11 +259,17 @@ async def run_agent(user_input):
                          final_answer = last.content
                          answer_area.markdown(final_answer + " ▌") # Typing cursor effect
 
+            # Graph end: write-behind checkpoints must be durable (sessions sidebar reads SQL)
+            await checkpointer.aflush(st.session_state.current_thread_id)
+
             # Finish
             status_box.update(label="Complete", state="complete", expanded=False)
             answer_area.markdown(final_answer) # Remove cursor
             
             if final_data:
+                # Columnar results expose a row-dict view for display / session history
+                if hasattr(final_data, "to_records"):
+                    final_data = final_data.to_records()
                 st.dataframe(final_data, hide_index=True)
 
             # Save to State
@@ -271,6 +283,10 @@ async def run_agent(user_input):
         except Exception as e:
             status_box.update(label="Error", state="error")
             st.error(f"System Error: {e}")
+        finally:
+            checkpointer.close()
+            # This message's event loop ends here: its provider connections cannot be reused
+            await close_shared_models()
 
 # Input Handler
 if prompt := st.chat_input("Ask a question..."):
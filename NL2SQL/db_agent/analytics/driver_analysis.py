@@ -0,0 +1,182 @@
+from typing import List, NamedTuple, Optional, Sequence
+import numpy as np
+import pandas as pd
+from db_agent.config import (
+    DIAGNOSTIC_BATCH_TABLE, DIAGNOSTIC_BATCH_METRIC, DRIVER_PERIOD_COLUMN, DRIVER_PERIOD_SORT, DRIVER_TOP_MEMBERS,
+)
+from db_agent.analytics.hypothesis_ranking import explained_share
+
+_NOISE_Z = 2.0  # Member changes within this many noise sds of proportional growth count as noise
+
+
+class Contributor(NamedTuple):
+    member: str
+    base: float
+    current: float
+    delta: float
+    share: float  # delta / total change
+
+
+class Driver(NamedTuple):
+    dimension: str
+    divergence: float    # Jensen-Shannon divergence of the member mix between the periods (0 = change spread evenly)
+    explained: float     # Epsilon squared of the metric across members in the current period
+    change_share: float  # Share of the total change carried by the top members
+    excess_share: float  # Share of the change not proportional to the members' base-period size (0 = even growth)
+    members: int
+    top: List[Contributor]
+
+
+class DriverReport(NamedTuple):
+    metric: str
+    base_period: Optional[str]  # None when the slice holds a single period
+    current_period: str
+    base_total: float
+    current_total: float
+    drivers: List[Driver]       # Most explanatory first
+    joint_explained: float = 0.0  # Epsilon squared of all dimensions together (current period; overlaps counted once)
+
+
+def build_driver_slice_query(dimensions: Sequence[str]) -> str:
+    """
+    The slice every driver is computed from: metric sum, record count and sum of squares
+    per (period, all dimensions) for the latest two periods, in one scan. Dimensions must be whitelisted.
+    """
+    quoted = ", ".join(f"t.[{d}]" for d in dimensions)
+    metric = f"t.[{DIAGNOSTIC_BATCH_METRIC}]"
+    return f"""
+    WITH periods AS (
+        SELECT TOP 2 [{DRIVER_PERIOD_COLUMN}] AS Period, MAX({DRIVER_PERIOD_SORT}) AS PeriodKey
+        FROM {DIAGNOSTIC_BATCH_TABLE}
+        GROUP BY [{DRIVER_PERIOD_COLUMN}]
+        ORDER BY PeriodKey DESC
+    )
+    SELECT p.Period, p.PeriodKey, {quoted},
+           SUM({metric}) AS Metric,
+           COUNT(*) AS Records,
+           SUM(CAST({metric} AS FLOAT) * {metric}) AS MetricSquares
+    FROM {DIAGNOSTIC_BATCH_TABLE} AS t
+    JOIN periods AS p ON t.[{DRIVER_PERIOD_COLUMN}] = p.Period
+    GROUP BY p.Period, p.PeriodKey, {quoted}"""
+
+def analyze_drivers(slice_df: pd.DataFrame, dimensions: Sequence[str],
+                    top_members: int = DRIVER_TOP_MEMBERS) -> DriverReport:
+    """
+    Share-of-change, variance decomposition and top contributing members for every
+    dimension of the slice, with one stacked group-by instead of one query per dimension.
+    """
+    keys = slice_df.groupby("Period")["PeriodKey"].max()
+    periods = (keys.sort_values() if keys.notna().all() else keys.sort_index()).index.tolist()
+    current = periods[-1]
+    base = periods[-2] if len(periods) > 1 else None
+
+    # Long format: (Dimension, Member, Period) rows for all dimensions at once
+    long = pd.concat([
+        pd.DataFrame({
+            "Dimension": d,
+            "Member": slice_df[d].astype(object).where(slice_df[d].notna(), "(blank)").astype(str),
+            "Period": slice_df["Period"],
+            "Metric": slice_df["Metric"].astype(float),
+            "Records": slice_df["Records"].astype(float),
+            "Squares": slice_df["MetricSquares"].astype(float),
+        })
+        for d in dimensions
+    ], ignore_index=True)
+    grouped = long.groupby(["Dimension", "Member", "Period"], sort=False)[["Metric", "Records", "Squares"]].sum()
+
+    metric = grouped["Metric"].unstack("Period", fill_value=0.0)
+    cur = metric[current]
+    prev = metric[base] if base is not None else pd.Series(0.0, index=metric.index)
+    current_total = float(slice_df.loc[slice_df["Period"] == current, "Metric"].sum())
+    base_total = float(slice_df.loc[slice_df["Period"] == base, "Metric"].sum()) if base is not None else 0.0
+    total_change = current_total - base_total
+
+    # Mix shift: Jensen-Shannon divergence between the base and current member shares
+    if base is not None and base_total and current_total:
+        p, q = (prev / base_total).to_numpy(), (cur / current_total).to_numpy()
+        m = (p + q) / 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            terms = 0.5 * (np.where(p > 0, p * np.log(p / m), 0.0) + np.where(q > 0, q * np.log(q / m), 0.0))
+        divergence = pd.Series(terms, index=metric.index).groupby(level="Dimension").sum()
+    else:
+        divergence = pd.Series(0.0, index=dimensions)
+
+    # Variance decomposition (current period): between-member vs total sum of squares
+    now = grouped.xs(current, level="Period")
+    by_dim = pd.DataFrame({
+        "S": now["Metric"].groupby(level="Dimension").sum(),
+        "N": now["Records"].groupby(level="Dimension").sum(),
+        "Q": now["Squares"].groupby(level="Dimension").sum(),
+        "G": (now["Metric"] ** 2 / now["Records"]).groupby(level="Dimension").sum(),
+        "K": now["Metric"].groupby(level="Dimension").size(),
+    })
+    centre = by_dim["S"] ** 2 / by_dim["N"]
+
+    # The slice's own cells group by every dimension at once: their joint share, not a sum of overlapping ones
+    cells = slice_df[slice_df["Period"] == current]
+    s, n = float(cells["Metric"].sum()), float(cells["Records"].sum())
+    joint = explained_share(float((cells["Metric"].astype(float) ** 2 / cells["Records"]).sum()) - s * s / n,
+                            float(cells["MetricSquares"].sum()) - s * s / n, len(cells), n) if n else 0.0
+    explained = {
+        d: explained_share(between, total, int(k), n)
+        for d, between, total, k, n in zip(by_dim.index, by_dim["G"] - centre, by_dim["Q"] - centre, by_dim["K"], by_dim["N"])
+    }
+
+    # Top contributors: members whose change points the same way as the total, largest first
+    delta = (cur - prev).rename("Delta")
+    sign = 1.0 if total_change >= 0 else -1.0
+    ordered = delta.to_frame().assign(Aligned=delta * sign).sort_values("Aligned", ascending=False)
+    top = ordered.groupby(level="Dimension", sort=False).head(top_members)
+
+    # Disproportionate change: per member, the change beyond proportional growth and beyond sampling noise
+    # (sd of a member's sum under random record assignment ~ sqrt of its sum of squares), as a share of the total
+    if base is not None and base_total and total_change:
+        squares = grouped["Squares"].unstack("Period", fill_value=0.0)
+        noise = np.sqrt(squares[current] + squares[base])
+        surplus = ((delta - prev * (total_change / base_total)) * sign - _NOISE_Z * noise).clip(lower=0.0)
+        excess = (surplus / abs(total_change)).groupby(level="Dimension").sum()
+    else:
+        excess = pd.Series(0.0, index=dimensions)
+
+    drivers = []
+    for d in dimensions:
+        rows = top.xs(d, level="Dimension") if d in top.index.get_level_values("Dimension") else top.iloc[:0]
+        contributors = [
+            Contributor(str(member), float(prev[(d, member)]), float(cur[(d, member)]), float(row.Delta),
+                        float(row.Delta / total_change) if total_change else 0.0)
+            for member, row in rows.iterrows()
+        ]
+        drivers.append(Driver(
+            dimension=d,
+            divergence=float(divergence.get(d, 0.0)),
+            explained=explained.get(d, 0.0),
+            change_share=sum(c.share for c in contributors),
+            excess_share=float(excess.get(d, 0.0)),
+            members=int(by_dim["K"].get(d, 0)),
+            top=contributors,
+        ))
+
+    # Two periods: rank by disproportionate change. Divergence only breaks ties: it grows with the
+    # member count, so sparse high-cardinality columns would outrank the real driver.
+    drivers.sort(key=(lambda r: (r.excess_share, r.divergence)) if base is not None else (lambda r: r.explained), reverse=True)
+    return DriverReport(DIAGNOSTIC_BATCH_METRIC.title(), base, current, base_total, current_total, drivers, joint)
+
+def format_findings(report: DriverReport, max_drivers: int) -> List[str]:
+    """The numeric driver table, one line per dimension, as findings for the Synthesizer."""
+    if report.base_period is not None:
+        change = report.current_total - report.base_total
+        pct = f" ({change / report.base_total:+.1%})" if report.base_total else ""
+        header = (f"{report.metric}: {report.base_total:,.0f} ({report.base_period}) -> "
+                  f"{report.current_total:,.0f} ({report.current_period}), change {change:+,.0f}{pct}")
+    else:
+        header = f"{report.metric}: {report.current_total:,.0f} ({report.current_period}), single period"
+
+    lines = [header]
+    for rank, d in enumerate(report.drivers[:max_drivers], 1):
+        members = ", ".join(f"{c.member} {c.delta:+,.0f} ({c.share:.0%})" for c in d.top)
+        lines.append(
+            f"Driver #{rank} {d.dimension}: {d.excess_share:.0%} of the change out of proportion to member size, "
+            f"mix shift {d.divergence:.3f}, variance explained {d.explained:.0%}, "
+            f"top {len(d.top)} of {d.members} members carry {d.change_share:.0%} of the change: {members}"
+        )
+    return lines
@@ -0,0 +1,124 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from db_agent.config import DIAGNOSTIC_HOP_DECAY, DIAGNOSTIC_HISTORY_LOG
+
+
+class RankedHypothesis(NamedTuple):
+    name: str                    # SQL column the hypothesis is tested on
+    score: float                 # Ordering key: prior x explained-variance estimate
+    prior: float                 # Causal graph strength x hop decay x historical hit rate
+    explained: Optional[float]   # Estimated share of the metric's variance (None = not estimated)
+
+
+def explained_share(between_ss: Optional[float], total_ss: Optional[float], groups: int, n: Optional[float]) -> float:
+    """
+    Epsilon squared of a one-way grouping: (SSB - (k - 1) * MSW) / SST, clipped to [0, 1].
+    Unlike the plain SSB / SST it does not reward columns just for having many distinct values.
+    """
+    if not between_ss or not total_ss or total_ss <= 0 or not n or n <= groups:
+        return 0.0
+    within_ms = (total_ss - between_ss) / (n - groups)
+    return float(min(max((between_ss - (groups - 1) * within_ms) / total_ss, 0.0), 1.0))
+
+
+# -------------------------------------------------------------------------
+# HISTORY (chat logs written by feedback_logger_node)
+# -------------------------------------------------------------------------
+def cited_hypotheses(tested: Iterable[str], response: str) -> List[str]:
+    """Tested hypotheses the final answer mentions (LOCATION / TENURE_BUCKET -> "location" / "tenure bucket")."""
+    text = response.lower()
+    return [h for h in tested if re.search(rf"\b{re.escape(h.lower().replace('_', ' '))}\b", text.replace("_", " "))]
+
+class HypothesisHistory:
+    """Per-hypothesis (tested, cited) counts from the chat log; re-read when the file changes."""
+
+    def __init__(self, path: str = DIAGNOSTIC_HISTORY_LOG):
+        self.path = path
+        self._counts: Dict[str, Tuple[int, int]] = {}
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def hit_rate(self, hypothesis: str) -> float:
+        """Laplace-smoothed share of past runs in which the hypothesis made it into the answer (0.5 if unseen)."""
+        tested, cited = self._load().get(hypothesis.upper(), (0, 0))
+        return (cited + 1) / (tested + 2)
+
+    def _load(self) -> Dict[str, Tuple[int, int]]:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return {}
+        with self._lock:
+            if mtime != self._mtime:
+                counts: Dict[str, List[int]] = {}
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            row = json.loads(line)
+                        except ValueError:
+                            continue
+                        cited = {h.upper() for h in row.get("hypotheses_cited") or []}
+                        for h in row.get("hypotheses_tested") or []:
+                            entry = counts.setdefault(h.upper(), [0, 0])
+                            entry[0] += 1
+                            entry[1] += h.upper() in cited
+                self._counts = {h: (t, c) for h, (t, c) in counts.items()}
+                self._mtime = mtime
+            return self._counts
+
+
+# -------------------------------------------------------------------------
+# RANKING + STOPPING
+# -------------------------------------------------------------------------
+def rank_hypotheses(causes: Iterable[Tuple[str, int, float]],
+                    explained: Dict[str, float],
+                    history: Optional[HypothesisHistory] = None) -> List[RankedHypothesis]:
+    """
+    Orders (column, hop depth, path strength) suspects, most promising first.
+    Columns without a variance estimate are scored with the median of the known ones,
+    so they are neither skipped outright nor tested ahead of clearly strong suspects.
+    """
+    known = sorted(explained.values())
+    fallback = known[len(known) // 2] if known else 1.0
+    ranked = []
+    for name, depth, strength in causes:
+        prior = strength * DIAGNOSTIC_HOP_DECAY ** (depth - 1) * (2 * history.hit_rate(name) if history else 1.0)
+        estimate = explained.get(name)
+        ranked.append(RankedHypothesis(name, prior * (fallback if estimate is None else estimate), prior, estimate))
+    return sorted(ranked, key=lambda r: r.score, reverse=True)  # Stable: ties keep graph order
+
+def joint_explained(tested: Iterable[str], cumulative: Dict[str, float], already_explained: float = 0.0) -> float:
+    """
+    Variance share explained once `tested` are tested. `cumulative` maps each queued
+    hypothesis to the joint share of the queue up to and including it, so the best value
+    reached is the answer (never a sum); hypotheses without an estimate add nothing.
+    """
+    return max([already_explained, *(cumulative[h] for h in tested if h in cumulative)])
+
+def hypotheses_to_test(queue: List[str], cumulative: Dict[str, float], threshold: float,
+                       already_explained: float = 0.0) -> Tuple[List[str], List[str]]:
+    """
+    Splits the (ranked) queue into the hypotheses to test and those skipped because the
+    ones before them already explain `threshold` of the variance together.
+    """
+    explained = already_explained
+    for i, name in enumerate(queue):
+        if explained >= threshold:
+            return queue[:i], queue[i:]
+        explained = joint_explained([name], cumulative, explained)
+    return list(queue), []
+
+
+_HISTORY: Optional[HypothesisHistory] = None
+_HISTORY_LOCK = threading.Lock()
+
+def get_hypothesis_history() -> HypothesisHistory:
+    """Process-wide history reader (cheap: re-parses the log only when it changed)."""
+    global _HISTORY
+    with _HISTORY_LOCK:
+        if _HISTORY is None:
+            _HISTORY = HypothesisHistory()
+        return _HISTORY
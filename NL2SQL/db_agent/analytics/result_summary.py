@@ -0,0 +1,108 @@
+from typing import Any, List, Optional, Sequence
+import numpy as np
+from db_agent.config import (
+    SUMMARY_RAW_ROWS, SUMMARY_TOP_K, SUMMARY_MAX_NUMERIC, SUMMARY_OUTLIER_Z, SUMMARY_MAX_CHARS,
+)
+from db_agent.schema.columnar_result import ColumnarResult
+
+_PERIOD_HINTS = ("DATE", "MONTH", "YEAR", "PERIOD", "QUARTER", "WEEK")
+
+
+def _fmt(value: float) -> str:
+    if value != value:
+        return "NULL"
+    if float(value).is_integer():
+        return f"{value:,.0f}"
+    return f"{value:,.2f}" if abs(value) >= 1 else f"{value:.4g}"
+
+def _labels(result: ColumnarResult) -> List[str]:
+    """Row names for the digest: the first text column, else the row number."""
+    numeric = {name for name, _ in result.numeric_columns()}
+    for name, arr in zip(result.columns, result.arrays):
+        if arr.dtype == object and name not in numeric:
+            return ["NULL" if v is None else str(v) for v in arr]
+    return [f"row {i + 1}" for i in range(len(result))]
+
+def _describe(name: str, values: np.ndarray, labels: Sequence[str], ordered: bool, sample: bool) -> List[str]:
+    valid = ~np.isnan(values)
+    v = values[valid]
+    if not len(v):
+        return [f"{name}: all NULL"]
+
+    total, mean, std = float(v.sum()), float(v.mean()), float(v.std())
+    low, high = int(np.nanargmin(values)), int(np.nanargmax(values))
+    nulls = f", {int((~valid).sum())} NULL" if not valid.all() else ""
+    # A sample (e.g. a TopN distribution) only knows the rows it holds: say so instead of overstating shares
+    of = " of shown rows" if sample else ""
+    heading = f"{name} (shown rows only)" if sample else name
+    lines = [f"{heading}: total {_fmt(total)}, mean {_fmt(mean)}, min {_fmt(values[low])} ({labels[low]}), "
+             f"max {_fmt(values[high])} ({labels[high]}){nulls}"]
+
+    # Largest rows and their share of the column total
+    top = np.argsort(np.where(valid, -values, np.inf), kind="stable")[:min(SUMMARY_TOP_K, int(valid.sum()))]
+    if len(v) > 1:
+        shares = values[top] / total if total > 0 and (v >= 0).all() else None
+        parts = [f"{labels[i]} {_fmt(values[i])}" + (f" ({shares[k]:.1%}{of})" if shares is not None else "")
+                 for k, i in enumerate(top)]
+        covered = (f", together {shares.sum():.1%} of the {'shown rows' if sample else 'total'}"
+                   if shares is not None and len(v) > len(top) else "")
+        lines.append(f"  top {len(top)}: " + ", ".join(parts) + covered)
+
+    # Outliers by z-score
+    if std > 0 and len(v) > 2:
+        z = np.where(valid, (values - mean) / std, 0.0)
+        far = np.flatnonzero(np.abs(z) > SUMMARY_OUTLIER_Z)
+        far = far[np.argsort(-np.abs(z[far]))][:3]
+        if len(far):
+            lines.append("  outliers: " + ", ".join(f"{labels[i]} {_fmt(values[i])} (z={z[i]:+.1f})" for i in far))
+
+    # Deltas along the period order the SQL returned
+    if ordered and len(v) > 1:
+        first, last = int(np.flatnonzero(valid)[0]), int(np.flatnonzero(valid)[-1])
+        change = values[last] - values[first]
+        pct = f" ({change / values[first]:+.1%})" if values[first] else ""
+        steps = np.diff(values)
+        step = int(np.nanargmax(np.abs(np.where(np.isnan(steps), 0.0, steps))))
+        lines.append(f"  change {labels[first]} -> {labels[last]}: {change:+,.2f}{pct}; "
+                     f"largest step {labels[step]} -> {labels[step + 1]}: {steps[step]:+,.2f}")
+    return lines
+
+def summarize_result(sql_result: Any, total_rows: Optional[int] = None) -> str:
+    """
+    Fixed-size digest of a SQL result for the Analyzer prompt, computed locally over
+    every row in memory: shape, per numeric column total / mean / min / max, top rows
+    with shares, z-score outliers and (for period-ordered results) deltas.
+    Small results are included verbatim as well. When `total_rows` exceeds the rows
+    held, totals and shares are labelled as covering the shown rows only.
+    """
+    result = sql_result if isinstance(sql_result, ColumnarResult) else ColumnarResult.from_records(list(sql_result))
+    rows = len(result)
+    if not rows:
+        return "Rows: 0"
+    sample = f" (sample of {total_rows})" if total_rows and total_rows > rows else ""
+    numeric = result.numeric_columns()
+    numbers = {c for c, _ in numeric}
+    kinds = [f"{c} ({'number' if c in numbers else 'text'})" for c in result.columns]
+    lines = [f"Rows: {rows}{sample}; columns: {', '.join(kinds)}"]
+
+    if rows <= SUMMARY_RAW_ROWS:
+        lines.append("Data:")
+        lines.extend(str(result).splitlines())
+
+    labels = _labels(result)
+    ordered = any(hint in c.upper() for c in result.columns for hint in _PERIOD_HINTS)
+    for name, values in numeric[:SUMMARY_MAX_NUMERIC]:
+        lines.extend(_describe(name, values, labels, ordered, bool(sample)))
+    if len(numeric) > SUMMARY_MAX_NUMERIC:
+        lines.append(f"({len(numeric) - SUMMARY_MAX_NUMERIC} more numeric columns not described)")
+
+    # Fixed size: drop whole lines from the end rather than cutting one in half
+    digest, kept = lines[0], 1
+    for line in lines[1:]:
+        if len(digest) + len(line) + 1 > SUMMARY_MAX_CHARS:
+            break
+        digest += "\n" + line
+        kept += 1
+    if kept < len(lines):
+        digest += f"\n({len(lines) - kept} digest lines omitted)"
+    return digest
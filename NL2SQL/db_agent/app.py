@@ -4,7 +4,7 @@ from fastapi import FastAPI, Request
 from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 from db_agent.client.az_llm import build_agent
-from db_agent.client.az_sql import SQLQueryExecutor
+from db_agent.client.az_sql import SQLQueryExecutor, pool_stats, close_all_pools
 from db_agent.config import CHAT_MODEL_DEPLOYMENT
 from db_agent.schema.pydantic_models import NaturalAnswerOutput, GreetIn
 from db_agent.resources.prompts import SYSTEM_PROMPT
@@ -30,6 +30,7 @@ async def lifespan(app: FastAPI):
     )
     yield
     logger.info("shutting down", extra={"request_id": "-"})
+    close_all_pools()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -39,6 +40,7 @@ def root():
     response = """
     /health_check      : Health check endpoint
     /sql_check         : Check connectivity to Azure SQL Database
+    /sql_pool_stats    : Connection pool hit/miss/wait metrics
     /llm_check         : Check connectivity to Azure OpenAI LLM
     """
     return response.strip("\n")
@@ -63,6 +65,9 @@ async def llm_check(request: Request):
 
 @app.get("/sql_check", response_class=PlainTextResponse)
 def sql_check():
-    with SQLQueryExecutor() as sql_manager:
-        response = sql_manager.check_connection()
-    return f"SQL Check: {response}"
\ No newline at end of file
+    response = SQLQueryExecutor().check_connection()
+    return f"SQL Check: {response}"
+
+@app.get("/sql_pool_stats")
+def sql_pool_stats():
+    return pool_stats()
\ No newline at end of file
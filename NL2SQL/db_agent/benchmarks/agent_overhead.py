@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pydantic_ai import Agent
+from pydantic_ai.models.openai import OpenAIChatModel
+
+ITERATIONS = 200
+CONCURRENCY = 20
+MODEL_NAME = "bench-model"
+
+class FakeOpenAI(BaseHTTPRequestHandler):
+    """Local OpenAI-compatible endpoint: answers every chat completion with the output tool call."""
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is measurable
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        # Headers and body are separate writes: without this, Nagle + delayed ACK add ~40 ms
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        type(self).connections += 1
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        tool = request["tools"][0]["function"]["name"]
+        body = json.dumps({
+            "id": "chatcmpl-bench", "object": "chat.completion", "created": 0, "model": MODEL_NAME,
+            "choices": [{"index": 0, "finish_reason": "tool_calls", "message": {
+                "role": "assistant", "content": None,
+                "tool_calls": [{"id": "call_1", "type": "function",
+                                "function": {"name": tool, "arguments": json.dumps({"answer": "ok"})}}],
+            }}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    return server
+
+def old_build_agent(output_type, system_prompt: str) -> Agent:
+    """The previous build_agent: new model, provider and Agent on every node call."""
+    return Agent(
+        model=OpenAIChatModel(MODEL_NAME),
+        output_type=output_type,
+        system_prompt=system_prompt,
+        retries=2,
+        model_settings={"max_tokens": None, "temperature": 0.7},
+    )
+
+async def measure(label: str, call) -> None:
+    FakeOpenAI.connections = 0
+    setup_ms, total_ms = [], []
+    for i in range(ITERATIONS):
+        start = time.perf_counter()
+        setup_s = await call(i)
+        total_ms.append((time.perf_counter() - start) * 1e3)
+        setup_ms.append(setup_s * 1e3)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(CONCURRENCY)))
+    burst_ms = (time.perf_counter() - start) * 1e3
+
+    print(f"{label:<10} setup p50 {statistics.median(setup_ms):6.3f} ms  "
+          f"call p50 {statistics.median(total_ms):6.2f} ms  mean {statistics.mean(total_ms):6.2f} ms  "
+          f"burst x{CONCURRENCY} {burst_ms:7.1f} ms  connections {FakeOpenAI.connections}")
+
+async def main():
+    server = start_server()
+    # Imported after OPENAI_BASE_URL points at the local server
+    from db_agent.client.az_llm import get_agent
+    from db_agent.schema.pydantic_models import NaturalAnswerOutput
+
+    instructions = "You are a Data Analyst. Summarize the key finding in 1 sentence."
+
+    async def before(i: int) -> float:
+        start = time.perf_counter()
+        agent = old_build_agent(NaturalAnswerOutput, f"{instructions}\nCONTEXT: finding {i}")
+        setup = time.perf_counter() - start
+        await agent.run("Analyze this.")
+        return setup
+
+    async def after(i: int) -> float:
+        start = time.perf_counter()
+        agent = get_agent(NaturalAnswerOutput, instructions, model_name=MODEL_NAME)
+        setup = time.perf_counter() - start
+        await agent.run("Analyze this.", deps=f"CONTEXT: finding {i}")
+        return setup
+
+    print(f"--- Agent overhead per node call ({ITERATIONS} sequential calls, local fake provider) ---")
+    await measure("before", before)
+    await measure("after", after)
+    server.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
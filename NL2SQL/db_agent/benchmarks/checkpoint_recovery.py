@@ -0,0 +1,79 @@
+import operator
+import time
+import uuid
+from collections import Counter
+from typing import Annotated, List, TypedDict
+from langgraph.graph import StateGraph, START, END
+from db_agent.graph.sql_checkpointer import SQLServerSaver
+
+# Simulated costs of the real nodes (LLM calls / SP round trips)
+NODE_COST_S = {"planner": 0.4, "investigate_location": 0.3, "investigate_grade": 0.3,
+               "investigate_tenure": 0.3, "analyzer": 0.4}
+KILLED_NODE = "investigate_tenure"
+
+class DiagnosticState(TypedDict):
+    question: str
+    confirmed_causes: Annotated[List[str], operator.add]
+    summary: str
+
+class NoWritesSaver(SQLServerSaver):
+    """Previous behaviour: pending writes are dropped, so a resume re-runs the whole superstep."""
+    def put_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        pass
+
+def build_graph(runs: Counter, kill: dict):
+    def node(name: str, update):
+        def run(state: DiagnosticState):
+            runs[name] += 1
+            time.sleep(NODE_COST_S[name])
+            if name == KILLED_NODE and kill["armed"]:
+                kill["armed"] = False
+                raise RuntimeError("worker killed mid-superstep")
+            return update(state)
+        return run
+
+    workflow = StateGraph(DiagnosticState)
+    workflow.add_node("planner", node("planner", lambda s: {}))
+    for factor in ("location", "grade", "tenure"):
+        workflow.add_node(f"investigate_{factor}",
+                          node(f"investigate_{factor}", lambda s, f=factor: {"confirmed_causes": [f"{f.upper()}: cost +12%"]}))
+        workflow.add_edge("planner", f"investigate_{factor}")
+        workflow.add_edge(f"investigate_{factor}", "analyzer")
+    workflow.add_node("analyzer", node("analyzer", lambda s: {"summary": "; ".join(s["confirmed_causes"])}))
+    workflow.add_edge(START, "planner")
+    workflow.add_edge("analyzer", END)
+    return workflow
+
+def run_scenario(label: str, saver: SQLServerSaver):
+    runs, kill = Counter(), {"armed": True}
+    app = build_graph(runs, kill).compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": f"bench_recovery_{uuid.uuid4().hex[:8]}"}}
+
+    try:
+        app.invoke({"question": "Why did cost go up for Project Atlas?", "confirmed_causes": []}, config)
+    except RuntimeError:
+        pass
+    first_runs = sum(runs.values())
+
+    start = time.perf_counter()
+    result = app.invoke(None, config)  # resume from the last checkpoint
+    resume_s = time.perf_counter() - start
+
+    redone = {name: runs[name] - 1 for name in runs if runs[name] > 1}
+    redone_s = sum(NODE_COST_S[name] * count for name, count in redone.items())
+    print(f"{label:<22} resume {resume_s:>5.2f} s  node runs {sum(runs.values()) - first_runs:>2}  "
+          f"redone {sorted(redone)}  redone work {redone_s:.1f} s")
+    assert result["summary"], "resume did not finish"
+
+    start = time.perf_counter()
+    history = list(saver.list(config, limit=10))
+    print(f"{'':<22} list(limit=10) {len(history)} checkpoints in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+def main():
+    print(f"--- Checkpoint recovery benchmark ({KILLED_NODE} killed in the fan-out superstep) ---")
+    # Synchronous writes: a real kill would also lose whatever a write-behind queue still holds
+    run_scenario("without put_writes", NoWritesSaver(write_behind=False))
+    run_scenario("with put_writes", SQLServerSaver(write_behind=False))
+
+if __name__ == "__main__":
+    main()
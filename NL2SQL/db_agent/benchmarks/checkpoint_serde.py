@@ -0,0 +1,71 @@
+import json
+import time
+from datetime import datetime, timezone
+from langchain_core.messages import AIMessage, HumanMessage
+from db_agent.graph.checkpoint_serde import CheckpointSerde
+from db_agent.schema.columnar_result import ColumnarResult
+
+ITERATIONS = 200
+
+def build_diagnostic_checkpoint(turns: int = 6, findings: int = 8, result_rows: int = 50) -> dict:
+    """A checkpoint shaped like a Sherlock diagnostic run a few loops in."""
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"Why did cost go up for Project Atlas in month {i}?"))
+        messages.append(AIMessage(content="I investigated Location, Grade and Tenure. " * 8))
+
+    rows = [(f"LOCATION_{i % 12}", 1200.5 * i, float(i % 7), i) for i in range(result_rows)]
+
+    return {
+        "v": 1,
+        "id": "1ef4f797-8335-6428-8001-8a1503f9b875",
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "channel_values": {
+            "messages": messages,
+            "user_info": {"user_id": "u_1001", "role": "ADMIN", "tenant_id": "default_tenant"},
+            "intent_status": "DIAGNOSTIC",
+            "next_action": "TEST_HYPOTHESIS",
+            "tool_params": {"ColumnName": "LOCATION", "TopN": 5, "tool_name": "sp_GetDistribution"},
+            "sql_result": ColumnarResult.from_rows(["LOCATION", "TotalCost", "FTE", "Headcount"], rows),
+            "hypotheses_queue": ["GRADE", "TENURE_BUCKET", "VBU"],
+            "confirmed_causes": [f"FACTOR_{i}: Cost is {10 + i}% higher in group {i}." for i in range(findings)],
+            "stream_buffer": [f"Executor: Running sp_GetDistribution step {i}..." for i in range(40)],
+            "loop_count": 4,
+        },
+        "channel_versions": {k: f"{i:032}.0" for i, k in enumerate(["messages", "sql_result", "stream_buffer"])},
+        "versions_seen": {"agent_planner_node": {"messages": "00000000000000000000000000000001.0"}},
+    }
+
+def bench(label: str, encode, decode, checkpoint: dict):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        blob = encode(checkpoint)
+    encode_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        decode(blob)
+    decode_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    print(f"{label:<28} {len(blob):>9,} B  encode {encode_us:>8.1f} us  decode {decode_us:>8.1f} us")
+
+def main():
+    print("--- Checkpoint serde benchmark (typical diagnostic state) ---")
+    for size_label, kwargs in [("small", dict(turns=2, findings=2, result_rows=5)),
+                               ("typical", dict()),
+                               ("long session", dict(turns=30, findings=25, result_rows=200))]:
+        checkpoint = build_diagnostic_checkpoint(**kwargs)
+        print(f"\n[{size_label}]")
+
+        # Baseline: the previous NVARCHAR format (lossy: messages become str)
+        bench("json (default=str)",
+              lambda c: json.dumps(c, default=str).encode("utf-16-le"),
+              lambda b: json.loads(b.decode("utf-16-le")),
+              checkpoint)
+
+        for compression in (None, "zlib", "zstd"):
+            serde = CheckpointSerde(compression=compression, threshold=0)
+            bench(f"msgpack + {compression or 'raw'}", serde.dumps, serde.loads, checkpoint)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from db_agent.config import (
+    KG_ENGINE_ENABLED, KG_VERSION_QUERY, KG_VERSION_CHECK_S, KG_REFRESH_S, KG_LINK_WEIGHT_COLUMN,
+)
+from db_agent.nlp.text_features import normalize_text
+
+KG_EDGES_QUERY = f"""
+    SELECT SourceNode.NodeName, SourceNode.MappedColumn, TargetNode.NodeName, TargetNode.MappedColumn,
+           {f"CAST(Link.[{KG_LINK_WEIGHT_COLUMN}] AS FLOAT)" if KG_LINK_WEIGHT_COLUMN else "CAST(1.0 AS FLOAT)"} AS Weight
+    FROM KG_Node AS SourceNode, KG_CausalLink AS Link, KG_Node AS TargetNode
+    WHERE MATCH(SourceNode-(Link)->TargetNode)
+    """
+
+
+class Cause(NamedTuple):
+    node: str
+    column: Optional[str]  # SQL column the hypothesis is tested on (KG_Node.MappedColumn)
+    depth: int             # 1 = direct driver, 2 = driver of a driver, ...
+    strength: float = 1.0  # Strongest path to the target: product of the link weights along it
+
+
+class CausalGraph:
+    """
+    Immutable snapshot of KG_Node / KG_CausalLink. Each node's causes (parents) are
+    stored CSR-style: parents of node i are parent_idx[parent_ptr[i]:parent_ptr[i + 1]],
+    with the link weights at the same positions of parent_weight.
+    """
+
+    def __init__(self, names: List[str], columns: List[Optional[str]],
+                 parent_ptr: np.ndarray, parent_idx: np.ndarray, parent_weight: Optional[np.ndarray] = None):
+        self.names = names
+        self.columns = columns
+        self.parent_ptr = parent_ptr
+        self.parent_idx = parent_idx
+        self.parent_weight = parent_weight if parent_weight is not None else np.ones(len(parent_idx), dtype=np.float32)
+        self._ids = {name.lower(): i for i, name in enumerate(names)}
+        # Metric names a question can mention (nodes with drivers), longest first so "Cost per head" beats "Cost"
+        targets = sorted((n for i, n in enumerate(names) if parent_ptr[i + 1] > parent_ptr[i]), key=len, reverse=True)
+        self._target_pattern = (
+            re.compile(r"\b(" + "|".join(re.escape(normalize_text(t)) for t in targets) + r")\b") if targets else None
+        )
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[tuple]) -> "CausalGraph":
+        """Edges are (cause, cause column, effect, effect column[, weight]); a missing weight is 1.0."""
+        ids: Dict[str, int] = {}
+        names: List[str] = []
+        columns: List[Optional[str]] = []
+
+        def node(name: str, column: Optional[str]) -> int:
+            key = name.strip().lower()
+            if key not in ids:
+                ids[key] = len(names)
+                names.append(name.strip())
+                columns.append(column or None)
+            elif column and columns[ids[key]] is None:
+                columns[ids[key]] = column
+            return ids[key]
+
+        weights: Dict[Tuple[int, int], float] = {}
+        for source, source_col, target, target_col, *rest in edges:
+            if source and target:
+                weight = rest[0] if rest and rest[0] is not None else 1.0
+                pair = (node(target, target_col), node(source, source_col))
+                weights[pair] = max(weight, weights.get(pair, 0.0))
+        pairs = sorted(weights)
+        ordered = np.array(pairs, dtype=np.int32).reshape(-1, 2)
+
+        parent_ptr = np.zeros(len(names) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(ordered[:, 0], minlength=len(names)), out=parent_ptr[1:])
+        return cls(names, columns, parent_ptr, ordered[:, 1].copy(),
+                   np.array([weights[p] for p in pairs], dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.parent_idx)
+
+    def ancestors(self, target: str, max_depth: int = 1) -> List[Cause]:
+        """Causes of `target` up to `max_depth` hops, nearest first (breadth-first; cycles are safe)."""
+        start = self._ids.get(target.strip().lower())
+        if start is None:
+            return []
+        seen = np.zeros(len(self.names), dtype=bool)
+        seen[start] = True
+        strength = np.zeros(len(self.names), dtype=np.float32)
+        strength[start] = 1.0
+        frontier = np.array([start], dtype=np.int32)
+        causes: List[Cause] = []
+        for depth in range(1, max_depth + 1):
+            spans = [slice(self.parent_ptr[i], self.parent_ptr[i + 1]) for i in frontier]
+            parents = np.concatenate([self.parent_idx[s] for s in spans])
+            path = np.concatenate([self.parent_weight[s] * strength[i] for s, i in zip(spans, frontier)])
+            fresh = ~seen[parents]
+            parents, path = parents[fresh], path[fresh]
+            if not len(parents):
+                break
+            np.maximum.at(strength, parents, path)  # Strongest of the paths reaching a node at this depth
+            parents = np.unique(parents)
+            seen[parents] = True
+            causes.extend(Cause(self.names[i], self.columns[i], depth, float(strength[i])) for i in parents.tolist())
+            frontier = parents
+        return causes
+
+    def find_target(self, text: str) -> Optional[str]:
+        """The (longest) metric node named in `text`, if any."""
+        if self._target_pattern is None:
+            return None
+        match = self._target_pattern.search(normalize_text(text))
+        if match is None:
+            return None
+        matched = match.group(1)
+        return next(n for n in self.names if normalize_text(n) == matched)
+
+
+class CausalGraphStore:
+    """
+    Holds the current CausalGraph. current() reloads it when the KG version query
+    reports a change (checked at most every `version_check_s`) or after `refresh_s`;
+    a failed reload keeps serving the previous snapshot.
+    """
+
+    def __init__(self, loader=None, version_fn=None,
+                 version_check_s: float = KG_VERSION_CHECK_S, refresh_s: float = KG_REFRESH_S):
+        self._loader = loader or _load_edges
+        self._version_fn = version_fn if version_fn is not None else (_kg_version if KG_VERSION_QUERY else None)
+        self.version_check_s = version_check_s
+        self.refresh_s = refresh_s
+
+        self._graph: Optional[CausalGraph] = None
+        self._version: object = None
+        self._lock = threading.Lock()
+        self._next_check_at = 0.0
+        self.loaded_at = 0.0
+        self.reloads = 0
+
+    def current(self) -> CausalGraph:
+        """Blocking (database I/O when a check is due). Raises only if no snapshot was ever loaded."""
+        now = time.time()
+        if self._graph is not None and now < self._next_check_at:
+            return self._graph
+        with self._lock:
+            if self._graph is None or time.time() >= self._next_check_at:
+                try:
+                    self._check_locked()
+                except Exception as e:
+                    if self._graph is None:
+                        raise
+                    print(f"   > [CausalGraph] Refresh failed (serving previous graph): {e}")
+                self._next_check_at = time.time() + self.version_check_s
+            return self._graph
+
+    def _check_locked(self) -> None:
+        version = self._version_fn() if self._version_fn is not None else None
+        if (self._graph is not None and version == self._version
+                and time.time() - self.loaded_at < self.refresh_s):
+            return
+        start = time.perf_counter()
+        graph = CausalGraph.from_edges(self._loader())
+        self._graph, self._version = graph, version
+        self.loaded_at = time.time()
+        self.reloads += 1
+        print(f"   > [CausalGraph] Loaded {len(graph)} nodes / {graph.edge_count} links "
+              f"in {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    def stats(self) -> Dict[str, object]:
+        graph = self._graph
+        return {
+            "nodes": len(graph) if graph else 0,
+            "links": graph.edge_count if graph else 0,
+            "reloads": self.reloads,
+            "loaded_at": self.loaded_at,
+            "version": self._version,
+        }
+
+
+# -------------------------------------------------------------------------
+# SQL
+# -------------------------------------------------------------------------
+def _load_edges() -> List[tuple]:
+    from db_agent.client.az_sql import SQLQueryExecutor
+    df = SQLQueryExecutor().execute_query(KG_EDGES_QUERY)
+    return [
+        tuple(v if isinstance(v, str) else None for v in row[:4]) + (None if row[4] is None or row[4] != row[4] else float(row[4]),)  # NULL / NaN -> 1.0
+        for row in df.itertuples(index=False, name=None)
+    ]
+
+def _kg_version() -> object:
+    from db_agent.client.az_sql import SQLQueryExecutor
+    df = SQLQueryExecutor().execute_query(KG_VERSION_QUERY)
+    return tuple(df.iloc[0].tolist()) if len(df) else None
+
+
+_CAUSAL_GRAPH: Optional[CausalGraphStore] = None
+_CAUSAL_GRAPH_LOCK = threading.Lock()
+
+def get_causal_graph() -> Optional[CausalGraphStore]:
+    """Process-wide in-memory knowledge graph (None when disabled: query KG tables per question)."""
+    global _CAUSAL_GRAPH
+    if not KG_ENGINE_ENABLED:
+        return None
+    with _CAUSAL_GRAPH_LOCK:
+        if _CAUSAL_GRAPH is None:
+            _CAUSAL_GRAPH = CausalGraphStore()
+        return _CAUSAL_GRAPH
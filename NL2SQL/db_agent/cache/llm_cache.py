@@ -0,0 +1,21 @@
+import threading
+from typing import Optional
+from agent_cache.backends import SQLiteCacheBackend
+from agent_cache.llm_cache import CachedRunResult, LLMResponseCache, MemoizedAgent
+from db_agent.config import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL
+
+__all__ = ["CachedRunResult", "LLMResponseCache", "MemoizedAgent", "get_llm_cache"]
+
+
+_LLM_CACHE: Optional[LLMResponseCache] = None
+_LLM_CACHE_LOCK = threading.Lock()
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide LLM response cache (None when disabled)."""
+    global _LLM_CACHE
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _LLM_CACHE_LOCK:
+        if _LLM_CACHE is None:
+            _LLM_CACHE = LLMResponseCache(SQLiteCacheBackend(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES), LLM_CACHE_TTL)
+        return _LLM_CACHE
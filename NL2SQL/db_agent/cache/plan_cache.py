@@ -0,0 +1,80 @@
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+from agent_cache.backends import CacheBackend, build_backend
+from db_agent.config import (
+    PLAN_CACHE_BACKEND, PLAN_CACHE_TTL, PLAN_CACHE_MAX_SIZE, PLAN_CACHE_SQLITE_PATH, PLAN_CACHE_REDIS_URL,
+)
+from db_agent.nlp.text_features import normalize_text
+
+
+def plan_cache_key(user_input: str, intent: str, tenant_id: str) -> str:
+    """Stable key for (normalized question, intent, tenant)."""
+    raw = "\x1f".join([normalize_text(user_input), str(intent or ""), str(tenant_id or "")])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """
+    Cache of planner decisions (PlannerOutput dumps) keyed by plan_cache_key().
+    Storage is pluggable (memory / SQLite / Redis); hit/miss counters are per process.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = PLAN_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            plan = self.backend.get(key)
+        except Exception as e:
+            # A broken cache must never break planning
+            self.errors += 1
+            print(f"   > [PlanCache] Lookup failed: {e}")
+            plan = None
+        if plan is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return plan
+
+    def set(self, key: str, plan: Dict[str, Any]) -> None:
+        try:
+            self.backend.set(key, plan, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            print(f"   > [PlanCache] Store failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+_PLAN_CACHE: Optional[PlanCache] = None
+_PLAN_CACHE_LOCK = threading.Lock()
+
+def get_plan_cache() -> Optional[PlanCache]:
+    """Process-wide plan cache built from config (None when disabled)."""
+    global _PLAN_CACHE
+    if PLAN_CACHE_BACKEND is None:
+        return None
+    with _PLAN_CACHE_LOCK:
+        if _PLAN_CACHE is None:
+            backend = build_backend(
+                PLAN_CACHE_BACKEND,
+                namespace="plan",
+                max_size=PLAN_CACHE_MAX_SIZE,
+                sqlite_path=PLAN_CACHE_SQLITE_PATH,
+                redis_url=PLAN_CACHE_REDIS_URL,
+            )
+            _PLAN_CACHE = PlanCache(backend)
+        return _PLAN_CACHE
@@ -0,0 +1,237 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from db_agent.config import (
+    RESULT_CACHE_ENABLED, RESULT_CACHE_TTL, RESULT_CACHE_MAX_MB, RESULT_CACHE_VERSION_QUERY, RESULT_CACHE_VERSION_CHECK_S,
+)
+
+_PROBE_RETRY_S = 60  # Back-off after a failed data version probe
+
+
+def canonical_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    SP parameters as the database sees them: names are case-insensitive and the
+    '@' is optional, strings are compared trimmed, 5.0 == 5. `tool_name` is not a parameter.
+    """
+    canonical = {}
+    for name, value in (params or {}).items():
+        if name == "tool_name":
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        canonical[name.lstrip("@").lower()] = value
+    return canonical
+
+def result_cache_key(tool_name: str, params: Dict[str, Any], tenant_id: str) -> str:
+    raw = json.dumps([str(tool_name).lower(), canonical_params(params), str(tenant_id or "")],
+                     sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("tool_name", "result", "size", "expires_at", "version")
+
+    def __init__(self, tool_name, result, size, expires_at, version):
+        self.tool_name = tool_name
+        self.result = result
+        self.size = size
+        self.expires_at = expires_at
+        self.version = version
+
+
+class SPResultCache:
+    """
+    Results of stored-procedure calls keyed by (tool, canonical params, tenant).
+
+    - TTL per entry, LRU eviction under an approximate byte budget.
+    - Single-flight: concurrent identical calls (any thread / event loop) share
+      one database round trip; followers await the leader's future.
+    - Invalidation: `version_fn` returns the current data version (change
+      tracking / rowversion); when it moves, every cached result is dropped.
+      `invalidate()` is the manual hook for loaders that know better.
+    """
+
+    def __init__(self,
+                 max_bytes: int = RESULT_CACHE_MAX_MB * 1024 * 1024,
+                 ttl: float = RESULT_CACHE_TTL,
+                 version_fn: Optional[Callable[[], Awaitable[Any]]] = None,
+                 version_check_s: float = RESULT_CACHE_VERSION_CHECK_S,
+                 ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version_fn = version_fn
+        self.version_check_s = version_check_s
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._version: Any = None
+        self._next_probe_at = 0.0
+        self._version_error_logged = False
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get_or_fetch(self,
+                           tool_name: str,
+                           params: Dict[str, Any],
+                           tenant_id: str,
+                           fetch: Callable[[], Awaitable[Any]],
+                           ) -> Any:
+        """Cached result of `fetch()` for this call, running it at most once concurrently."""
+        await self._check_version()
+        key = result_cache_key(tool_name, params, tenant_id)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.time() and entry.version == self._version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.result
+            if entry is not None:
+                self._drop(key)
+
+            leader_future = self._inflight.get(key)
+            if leader_future is None:
+                leader_future = self._inflight[key] = concurrent.futures.Future()
+                leader = True
+                self.misses += 1
+            else:
+                leader = False
+                self.coalesced += 1
+            version = self._version
+
+        if not leader:
+            print(f"   > [ResultCache] Waiting for identical in-flight {tool_name} call")
+            return await asyncio.wrap_future(leader_future)
+
+        try:
+            result = await fetch()
+        except BaseException as e:
+            # Errors are shared with current followers but never cached
+            leader_future.set_exception(e)
+            with self._lock:
+                self._inflight.pop(key, None)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            # Stamped with the version seen before the fetch: a load that lands
+            # mid-query makes the entry stale at the next probe
+            self._store(key, _Entry(tool_name, result, _estimate_size(result), time.time() + self.ttl, version))
+        leader_future.set_result(result)
+        return result
+
+    def invalidate(self, tool_name: Optional[str] = None) -> int:
+        """Drops cached results (all, or only one tool's). Returns how many were dropped."""
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if tool_name in (None, e.tool_name)]
+            for key in keys:
+                self._drop(key)
+            self.invalidations += 1
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "data_version": self._version,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    # ---------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------
+    async def _check_version(self) -> None:
+        if self.version_fn is None or time.monotonic() < self._next_probe_at:
+            return
+        try:
+            version = await self.version_fn()
+        except Exception as e:
+            # No change tracking / permissions: fall back to TTL-only expiry, retry later
+            if not self._version_error_logged:
+                print(f"   > [ResultCache] Data version probe failed, using TTL only: {e}")
+                self._version_error_logged = True
+            self._next_probe_at = time.monotonic() + max(self.version_check_s, _PROBE_RETRY_S)
+            return
+        self._next_probe_at = time.monotonic() + self.version_check_s
+
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    print(f"   > [ResultCache] Data version {self._version} -> {version}, dropping {len(self._entries)} results")
+                    self.invalidations += 1
+                for key in list(self._entries):
+                    self._drop(key)
+                self._version = version
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        if entry.size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+def _estimate_size(result: Any) -> int:
+    """Rough in-memory size of a BoundedResult (rows of tuples) or any other value."""
+    rows = getattr(result, "rows", None)
+    if rows is None:
+        return sys.getsizeof(result)
+    size = sys.getsizeof(rows) + sum(sys.getsizeof(c) for c in getattr(result, "columns", ()))
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+    return size
+
+async def _probe_data_version() -> Any:
+    # Imported lazily: the cache itself has no driver dependency
+    from db_agent.client.az_sql import SQLQueryExecutor
+    frame = await SQLQueryExecutor().aexecute_query(RESULT_CACHE_VERSION_QUERY)
+    version = frame.iloc[0, 0] if len(frame) else None
+    if version is None or version != version:  # NULL (NaN): change tracking is off
+        raise RuntimeError("version query returned NULL (is change tracking enabled?)")
+    return version
+
+
+_RESULT_CACHE: Optional[SPResultCache] = None
+_RESULT_CACHE_LOCK = threading.Lock()
+
+def get_result_cache() -> Optional[SPResultCache]:
+    """Process-wide SP result cache built from config (None when disabled)."""
+    global _RESULT_CACHE
+    if not RESULT_CACHE_ENABLED:
+        return None
+    with _RESULT_CACHE_LOCK:
+        if _RESULT_CACHE is None:
+            _RESULT_CACHE = SPResultCache(
+                version_fn=_probe_data_version if RESULT_CACHE_VERSION_QUERY else None,
+            )
+        return _RESULT_CACHE
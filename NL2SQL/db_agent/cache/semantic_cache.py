@@ -0,0 +1,196 @@
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+import numpy as np
+from db_agent.config import (
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_DIM, SEMANTIC_CACHE_MAX_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL,
+)
+from db_agent.nlp.text_features import (
+    DIAGNOSTIC_CUES, extract_numbers, hash_embed, normalize_text, stem, tokenize,
+)
+
+
+class SemanticPlanCache:
+    """
+    Paraphrase-tolerant plan cache: past (question -> intent + PlannerOutput)
+    pairs in a fixed-size NumPy matrix of hashed embeddings, searched brute force
+    (one matrix-vector product; ~1k rows x 2k dims is well under a millisecond).
+
+    A hit needs cosine >= threshold AND the entity checks:
+      - every value in the cached tool_params appears in the new question,
+      - every content word of the new question is in the cached question, in the
+        plan's params, or a filler word ("total", "much"): a filter, period or
+        grouping the plan lacks ("in london", "last month", "by location") misses,
+      - plans without tool_params only match the exact same content words,
+      - both questions mention the same numbers,
+      - both agree on diagnostic cues ("why", "cause", ...).
+    Adding is incremental: a free or least-recently-used slot is overwritten,
+    the index is never rebuilt.
+    """
+
+    def __init__(self,
+                 dim: int = SEMANTIC_CACHE_DIM,
+                 max_size: int = SEMANTIC_CACHE_MAX_SIZE,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl: float = SEMANTIC_CACHE_TTL,
+                 ):
+        self.dim = dim
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+
+        self._vectors = np.zeros((max_size, dim), dtype=np.float32)
+        self._expires = np.zeros(max_size, dtype=np.float64)   # 0 = empty slot
+        self._last_used = np.zeros(max_size, dtype=np.float64)
+        self._tenants = np.empty(max_size, dtype=object)
+        self._entries: list = [None] * max_size
+        self._slots: Dict[tuple, int] = {}                       # (tenant, normalized question) -> slot
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def add(self, user_input: str, intent: str, tenant_id: str, plan: Dict[str, Any]) -> None:
+        key = (tenant_id, normalize_text(user_input))
+        vector = hash_embed(user_input, self.dim)
+        now = time.time()
+        entry = {
+            "question": user_input,
+            "intent": intent,
+            "plan": plan,
+            "numbers": extract_numbers(user_input),
+            "tokens": set(tokenize(user_input)),
+            "cues": _cues(user_input),
+        }
+
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._free_slot(now)
+                self._slots[key] = slot
+            self._vectors[slot] = vector
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._tenants[slot] = tenant_id
+            self._entries[slot] = (key, entry)
+
+    def lookup(self, user_input: str, tenant_id: str) -> Optional[Dict[str, Any]]:
+        """Best cached {question, intent, plan, score} for a paraphrase, or None."""
+        vector = hash_embed(user_input, self.dim)
+        now = time.time()
+
+        with self._lock:
+            live = (self._expires > now) & (self._tenants == tenant_id)
+            if not live.any():
+                self.misses += 1
+                return None
+            scores = self._vectors @ vector
+            scores[~live] = -1.0
+            slot = int(np.argmax(scores))
+            score = float(scores[slot])
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            _, entry = self._entries[slot]
+
+            if not _entities_match(user_input, entry):
+                self.rejected += 1
+                self.misses += 1
+                return None
+            self._last_used[slot] = now
+            self.hits += 1
+            return {**entry, "score": score}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._slots),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+        }
+
+    def _free_slot(self, now: float) -> int:
+        # Empty or expired slots first, then the least recently used one
+        candidates = np.flatnonzero(self._expires <= now)
+        slot = int(candidates[0]) if len(candidates) else int(np.argmin(self._last_used))
+        previous = self._entries[slot]
+        if previous is not None:
+            self._slots.pop(previous[0], None)
+            self._entries[slot] = None
+            if self._expires[slot] > now:
+                self.evictions += 1
+        return slot
+
+
+# -------------------------------------------------------------------------
+# HELPERS
+# -------------------------------------------------------------------------
+# Entity-type words users drop when paraphrasing ("Project Atlas" -> "Atlas")
+_ENTITY_NOUNS = frozenset(stem(w) for w in (
+    "project", "customer", "client", "account", "location", "region", "country", "grade", "team",
+))
+
+# Words that restate a question without narrowing it ("total cost of Atlas" == "cost of Atlas")
+_FILLER = frozenset(stem(w) for w in (
+    "total", "overall", "much", "amount", "spend", "spent", "spending", "figure", "value", "current",
+    "currently", "exact", "exactly", "about", "know", "see", "want", "like", "need", "let", "just",
+    "find", "list", "display", "provide", "check", "kindly", "quick",
+))
+
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+def _cues(text: str) -> Set[str]:
+    return {t for t in tokenize(text) if t in DIAGNOSTIC_CUES}
+
+def _param_tokens(params: Dict[str, Any]) -> Set[str]:
+    """Content words the plan's params account for: names (ProjectName -> project, name) and values."""
+    tokens = set()
+    for key, value in params.items():
+        tokens.update(tokenize(_CAMEL.sub(" ", str(key)).replace("_", " ")))
+        if value is not None and not isinstance(value, bool):
+            tokens.update(tokenize(str(value)))
+    return tokens
+
+def _entities_match(user_input: str, entry: Dict[str, Any]) -> bool:
+    if extract_numbers(user_input) != entry["numbers"] or _cues(user_input) != entry["cues"]:
+        return False
+
+    tokens = set(tokenize(user_input))
+    params = entry["plan"].get("tool_params") or {}
+    # Anything else the new question asks for (a filter, period, grouping) the cached plan would silently drop
+    if tokens - entry["tokens"] - _param_tokens(params) - _FILLER:
+        return False
+
+    if not params:
+        # Nothing to verify the plan against: only a reordering / punctuation variant may reuse it
+        return tokens == entry["tokens"]
+
+    numbers = extract_numbers(user_input)
+    for value in params.values():
+        if isinstance(value, bool) or value is None:
+            continue
+        if isinstance(value, (int, float)):
+            if str(value) not in numbers:
+                return False
+        elif not set(tokenize(str(value))) - _ENTITY_NOUNS <= tokens:
+            return False
+    return True
+
+
+_SEMANTIC_CACHE: Optional[SemanticPlanCache] = None
+_SEMANTIC_CACHE_LOCK = threading.Lock()
+
+def get_semantic_cache() -> Optional[SemanticPlanCache]:
+    """Process-wide semantic cache (None when disabled)."""
+    global _SEMANTIC_CACHE
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    with _SEMANTIC_CACHE_LOCK:
+        if _SEMANTIC_CACHE is None:
+            _SEMANTIC_CACHE = SemanticPlanCache()
+        return _SEMANTIC_CACHE
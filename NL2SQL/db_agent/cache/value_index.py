@@ -0,0 +1,272 @@
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from db_agent.config import (
+    RESULT_CACHE_VERSION_QUERY,
+    VALUE_INDEX_ENABLED, VALUE_INDEX_REFRESH_S, VALUE_INDEX_VERSION_CHECK_S, VALUE_INDEX_TENANT_COLUMN,
+    VALUE_INDEX_FUZZY_AUTOCORRECT, VALUE_INDEX_FUZZY_MIN,
+)
+
+# Tool parameter -> column whose distinct values it must match
+VALIDATION_MAP = {
+    "ProjectName":  {"Table": "SEMANTIC.COST_PER_PERSON", "Col": "PROJECT_NAME"},
+    "CustomerName": {"Table": "SEMANTIC.COST_PER_PERSON", "Col": "CUSTOMER_NAME"},
+    "Location":     {"Table": "SEMANTIC.COST_PER_PERSON", "Col": "LOCATION"},
+}
+
+
+class ValueMatch(NamedTuple):
+    """
+    status: "exact" | "unique" (one substring match) | "fuzzy" (typo corrected)
+            | "ambiguous" (see options) | "missing"
+    """
+    status: str
+    value: Optional[str] = None
+    options: Tuple[str, ...] = ()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def similarity(a: str, b: str) -> float:
+    """1 - Levenshtein(a, b) / max(len): 1.0 for equal strings."""
+    if a == b:
+        return 1.0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return 1.0 - previous[-1] / max(len(a), 1)
+
+
+class ValueIndex:
+    """
+    Distinct values of one column: case-insensitive exact dict + trigram
+    inverted index (substring candidates, fuzzy candidates for edit distance).
+    """
+
+    def __init__(self):
+        self._canonical: Dict[str, str] = {}      # casefolded -> value as stored
+        self._postings: Dict[str, Set[str]] = {}  # trigram -> casefolded values
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def update(self, values: Iterable[str]) -> Tuple[int, int]:
+        """Applies the current distinct values as a diff. Returns (added, removed)."""
+        fresh = {str(v).casefold(): str(v) for v in values if v is not None and str(v).strip()}
+        removed = self._canonical.keys() - fresh.keys()
+        added = fresh.keys() - self._canonical.keys()
+        for key in removed:
+            for gram in _trigrams(key):
+                bucket = self._postings.get(gram)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._postings[gram]
+        for key in added:
+            for gram in _trigrams(key):
+                self._postings.setdefault(gram, set()).add(key)
+        self._canonical = fresh
+        return len(added), len(removed)
+
+    def resolve(self, value: str, max_options: int = 5) -> ValueMatch:
+        query = str(value).strip().casefold()
+        if query in self._canonical:
+            return ValueMatch("exact", self._canonical[query])
+
+        # Substring (what LIKE '%value%' returned)
+        matches = self._substring(query)
+        if len(matches) == 1:
+            return ValueMatch("unique", self._canonical[matches[0]])
+        if matches:
+            # Closest first: prefix matches, then the least extra text (cheap, no edit distance needed)
+            ranked = sorted(matches, key=lambda key: (not key.startswith(query), len(key), key))
+            return ValueMatch("ambiguous", options=tuple(self._canonical[k] for k in ranked[:max_options]))
+
+        # Typos: rank trigram neighbours by edit distance
+        scored = self._fuzzy(query)
+        good = [(score, key) for score, key in scored if score >= VALUE_INDEX_FUZZY_MIN]
+        if not good:
+            return ValueMatch("missing")
+        best_score, best_key = good[0]
+        runner_up = good[1][0] if len(good) > 1 else 0.0
+        if best_score >= VALUE_INDEX_FUZZY_AUTOCORRECT and runner_up < VALUE_INDEX_FUZZY_AUTOCORRECT:
+            return ValueMatch("fuzzy", self._canonical[best_key])
+        return ValueMatch("ambiguous", options=tuple(self._canonical[k] for _, k in good[:max_options]))
+
+    def _substring(self, query: str) -> List[str]:
+        grams = _trigrams(query)
+        if not grams:
+            candidates = self._canonical.keys()  # 1-2 characters: plain scan
+        else:
+            buckets = sorted((self._postings.get(g, set()) for g in grams), key=len)
+            candidates = set(buckets[0]).intersection(*buckets[1:]) if buckets[0] else set()
+        return sorted(key for key in candidates if query in key)
+
+    def _fuzzy(self, query: str, shortlist: int = 10) -> List[Tuple[float, str]]:
+        overlap = Counter()
+        for gram in _trigrams(query):
+            overlap.update(self._postings.get(gram, ()))
+        # A length gap alone can push the similarity under VALUE_INDEX_FUZZY_MIN: skip those
+        max_gap = (1.0 - VALUE_INDEX_FUZZY_MIN) * len(query)
+        candidates = [key for key, _ in overlap.most_common(shortlist * 3) if abs(len(key) - len(query)) <= max_gap]
+        scored = [(similarity(query, key), key) for key in candidates[:shortlist]]
+        return sorted(scored, key=lambda x: (-x[0], x[1]))
+
+
+class CategoricalValueIndex:
+    """
+    Per-tenant ValueIndex for every VALIDATION_MAP parameter.
+    Loaded with one query, then kept current by a background thread that
+    re-reads the distinct values (applied as a diff) when the data version
+    moves or VALUE_INDEX_REFRESH_S elapses. Lookups never touch the database.
+    """
+
+    def __init__(self,
+                 loader: Optional[Callable[[], Iterable[Tuple[str, str, str]]]] = None,
+                 version_fn: Optional[Callable[[], object]] = None,
+                 refresh_s: float = VALUE_INDEX_REFRESH_S,
+                 version_check_s: float = VALUE_INDEX_VERSION_CHECK_S,
+                 ):
+        self._loader = loader or _load_distinct_values
+        self._version_fn = version_fn if version_fn is not None else (_data_version if RESULT_CACHE_VERSION_QUERY else None)
+        self.refresh_s = refresh_s
+        self.version_check_s = version_check_s
+
+        self._indexes: Dict[Tuple[str, str], ValueIndex] = {}  # (tenant_id, param) -> index
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._version: object = None
+        self.loaded_at = 0.0
+        self.refreshes = 0
+
+    def start(self) -> None:
+        """Starts the background loader/refresher once (safe to call from every entry point)."""
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._run, name="value-index-refresher", daemon=True)
+            self._worker.start()
+
+    def ensure_loaded(self) -> bool:
+        """Blocks until the first load finished (loading now if nobody has). False if it failed."""
+        if not self._loaded.is_set():
+            with self._load_lock:  # Waits for a load already in flight instead of starting another
+                if not self._loaded.is_set():
+                    try:
+                        self._refresh_locked()
+                    except Exception as e:
+                        print(f"   > [ValueIndex] Load failed: {e}")
+        return self._loaded.is_set()
+
+    def resolve(self, tenant_id: str, param: str, value: str) -> Optional[ValueMatch]:
+        """Match for `value` among the distinct values of `param` (None if the param is not indexed)."""
+        key = ((tenant_id or "") if VALUE_INDEX_TENANT_COLUMN else "", param)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                return ValueMatch("missing") if param in VALIDATION_MAP and self._loaded.is_set() else None
+            return index.resolve(value)
+
+    def refresh(self) -> None:
+        with self._load_lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        if self._version_fn is not None:
+            try:
+                self._version = self._version_fn()
+            except Exception:
+                pass  # Version is only a refresh trigger; the load itself decides success
+        start = time.perf_counter()
+        grouped: Dict[Tuple[str, str], List[str]] = {}
+        for tenant_id, param, value in self._loader():
+            grouped.setdefault((tenant_id, param), []).append(value)
+
+        added = removed = 0
+        with self._lock:
+            for key in list(self._indexes.keys() - grouped.keys()):
+                removed += len(self._indexes.pop(key))
+            for key, values in grouped.items():
+                a, r = self._indexes.setdefault(key, ValueIndex()).update(values)
+                added, removed = added + a, removed + r
+        self.loaded_at = time.time()
+        self.refreshes += 1
+        self._loaded.set()
+        print(f"   > [ValueIndex] Refreshed {len(grouped)} columns in {(time.perf_counter() - start) * 1e3:.0f} ms "
+              f"(+{added} / -{removed} values)")
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            sizes = {f"{t}:{p}" if t else p: len(i) for (t, p), i in self._indexes.items()}
+        return {"values": sizes, "refreshes": self.refreshes, "loaded_at": self.loaded_at, "data_version": self._version}
+
+    # ---------------------------------------------------------
+    # Background refresher
+    # ---------------------------------------------------------
+    def _run(self) -> None:
+        self.ensure_loaded()
+        while True:
+            time.sleep(self.version_check_s)
+            try:
+                if self._stale():
+                    self.refresh()
+            except Exception as e:
+                print(f"   > [ValueIndex] Refresh failed (serving previous values): {e}")
+
+    def _stale(self) -> bool:
+        if not self._loaded.is_set() or time.time() - self.loaded_at >= self.refresh_s:
+            return True
+        if self._version_fn is None:
+            return False
+        try:
+            return self._version_fn() != self._version
+        except Exception:
+            return False
+
+
+# -------------------------------------------------------------------------
+# SQL
+# -------------------------------------------------------------------------
+def _load_distinct_values() -> List[Tuple[str, str, str]]:
+    """(tenant_id, param, value) for every distinct value, in one round trip."""
+    from db_agent.client.az_sql import SQLQueryExecutor
+
+    tenant = VALUE_INDEX_TENANT_COLUMN
+    parts = []
+    for param, target in VALIDATION_MAP.items():
+        col, table = target["Col"], target["Table"]
+        parts.append(
+            f"SELECT {f'CAST({tenant} AS NVARCHAR(255))' if tenant else 'CAST(NULL AS NVARCHAR(255))'} AS tenant_id, "
+            f"'{param}' AS param, CAST({col} AS NVARCHAR(400)) AS value "
+            f"FROM {table} WHERE {col} IS NOT NULL GROUP BY {f'{tenant}, ' if tenant else ''}{col}"
+        )
+    df = SQLQueryExecutor().execute_query("\nUNION ALL\n".join(parts))
+    return [("" if not isinstance(t, str) else t, p, v) for t, p, v in df.itertuples(index=False, name=None)]
+
+def _data_version() -> object:
+    from db_agent.client.az_sql import SQLQueryExecutor
+    df = SQLQueryExecutor().execute_query(RESULT_CACHE_VERSION_QUERY)
+    return df.iloc[0, 0] if len(df) else None
+
+
+_VALUE_INDEX: Optional[CategoricalValueIndex] = None
+_VALUE_INDEX_LOCK = threading.Lock()
+
+def get_value_index() -> Optional[CategoricalValueIndex]:
+    """Process-wide categorical value index (None when disabled)."""
+    global _VALUE_INDEX
+    if not VALUE_INDEX_ENABLED:
+        return None
+    with _VALUE_INDEX_LOCK:
+        if _VALUE_INDEX is None:
+            _VALUE_INDEX = CategoricalValueIndex()
+        return _VALUE_INDEX
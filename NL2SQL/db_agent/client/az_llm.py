@@ -1,42 +1,166 @@
 from __future__ import annotations
 
 import asyncio
+import threading
 import time
 import os
-from typing import Optional, Type, Literal
+import weakref
+from typing import Any, Dict, Optional, Type, Literal
+import httpx
+from openai import AsyncOpenAI
 from pydantic_ai.models.openai import OpenAIChatModel
+from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic import BaseModel
-from pydantic_ai import Agent, ModelSettings
-from db_agent.config import OPENAI_API_KEY, CHAT_MODEL_DEPLOYMENT
+from pydantic_ai import Agent, ModelSettings, RunContext
+from db_agent.config import (
+    OPENAI_API_KEY, CHAT_MODEL_DEPLOYMENT,
+    LLM_HTTP_MAX_CONNECTIONS, LLM_HTTP_KEEPALIVE, LLM_HTTP_KEEPALIVE_EXPIRY, LLM_HTTP_TIMEOUT,
+)
 from db_agent.schema.pydantic_models import NaturalAnswerOutput, ReasoningEffort
+from db_agent.cache.llm_cache import MemoizedAgent, get_llm_cache
 
 os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
 
+# -------------------------------------------------------------------------
+# SHARED PROVIDER CONNECTIONS
+# -------------------------------------------------------------------------
+class _ModelScope:
+    """One keep-alive HTTP pool and the models using it."""
+    def __init__(self):
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_KEEPALIVE,
+                keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(LLM_HTTP_TIMEOUT, connect=10.0),
+        )
+        self.provider = OpenAIProvider(openai_client=AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=self.http_client))
+        self.models: Dict[str, OpenAIChatModel] = {}
+
+# httpx connections belong to the event loop that opened them: one scope per loop.
+# Streamlit runs every message in a fresh asyncio.run(), so there the pool is only
+# reused by the LLM calls of one message; close_shared_models() releases it when
+# the message is done (the CLI keeps one loop, and one pool, for the whole session).
+_LOOP_SCOPES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _ModelScope]" = weakref.WeakKeyDictionary()
+_DEFAULT_SCOPE: Optional[_ModelScope] = None
+_SCOPES_LOCK = threading.Lock()
+
+def shared_model(model_name: str) -> OpenAIChatModel:
+    """The calling event loop's model for `model_name` (built once, shares the loop's HTTP pool)."""
+    global _DEFAULT_SCOPE
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    with _SCOPES_LOCK:
+        if loop is None:
+            scope = _DEFAULT_SCOPE = _DEFAULT_SCOPE or _ModelScope()
+        else:
+            scope = _LOOP_SCOPES.get(loop)
+            if scope is None:
+                scope = _LOOP_SCOPES[loop] = _ModelScope()
+        model = scope.models.get(model_name)
+        if model is None:
+            model = scope.models[model_name] = OpenAIChatModel(model_name, provider=scope.provider)
+        return model
+
+async def close_shared_models() -> None:
+    """Closes the calling event loop's HTTP pool; call it before the loop ends."""
+    loop = asyncio.get_running_loop()
+    with _SCOPES_LOCK:
+        scope = _LOOP_SCOPES.pop(loop, None)
+    if scope is not None:
+        await scope.http_client.aclose()
+
+def _model_settings(reasoning: Optional[ReasoningEffort]) -> ModelSettings:
+    settings = ModelSettings(
+        max_tokens=None,
+        temperature=0.7,
+    )
+    if reasoning:
+        settings['openai_reasoning_effort'] = reasoning
+    return settings
+
+# -------------------------------------------------------------------------
+# AGENT REGISTRY
+# -------------------------------------------------------------------------
+class PooledAgent:
+    """A registry Agent; the model is resolved per call so it can serve any event loop."""
+    def __init__(self, agent: Agent, model_name: str):
+        self.agent = agent
+        self.model_name = model_name
+
+    async def run(self, user_prompt: str, deps: Optional[str] = None):
+        return await self.agent.run(user_prompt, deps=deps, model=shared_model(self.model_name))
+
+def _context_instructions(ctx: RunContext[Optional[str]]) -> str:
+    # Per-call context, rendered after the static instructions
+    return ctx.deps or ""
+
+_AGENTS: Dict[tuple, Any] = {}
+_AGENTS_LOCK = threading.Lock()
+
+def get_agent(
+    output_type_schema: Type[BaseModel],
+    instructions: str,
+    *,
+    model_name: str = CHAT_MODEL_DEPLOYMENT['speed'],
+    reasoning: Optional[ReasoningEffort] = None,
+    memoize: bool = False,
+):
+    """
+    Reusable agent for (schema, model, static instructions, reasoning), built once per process.
+    Per-call context (findings, params, data) goes in `deps` instead of the prompt:
+        agent = get_agent(PlannerOutput, PLANNER_INSTRUCTIONS, model_name=...)
+        result = await agent.run(user_input, deps=f"Intent: {intent}")
+    memoize=True: see build_agent.
+    """
+    key = (output_type_schema, model_name, instructions, reasoning, memoize)
+    with _AGENTS_LOCK:
+        agent = _AGENTS.get(key)
+        if agent is None:
+            settings = _model_settings(reasoning)
+            agent = PooledAgent(
+                Agent(
+                    output_type=output_type_schema,
+                    instructions=[instructions, _context_instructions],
+                    deps_type=str,
+                    retries=2,
+                    model_settings=settings,
+                ),
+                model_name,
+            )
+            cache = get_llm_cache() if memoize else None
+            if cache is not None:
+                agent = MemoizedAgent(agent, cache, model_name, instructions, output_type_schema, settings)
+            _AGENTS[key] = agent
+        return agent
+
 def build_agent(
     output_type_schema: Type[BaseModel],
     system_prompt: str,
     *,
     model_name: str = CHAT_MODEL_DEPLOYMENT['speed'],
     reasoning: Optional[ReasoningEffort] = None,
+    memoize: bool = False,
 ) -> Agent:
     """
-    General-purpose Agent builder for standard OpenAI.
+    General-purpose Agent builder for standard OpenAI (a new Agent per call;
+    prefer get_agent inside graph nodes).
+    memoize=True serves repeated (prompt, input) pairs from the local LLM
+    response cache; only opt in where the same input should get the same answer.
     """
     
-    # 2. INITIALIZE THE MODEL
-    model = OpenAIChatModel(model_name)
+    # 2. INITIALIZE THE MODEL (shared per event loop, keeps the HTTP pool warm)
+    model = shared_model(model_name)
 
     # 3. CONFIGURE SETTINGS
-    settings = ModelSettings(
-        max_tokens=None,
-        temperature=0.7,
-    )
-    
-    if reasoning:
-        settings['openai_reasoning_effort'] = reasoning
+    settings = _model_settings(reasoning)
 
     # 4. BUILD THE AGENT
-    return Agent(
+    agent = Agent(
         model=model,
         output_type=output_type_schema, 
         system_prompt=system_prompt,
@@ -44,6 +168,12 @@ def build_agent(
         model_settings=settings
     )
 
+    # 5. OPTIONAL MEMOIZATION
+    cache = get_llm_cache() if memoize else None
+    if cache is not None:
+        return MemoizedAgent(agent, cache, model_name, system_prompt, output_type_schema, settings)
+    return agent
+
 # -------------------------------------------------------------------------
 # LOCAL TESTING
 # -------------------------------------------------------------------------
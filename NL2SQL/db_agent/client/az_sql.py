@@ -1,8 +1,324 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
 import pyodbc
 import pandas as pd
-from db_agent.config import SQL_DATABASE, SQL_KEY, SQL_SERVER, SQL_USERNAME, ODBC_DRIVER
+from db_agent.config import (
+    SQL_DATABASE, SQL_KEY, SQL_SERVER, SQL_USERNAME, ODBC_DRIVER,
+    SQL_POOL_MAX_SIZE, SQL_POOL_IDLE_TIMEOUT, SQL_POOL_VALIDATE_AFTER, SQL_POOL_CHECKOUT_TIMEOUT,
+    SQL_ASYNC_MAX_WORKERS, SQL_FETCH_BATCH_SIZE,
+)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available within the checkout timeout."""
+
+
+class ResultBatch(NamedTuple):
+    """One fetchmany() worth of rows from a streamed query."""
+    columns: List[str]
+    rows: List[tuple]
+
+
+class FetchResult(NamedTuple):
+    """Rows collected from a streamed query. `truncated` is True if the fetch stopped early."""
+    columns: List[str]
+    rows: List[tuple]
+    truncated: bool
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+
+class BoundedResult(NamedTuple):
+    """A bounded sample of a result set plus its size (a lower bound when `exact` is False)."""
+    columns: List[str]
+    rows: List[tuple]
+    total_rows: int
+    exact: bool = True
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_rows > len(self.rows)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class SQLConnectionPool:
+    """
+    Process-wide, bounded pool of pyodbc connections for one DSN.
+
+    - Bounded: at most `max_size` connections are open (idle + checked out).
+    - Idle eviction: connections unused for `idle_timeout` seconds are closed.
+    - Liveness: a connection idle longer than `validate_after` is pinged on checkout
+      and transparently replaced if the ping fails.
+    - Exclusive checkout: a connection belongs to exactly one borrower until released.
+    """
+
+    def __init__(self,
+                 conn_string: str,
+                 autocommit: bool = False,
+                 max_size: int = SQL_POOL_MAX_SIZE,
+                 idle_timeout: float = SQL_POOL_IDLE_TIMEOUT,
+                 validate_after: float = SQL_POOL_VALIDATE_AFTER,
+                 checkout_timeout: float = SQL_POOL_CHECKOUT_TIMEOUT,
+                 ):
+        self._conn_string = conn_string
+        self.autocommit = autocommit
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.validate_after = validate_after
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = deque()          # LIFO: most recently released on the right
+        self._open = 0                # idle + checked out
+        self._cond = threading.Condition()
+        self._stats = {
+            "hits": 0,                # checkout served by an idle connection
+            "misses": 0,              # checkout had to open a new connection
+            "waits": 0,               # checkout blocked because the pool was full
+            "wait_time_ms": 0.0,      # total time spent blocked
+            "timeouts": 0,            # checkouts that gave up
+            "evictions": 0,           # idle connections closed by the idle timeout
+            "invalidated": 0,         # connections dropped after a failed ping / error
+        }
+
+    # ---------------------------------------------------------
+    # Checkout / Release
+    # ---------------------------------------------------------
+    def acquire(self) -> _PooledConnection:
+        deadline = time.monotonic() + self.checkout_timeout
+
+        while True:
+            entry, expired = self._take_or_reserve(deadline)
+            self._close_all(expired)
+
+            if entry is None:
+                # A slot was reserved: open a brand-new connection outside the lock
+                try:
+                    return _PooledConnection(pyodbc.connect(self._conn_string, autocommit=self.autocommit))
+                except Exception:
+                    self._release_slot()
+                    raise
+
+            if time.monotonic() - entry.last_used < self.validate_after or self._is_alive(entry.conn):
+                return entry
+
+            # Stale connection: drop it and try again
+            with self._cond:
+                self._stats["invalidated"] += 1
+            self._discard(entry)
+
+    def release(self, entry: _PooledConnection, discard: bool = False):
+        if not discard and not self.autocommit:
+            # Never hand a connection with an open transaction to the next borrower
+            try:
+                entry.conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard:
+            with self._cond:
+                self._stats["invalidated"] += 1
+            self._discard(entry)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def validate(self) -> bool:
+        """Checks out a connection, pings it and returns it to the pool."""
+        try:
+            entry = self.acquire()
+        except Exception:
+            return False
+        alive = self._is_alive(entry.conn)
+        self.release(entry, discard=not alive)
+        return alive
+
+    def close(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        self._close_all(idle)
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["open"] = self._open
+            snapshot["idle"] = len(self._idle)
+            snapshot["in_use"] = self._open - len(self._idle)
+            snapshot["max_size"] = self.max_size
+        return snapshot
+
+    # ---------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------
+    def _take_or_reserve(self, deadline: float) -> Tuple[Optional[_PooledConnection], list]:
+        """Returns (idle_entry, expired) or (None, expired) when a new slot was reserved."""
+        waited_since = None
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                expired = self._evict_idle_locked(now)
+
+                if self._idle:
+                    self._stats["hits"] += 1
+                    entry = self._idle.pop()
+                elif self._open < self.max_size:
+                    self._stats["misses"] += 1
+                    self._open += 1
+                    entry = None
+                else:
+                    if waited_since is None:
+                        waited_since = now
+                        self._stats["waits"] += 1
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        self._stats["wait_time_ms"] += (now - waited_since) * 1000
+                        raise PoolTimeoutError(
+                            f"No SQL connection available after {self.checkout_timeout}s "
+                            f"(pool size {self.max_size})."
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+                if waited_since is not None:
+                    self._stats["wait_time_ms"] += (now - waited_since) * 1000
+                return entry, expired
+
+    def _evict_idle_locked(self, now: float) -> list:
+        # Oldest connections sit on the left of the deque
+        expired = []
+        while self._idle and now - self._idle[0].last_used > self.idle_timeout:
+            expired.append(self._idle.popleft())
+        if expired:
+            self._open -= len(expired)
+            self._stats["evictions"] += len(expired)
+        return expired
+
+    def _release_slot(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    def _discard(self, entry: _PooledConnection):
+        self._close_all([entry])
+        self._release_slot()
+
+    @staticmethod
+    def _close_all(entries):
+        for entry in entries:
+            try:
+                entry.conn.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+
+# -------------------------------------------------------------------------
+# PROCESS-WIDE POOL REGISTRY
+# -------------------------------------------------------------------------
+_POOLS: Dict[Tuple[str, bool], SQLConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(conn_string: str, autocommit: bool = False) -> SQLConnectionPool:
+    key = (conn_string, autocommit)
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(key)
+            if pool is None:
+                pool = SQLConnectionPool(conn_string, autocommit=autocommit)
+                _POOLS[key] = pool
+    return pool
+
+
+def pool_stats() -> Dict[str, Dict[str, float]]:
+    """Metrics for every pool in this process, keyed by server/database."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.items())
+    stats = {}
+    for (conn_string, autocommit), pool in pools:
+        parts = dict(p.split("=", 1) for p in conn_string.split(";") if "=" in p)
+        label = f"{parts.get('SERVER')}/{parts.get('DATABASE')}" + (" (autocommit)" if autocommit else "")
+        stats[label] = pool.stats()
+    return stats
+
+
+def close_all_pools():
+    global _SQL_THREADS
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+        threads, _SQL_THREADS = _SQL_THREADS, None
+    if threads is not None:
+        threads.shutdown(wait=False, cancel_futures=True)
+    for pool in pools:
+        pool.close()
+
+
+# -------------------------------------------------------------------------
+# DEDICATED SQL I/O THREADS (for the async API)
+# -------------------------------------------------------------------------
+# Kept separate from the event loop's default executor so a burst of slow
+# stored procedures cannot starve other run_in_executor users (and vice versa).
+_SQL_THREADS: Optional[ThreadPoolExecutor] = None
+
+
+def _sql_threads() -> ThreadPoolExecutor:
+    global _SQL_THREADS
+    if _SQL_THREADS is None:
+        with _POOLS_LOCK:
+            if _SQL_THREADS is None:
+                _SQL_THREADS = ThreadPoolExecutor(max_workers=SQL_ASYNC_MAX_WORKERS, thread_name_prefix="sql-io")
+    return _SQL_THREADS
+
+
+async def run_sql_io(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs a blocking DB call on the dedicated SQL threads without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_sql_threads(), functools.partial(func, *args, **kwargs))
+
 
 class SQLQueryExecutor:
+    """
+    Thin query helper on top of the process-wide connection pool.
+    `with SQLQueryExecutor()` checks a connection out for the calling thread and
+    returns it on exit, so the same instance is safe to share across threads.
+    """
+
     def __init__(self,
                  server=SQL_SERVER,
                  database=SQL_DATABASE,
@@ -17,8 +333,7 @@ class SQLQueryExecutor:
         self.password = password
         self.autocommit = autocommit
         self.driver = driver
-        self.conn = None
-        self.cursor = None
+        self._local = threading.local()
 
     def _conn_string(self) -> str:
         return (
@@ -29,25 +344,43 @@ class SQLQueryExecutor:
             f"PWD={self.password};"
         )
 
+    def _pool(self) -> SQLConnectionPool:
+        return get_pool(self._conn_string(), self.autocommit)
+
+    # Per-thread checkout: each thread sees its own connection and cursor
+    @property
+    def conn(self):
+        entry = getattr(self._local, "entry", None)
+        return entry.conn if entry else None
+
+    @property
+    def cursor(self):
+        return getattr(self._local, "cursor", None)
+
     def connect(self):
-        if self.conn is None:
-            self.conn = pyodbc.connect(self._conn_string(), autocommit=self.autocommit)
-            self.cursor = self.conn.cursor()
+        if getattr(self._local, "entry", None) is None:
+            entry = self._pool().acquire()
+            try:
+                self._local.cursor = entry.conn.cursor()
+            except Exception:
+                self._pool().release(entry, discard=True)
+                raise
+            self._local.entry = entry
+            self._local.broken = False
         return self
 
     def close(self):
-        if self.cursor:
+        entry = getattr(self._local, "entry", None)
+        if entry is None:
+            return
+        if self._local.cursor:
             try:
-                self.cursor.close()
+                self._local.cursor.close()
             except Exception:
                 pass
-            self.cursor = None
-        if self.conn:
-            try:
-                self.conn.close()
-            except Exception:
-                pass
-            self.conn = None
+        self._local.entry = None
+        self._local.cursor = None
+        self._pool().release(entry, discard=self._local.broken)
 
     def __enter__(self):
         return self.connect()
@@ -55,36 +388,279 @@ class SQLQueryExecutor:
     def __exit__(self, exc_type=None, exc_val=None, exc_tb=None):
         self.close()
 
-    def execute_query(self, query: str, fetch: bool = True):
-        # Ensure a connection exists before executing
-        self.connect() 
+    def execute_query(self, query: str, fetch: bool = True, params: Optional[Sequence[Any]] = None):
+        # Outside a `with` block, borrow a connection just for this call
+        borrowed = self.conn is None
+        self.connect()
+        # `?` placeholders are bound by the driver (needed for VARBINARY payloads)
+        args = tuple(params) if params else ()
 
         try:
             if fetch:
                 # Returns results as a DataFrame with proper column headers
-                return pd.read_sql(query, self.conn)
+                self.cursor.execute(query, *args)
+                return self._read_frame(self.cursor)
             else:
                 # For INSERT, UPDATE, DELETE, or stored procedures without returns
-                self.cursor.execute(query)
+                self.cursor.execute(query, *args)
                 if not self.autocommit:
                     self.conn.commit()
                 return None
         except Exception as e:
+            self._mark_if_broken(e)
             # Rollback in case of an error to keep the transaction state clean
-            if self.conn and not self.autocommit:
-                self.conn.rollback()
+            if self.conn and not self.autocommit and not self._local.broken:
+                try:
+                    self.conn.rollback()
+                except Exception:
+                    self._local.broken = True
             print(f"Error executing query: {e}")
             raise
+        finally:
+            if borrowed:
+                self.close()
+
+    def execute_many(self, query: str, rows: Sequence[Sequence[Any]], fast: bool = True, commit: bool = True):
+        """
+        Runs one parameterized statement for many parameter rows in a single round trip.
+        commit=False leaves the transaction open so several statements commit together
+        (see commit()); a failure still rolls back everything since the last commit.
+        """
+        if not rows:
+            return None
+        borrowed = self.conn is None
+        self.connect()
 
-    def check_connection(self):
-        """Check if the connection is alive."""
         try:
-            self.connect()
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT 1")
-            return True
-        except:
-            return False
+            # fast_executemany ships all parameter rows as one array instead of one call per row
+            self.cursor.fast_executemany = fast
+            self.cursor.executemany(query, [tuple(r) for r in rows])
+            if commit and not self.autocommit:
+                self.conn.commit()
+            return None
+        except Exception as e:
+            self._mark_if_broken(e)
+            if self.conn and not self.autocommit and not self._local.broken:
+                try:
+                    self.conn.rollback()
+                except Exception:
+                    self._local.broken = True
+            print(f"Error executing batch: {e}")
+            raise
+        finally:
+            if self.cursor is not None:
+                self.cursor.fast_executemany = False
+            if borrowed:
+                self.close()
+
+    def commit(self):
+        """Commits the open transaction of this thread's connection (inside a `with` block)."""
+        if self.conn is not None and not self.autocommit:
+            self.conn.commit()
+
+    def iter_batches(self,
+                     query: str,
+                     batch_size: int = SQL_FETCH_BATCH_SIZE,
+                     *,
+                     max_rows: Optional[int] = None,
+                     max_cells: Optional[int] = None,
+                     stop_when: Optional[Callable[[int, List[str]], bool]] = None,
+                     ) -> Iterator[ResultBatch]:
+        """
+        Streams the first result set in `fetchmany(batch_size)` chunks instead of
+        materializing it. Iteration stops early once `max_rows` / `max_cells` is
+        reached or `stop_when(rows_so_far, columns)` returns True; the rest of the
+        result set is then cancelled on the server instead of being transferred.
+        Consume the iterator from a single thread. The generator's return value
+        (StopIteration.value) is True when the result set was fully read.
+        """
+        borrowed = self.conn is None
+        self.connect()
+        cursor = self.cursor
+        exhausted = False
+
+        try:
+            cursor.execute(query)
+            columns = self._advance_to_resultset(cursor)
+            if columns is None:
+                exhausted = True
+                return exhausted
+
+            row_cap = max_rows
+            if max_cells is not None:
+                cells_cap = max_cells // max(len(columns), 1)
+                row_cap = cells_cap if row_cap is None else min(row_cap, cells_cap)
+
+            fetched = 0
+            while True:
+                size = batch_size if row_cap is None else min(batch_size, row_cap - fetched)
+                if size <= 0:
+                    # Cap reached: one probe row tells "exactly row_cap rows" from "more to come"
+                    exhausted = not cursor.fetchmany(1)
+                    break
+                rows = cursor.fetchmany(size)
+                if not rows:
+                    exhausted = True
+                    break
+                fetched += len(rows)
+                yield ResultBatch(columns, [tuple(r) for r in rows])
+                if stop_when is not None and stop_when(fetched, columns):
+                    break
+            return exhausted
+        except Exception as e:
+            self._mark_if_broken(e)
+            print(f"Error streaming query: {e}")
+            raise
+        finally:
+            if not exhausted and not self._local.broken:
+                # Stopped early: tell the server to stop sending the remaining rows
+                try:
+                    cursor.cancel()
+                    cursor.close()
+                    self._local.cursor = self.conn.cursor()
+                except Exception:
+                    self._local.broken = True
+            if borrowed:
+                self.close()
+
+    def fetch_rows(self,
+                   query: str,
+                   batch_size: int = SQL_FETCH_BATCH_SIZE,
+                   *,
+                   max_rows: Optional[int] = None,
+                   max_cells: Optional[int] = None,
+                   stop_when: Optional[Callable[[int, List[str]], bool]] = None,
+                   ) -> FetchResult:
+        """Collects iter_batches() into plain row tuples (no DataFrame)."""
+        columns, rows = [], []
+        batches = self.iter_batches(query, batch_size, max_rows=max_rows, max_cells=max_cells, stop_when=stop_when)
+        while True:
+            try:
+                batch = next(batches)
+            except StopIteration as done:
+                # The generator returns True only if the whole result set was read
+                return FetchResult(columns, rows, truncated=not done.value)
+            columns = batch.columns
+            rows.extend(batch.rows)
+
+    def fetch_bounded(self,
+                      query: str,
+                      cell_limit: int,
+                      *,
+                      min_rows: int = 0,
+                      exact_count: bool = True,
+                      batch_size: int = SQL_FETCH_BATCH_SIZE,
+                      ) -> BoundedResult:
+        """
+        Enforces a cell budget during the fetch. Keeps at most
+        max(cell_limit // columns, min_rows) rows, then drains the remainder of the
+        result set only to count it (rows are discarded batch by batch), so callers
+        get an exact size plus a bounded sample without holding the full result.
+        With exact_count=False only one extra row is read and the rest is cancelled
+        on the server; total_rows is then a lower bound.
+        """
+        borrowed = self.conn is None
+        self.connect()
+        cursor = self.cursor
+
+        try:
+            cursor.execute(query)
+            columns = self._advance_to_resultset(cursor)
+            if columns is None:
+                return BoundedResult([], [], 0)
+
+            keep = max(cell_limit // max(len(columns), 1), min_rows)
+            rows = [tuple(r) for r in cursor.fetchmany(keep)] if keep > 0 else []
+            total = len(rows)
+
+            if not exact_count:
+                # N+1 probe: one extra row proves the budget is exceeded
+                if len(rows) == keep and cursor.fetchone() is not None:
+                    cursor.cancel()
+                    cursor.close()
+                    self._local.cursor = self.conn.cursor()
+                    return BoundedResult(columns, rows, total + 1, exact=False)
+                return BoundedResult(columns, rows, total)
+
+            # Count the overflow without materializing it
+            while True:
+                overflow = cursor.fetchmany(batch_size)
+                if not overflow:
+                    break
+                total += len(overflow)
+
+            return BoundedResult(columns, rows, total)
+        except Exception as e:
+            self._mark_if_broken(e)
+            print(f"Error executing bounded query: {e}")
+            raise
+        finally:
+            if borrowed:
+                self.close()
+
+    async def aexecute_query(self, query: str, fetch: bool = True, params: Optional[Sequence[Any]] = None):
+        """
+        Async variant of execute_query. The query runs on the dedicated SQL threads
+        (with its own pooled checkout), so the event loop keeps serving other sessions.
+        Cancelling the awaiting task cancels the statement on the server.
+        """
+        return await self._run_cancellable(self.execute_query, query, fetch, params)
+
+    async def afetch_rows(self, query: str, batch_size: int = SQL_FETCH_BATCH_SIZE, **limits) -> FetchResult:
+        """Async variant of fetch_rows (same threads and cancellation as aexecute_query)."""
+        return await self._run_cancellable(self.fetch_rows, query, batch_size, **limits)
+
+    async def afetch_bounded(self, query: str, cell_limit: int, **kwargs) -> BoundedResult:
+        """Async variant of fetch_bounded (same threads and cancellation as aexecute_query)."""
+        return await self._run_cancellable(self.fetch_bounded, query, cell_limit, **kwargs)
+
+    async def _run_cancellable(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        running = {}
+
+        def _run():
+            with self:
+                running["cursor"] = self.cursor
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    running.pop("cursor", None)
+
+        future = asyncio.get_running_loop().run_in_executor(_sql_threads(), _run)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            cursor = running.get("cursor")
+            if cursor is not None:
+                try:
+                    cursor.cancel()  # SQLCancel is safe to call from another thread
+                except Exception:
+                    pass
+            raise
+
+    @classmethod
+    def _read_frame(cls, cursor) -> pd.DataFrame:
+        columns = cls._advance_to_resultset(cursor)
+        if columns is None:
+            return pd.DataFrame()
+        return pd.DataFrame.from_records([tuple(row) for row in cursor.fetchall()], columns=columns)
+
+    @staticmethod
+    def _advance_to_resultset(cursor) -> Optional[List[str]]:
+        # Stored procedures may emit row-count messages before the first result set
+        while cursor.description is None:
+            if not cursor.nextset():
+                return None
+        return [col[0] for col in cursor.description]
+
+    def _mark_if_broken(self, error: Exception):
+        # SQLSTATE class 08 = connection exception; never return such a connection to the pool
+        sqlstate = error.args[0] if getattr(error, "args", None) else ""
+        if isinstance(error, (pyodbc.OperationalError, pyodbc.InterfaceError)) or str(sqlstate).startswith("08"):
+            self._local.broken = True
+
+    def check_connection(self):
+        """Check if the database is reachable (uses the pool's liveness probe)."""
+        return self._pool().validate()
 
 if __name__ == "__main__":
     with SQLQueryExecutor() as executor:
@@ -92,4 +668,5 @@ if __name__ == "__main__":
             select top 2 *
             from SEMANTIC.COST_PER_PERSON_A
         """
-        print("Executing query:", executor.execute_query(query))
\ No newline at end of file
+        print("Executing query:", executor.execute_query(query))
+    print("Pool stats:", pool_stats())
@@ -18,3 +18,144 @@ REASONING_MODE = {
 }
 
 OPENAI_API_KEY = "sk-example-0000000000000000000000000000000000000000000000000000"
+
+# ============= SQL CONNECTION POOL ===============
+SQL_POOL_MAX_SIZE         = 20     # Upper bound of open connections per DSN
+SQL_POOL_IDLE_TIMEOUT     = 300    # Seconds an idle connection is kept before eviction
+SQL_POOL_VALIDATE_AFTER   = 30     # Ping connections idle longer than this (seconds) on checkout
+SQL_POOL_CHECKOUT_TIMEOUT = 30     # Seconds to wait for a free connection before failing
+SQL_ASYNC_MAX_WORKERS     = 20     # Dedicated threads for aexecute_query (keep <= pool size)
+SQL_FETCH_BATCH_SIZE      = 1000   # Rows per fetchmany() round trip in streaming mode
+
+# ============= RESULT SIZE BUDGET ================
+RESULT_CELL_LIMIT    = 50    # rows * cols the Analyzer may receive before we negotiate
+RESULT_TRUNCATE_ROWS = 5     # rows kept by hard_truncate_node
+
+# ============= CHECKPOINT PERSISTENCE ============
+CHECKPOINT_COMPRESSION         = "zlib"   # "zlib", "zstd" (needs `zstandard`) or None
+CHECKPOINT_COMPRESS_THRESHOLD  = 4096     # Only compress payloads larger than this (bytes)
+CHECKPOINT_COMPRESSION_LEVEL   = 3
+CHECKPOINT_DELTA_MAX_CHAIN     = 16       # Append-deltas per list channel before a full snapshot is written
+CHECKPOINT_DELTA_CACHE_SIZE    = 1024     # (thread, channel) list snapshots kept in memory to detect appends
+CHECKPOINT_WRITE_BEHIND        = True     # Queue puts in memory and flush them in background batches
+CHECKPOINT_QUEUE_MAX_SIZE      = 256      # Queued puts/writes before the producer must flush itself (backpressure)
+CHECKPOINT_FLUSH_INTERVAL      = 0.05     # Seconds the flusher waits to batch up queued writes
+CHECKPOINT_MAX_ATTEMPTS        = 5        # Failures (while other writes succeed) before an op is dead-lettered
+CHECKPOINT_DEAD_LETTER_LOG     = "checkpoint_dead_letter.jsonl"   # Ops that kept failing (pickled, for replay)
+CHECKPOINT_CACHE_SIZE          = 256      # Threads whose latest decoded checkpoint is kept in memory
+CHECKPOINT_CACHE_TTL           = 600      # Seconds a cached checkpoint is trusted
+CHECKPOINT_CACHE_VALIDATE      = False    # Probe SQL for a newer checkpoint_id on hits (multi-process deployments)
+
+# ============= CHECKPOINT RETENTION ==============
+CHECKPOINT_RETENTION_KEEP_LAST = 50         # Checkpoints kept per thread; older ones are compacted
+CHECKPOINT_RETENTION_MODE      = "archive"  # "archive" (move to *_archive tables) or "delete"
+CHECKPOINT_RETENTION_MIN_AGE_H = 24         # Never compact checkpoints younger than this (hours)
+
+# ============= PLAN CACHE ========================
+PLAN_CACHE_BACKEND     = "memory"              # "memory", "sqlite", "redis" or None (disabled)
+PLAN_CACHE_TTL         = 3600                  # Seconds a cached plan stays valid
+PLAN_CACHE_MAX_SIZE    = 1000                  # Plans kept before least-recently-used eviction
+PLAN_CACHE_SQLITE_PATH = "plan_cache.sqlite3"
+PLAN_CACHE_REDIS_URL   = "redis://localhost:6379/0"
+
+# ============= SEMANTIC PLAN CACHE ===============
+SEMANTIC_CACHE_ENABLED   = True
+SEMANTIC_CACHE_DIM       = 2048    # Hashing-vectorizer width (float32: dim * max_size * 4 bytes)
+SEMANTIC_CACHE_MAX_SIZE  = 1000    # Indexed questions; least-recently-used slots are reused
+SEMANTIC_CACHE_THRESHOLD = 0.70    # Cosine similarity needed before the entity checks run
+SEMANTIC_CACHE_TTL       = 3600    # Seconds an indexed plan stays valid
+
+# ============= SP RESULT CACHE ===================
+RESULT_CACHE_ENABLED         = True
+RESULT_CACHE_TTL             = 900     # Seconds a stored-procedure result is reused
+RESULT_CACHE_MAX_MB          = 64      # Approximate memory cap; least-recently-used results are evicted
+# Data version probe: the latest change tracked on SEMANTIC.COST_PER_PERSON; when it moves every
+# cached result is dropped. Scoped to that table, so writes elsewhere in the database (checkpoints,
+# chat logs) do not flush the cache. Needs change tracking (see db_artefacts.sql); a rowversion
+# column works too:
+#   "SELECT MAX(ROW_VER) AS version FROM SEMANTIC.COST_PER_PERSON"
+# None disables the probe (TTL only).
+RESULT_CACHE_VERSION_QUERY   = """
+SELECT COALESCE(MAX(ct.SYS_CHANGE_VERSION),
+                CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID('SEMANTIC.COST_PER_PERSON'))) AS version
+FROM CHANGETABLE(CHANGES SEMANTIC.COST_PER_PERSON,
+                 CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID('SEMANTIC.COST_PER_PERSON'))) AS ct
+"""
+RESULT_CACHE_VERSION_CHECK_S = 5       # Re-probe at most this often; results may lag a data load by this much
+
+# ============= LLM RESPONSE CACHE ================
+LLM_CACHE_ENABLED     = True                  # Master switch; nodes opt in with build_agent(memoize=True)
+LLM_CACHE_PATH        = "llm_cache.sqlite3"
+LLM_CACHE_MAX_ENTRIES = 5000                  # Least-recently-used responses are evicted beyond this
+LLM_CACHE_TTL         = 7 * 24 * 3600         # Seconds a memoized response is reused
+
+# ============= LLM HTTP POOL =====================
+LLM_HTTP_MAX_CONNECTIONS  = 50    # Concurrent provider requests per event loop
+LLM_HTTP_KEEPALIVE        = 20    # Idle keep-alive connections kept for reuse
+LLM_HTTP_KEEPALIVE_EXPIRY = 60    # Seconds an idle connection stays open
+LLM_HTTP_TIMEOUT          = 120   # Seconds per provider request (reasoning models are slow)
+
+# ============= LOCAL INTENT CLASSIFIER ===========
+INTENT_LOCAL_ENABLED   = True
+INTENT_LOCAL_THRESHOLD = 0.85                  # Below this confidence the LLM classifies (and the pair is logged)
+INTENT_MODEL_PATH      = "intent_model.npz"    # python -m db_agent.nlp.intent_classifier
+INTENT_AGREEMENT_LOG   = "intent_agreement.jsonl"
+INTENT_TRAINING_LOGS   = ["chat_logs.jsonl", "intent_agreement.jsonl"]
+
+# ============= CATEGORICAL VALUE INDEX ===========
+VALUE_INDEX_ENABLED           = True
+VALUE_INDEX_REFRESH_S         = 900    # Re-read the distinct values at least this often (seconds)
+VALUE_INDEX_VERSION_CHECK_S   = 30     # Poll RESULT_CACHE_VERSION_QUERY this often; refresh as soon as it moves
+VALUE_INDEX_TENANT_COLUMN     = None   # Tenant column of SEMANTIC.COST_PER_PERSON (None = one index for all tenants)
+VALUE_INDEX_FUZZY_AUTOCORRECT = 0.8    # Edit-distance similarity to auto-correct a typo to the single best value
+VALUE_INDEX_FUZZY_MIN         = 0.6    # Weaker fuzzy matches are offered as "Did you mean" options
+
+# ============= DIAGNOSTIC INVESTIGATION ==========
+DIAGNOSTIC_STRATEGY        = "drivers"    # "drivers" (one slice + local driver analysis), "parallel" (test every queued
+                                          # hypothesis at once) or "sequential" (one per Planner loop)
+DIAGNOSTIC_MAX_CONCURRENCY = 5            # Hypotheses tested at the same time (SQL fetch + LLM analysis each)
+DIAGNOSTIC_BATCH_QUERY     = True         # One GROUPING SETS scan for all whitelisted hypotheses (parallel strategy)
+DIAGNOSTIC_BATCH_TABLE     = "SEMANTIC.COST_PER_PERSON"
+DIAGNOSTIC_BATCH_METRIC    = "COST"       # Summed per value next to the record count
+# Columns the batched query may group by (anything else falls back to sp_GetDistribution)
+DIAGNOSTIC_BATCH_COLUMNS   = ["LOCATION", "CITY", "GRADE", "CUSTOMER_NAME", "CUSTOMER_TYPE", "PROJECT_NAME",
+                              "EMP_TYPE", "BILLING_TYPE", "TENURE_BUCKET", "VBU", "HBU"]
+
+# ============= BATCHED ANALYSIS ==================
+ANALYZER_BATCH_ENABLED      = True
+ANALYZER_BATCH_TOKEN_BUDGET = 6000   # Estimated prompt tokens per batched Analyzer call; more results are chunked
+ANALYZER_CHARS_PER_TOKEN    = 4      # Prompt size estimate (no tokenizer dependency)
+
+# ============= CAUSAL KNOWLEDGE GRAPH ============
+KG_ENGINE_ENABLED    = True     # In-memory copy of KG_Node / KG_CausalLink (False = SQL Graph MATCH per question)
+KG_DEFAULT_TARGET    = "Cost"   # Metric investigated when the question names none of the KG nodes
+KG_MAX_DEPTH         = 2        # Hops of causes turned into hypotheses (1 = direct drivers only)
+KG_VERSION_CHECK_S   = 60       # Re-run KG_VERSION_QUERY at most this often; reload when it changes
+KG_REFRESH_S         = 3600     # Reload at least this often even if the version looks unchanged
+KG_LINK_WEIGHT_COLUMN = None    # Numeric KG_CausalLink column with the link strength (None = every link weighs 1.0)
+KG_VERSION_QUERY     = """
+    SELECT (SELECT COUNT_BIG(*) FROM KG_Node) AS nodes,
+           (SELECT CHECKSUM_AGG(CHECKSUM(NodeName, MappedColumn)) FROM KG_Node) AS node_sum,
+           (SELECT COUNT_BIG(*) FROM KG_CausalLink) AS links,
+           (SELECT CHECKSUM_AGG(CHECKSUM($from_id, $to_id)) FROM KG_CausalLink) AS link_sum
+    """
+
+# ============= HYPOTHESIS RANKING ================
+DIAGNOSTIC_EXPLAINED_THRESHOLD = 0.8    # Stop testing once the tested hypotheses explain this share of the metric's variance
+DIAGNOSTIC_HOP_DECAY           = 0.5    # Prior weight per extra hop between a cause and the target metric
+DIAGNOSTIC_HISTORY_LOG         = "chat_logs.jsonl"   # Past runs: how often a tested hypothesis ended up in the answer
+
+# ============= DRIVER ANALYSIS ===================
+DRIVER_PERIOD_COLUMN       = "MONTH_YEAR"   # Share-of-change compares the latest two periods of this column
+DRIVER_PERIOD_SORT         = "TRY_CONVERT(date, '01 ' + REPLACE(MONTH_YEAR, '-', ' '), 6)"  # 'May-24' -> date
+DRIVER_ALL_COLUMNS         = False          # Analyze every DIAGNOSTIC_BATCH_COLUMNS column, not only the KG suspects
+DRIVER_TOP_MEMBERS         = 3              # Contributing members reported per dimension
+DRIVER_MAX_FINDINGS        = 10             # Ranked dimensions passed on to the Synthesizer
+DRIVER_MAX_SLICE_ROWS      = 200000         # Larger slices fall back to per-hypothesis testing
+
+# ============= RESULT DIGEST =====================
+SUMMARY_RAW_ROWS    = 10     # Results up to this many rows are also shown verbatim
+SUMMARY_TOP_K       = 5      # Largest rows listed per numeric column (with their share of the total)
+SUMMARY_MAX_NUMERIC = 6      # Numeric columns described
+SUMMARY_OUTLIER_Z   = 2.5    # |z-score| above which a value is reported as an outlier
+SUMMARY_MAX_CHARS   = 1500   # Hard cap of the digest in the Analyzer prompt (cut at line boundaries)
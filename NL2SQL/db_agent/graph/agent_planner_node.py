@@ -1,8 +1,38 @@
 from typing import Dict, Any
-from db_agent.config import CHAT_MODEL_DEPLOYMENT
+from db_agent.config import CHAT_MODEL_DEPLOYMENT, DIAGNOSTIC_STRATEGY, DIAGNOSTIC_EXPLAINED_THRESHOLD
 from db_agent.graph.state import AgentState
-from db_agent.client.az_llm import build_agent
+from db_agent.client.az_llm import get_agent
 from db_agent.schema.pydantic_models import PlannerOutput
+from db_agent.cache.plan_cache import get_plan_cache
+from db_agent.cache.semantic_cache import get_semantic_cache
+from db_agent.analytics.hypothesis_ranking import joint_explained
+
+PLANNER_INSTRUCTIONS = """
+    You are the Planner for Sherlock.
+    
+    AVAILABLE TOOLS:
+    1. sp_GetAggregatedCost: Returns Cost, FTE, Headcount. 
+       Params: ProjectName, CustomerName, Location.
+    2. sp_GetDistribution: Returns list of values (e.g. Top 10 Projects).
+       Params: ColumnName, TopN.
+       
+    LIMITATIONS:
+    - You ONLY have data for: Cost, FTE, Headcount, and Distribution of categories.
+    - You DO NOT have data for: Project Codes, Managers, Start Dates, or Descriptions.
+    
+    LOGIC RULES:
+    [IF Intent = DESCRIPTIVE or AMBIGUOUS]
+    - If user provides a specific name (Project/Customer): EXECUTE sp_GetAggregatedCost.
+    - If user asks for a list (e.g. "Show projects"): EXECUTE sp_GetDistribution.
+    - If user asks for data you DON'T have: output next_action="FINALIZE".
+    - NEVER output next_action="QUERY_KG".
+
+    [IF Intent = DIAGNOSTIC]
+    - (Note: The testing loop is handled automatically. You only start the process.)
+    - IF no hypotheses and no findings: Output next_action="QUERY_KG".
+    
+    Output strictly as JSON matching PlannerOutput.
+    """
 
 async def agent_planner_node(state: AgentState) -> Dict[str, Any]:
     """
@@ -28,7 +58,22 @@ async def agent_planner_node(state: AgentState) -> Dict[str, Any]:
     # FIX: DETERMINISTIC DIAGNOSTIC LOGIC (Bypasses LLM for Stability)
     # =========================================================================
     if intent == "DIAGNOSTIC":
+        # Early stop: the hypotheses tested so far already explain enough of the variance
+        explained = state.get("explained_share", 0.0) or 0.0
+        if hypotheses and confirmed_causes and explained >= DIAGNOSTIC_EXPLAINED_THRESHOLD:
+            print(f"   > [Diagnostic] Tested hypotheses explain ~{explained:.0%}. "
+                  f"Skipping {len(hypotheses)} lower-ranked ones and finalizing.")
+            return {"next_action": "FINALIZE", "hypotheses_queue": []}
+
         # A. If we have hypotheses to test -> DO IT (Don't ask LLM)
+        if hypotheses and DIAGNOSTIC_STRATEGY == "drivers" and not state.get("tested_hypotheses"):
+            print(f"   > [Diagnostic] Queue has {len(hypotheses)} items. Ranking drivers from one slice.")
+            return {"next_action": "ANALYZE_DRIVERS", "tool_params": {}}
+
+        if hypotheses and DIAGNOSTIC_STRATEGY in ("parallel", "drivers"):
+            print(f"   > [Diagnostic] Queue has {len(hypotheses)} items. Testing all in parallel.")
+            return {"next_action": "INVESTIGATE_ALL", "tool_params": {}}
+
         if hypotheses:
             current = hypotheses[0]
             print(f"   > [Diagnostic] Queue has items. Testing: {current}")
@@ -36,6 +81,8 @@ async def agent_planner_node(state: AgentState) -> Dict[str, Any]:
                 "next_action": "TEST_HYPOTHESIS",
                 "current_hypothesis": current,
                 "hypotheses_queue": hypotheses[1:], # POP the queue here
+                "tested_hypotheses": (state.get("tested_hypotheses") or []) + [current],
+                "explained_share": joint_explained([current], state.get("explained_by_prefix") or {}, explained),
                 "tool_params": {} # Params are auto-generated by Executor later
             }
         
@@ -54,36 +101,11 @@ async def agent_planner_node(state: AgentState) -> Dict[str, Any]:
         print(f"   > Answer found (Intent: {intent}). Auto-Finalizing.")
         return {"next_action": "FINALIZE"}
 
-    # 4. System Prompt
-    system_prompt = f"""
-    You are the Planner for Sherlock.
-    
+    # 4. Per-call context (static rules live in PLANNER_INSTRUCTIONS)
+    context = f"""
     CONTEXT:
     - Intent: {intent}
     - Findings: {confirmed_causes}
-    
-    AVAILABLE TOOLS:
-    1. sp_GetAggregatedCost: Returns Cost, FTE, Headcount. 
-       Params: ProjectName, CustomerName, Location.
-    2. sp_GetDistribution: Returns list of values (e.g. Top 10 Projects).
-       Params: ColumnName, TopN.
-       
-    LIMITATIONS:
-    - You ONLY have data for: Cost, FTE, Headcount, and Distribution of categories.
-    - You DO NOT have data for: Project Codes, Managers, Start Dates, or Descriptions.
-    
-    LOGIC RULES:
-    [IF Intent = DESCRIPTIVE or AMBIGUOUS]
-    - If user provides a specific name (Project/Customer): EXECUTE sp_GetAggregatedCost.
-    - If user asks for a list (e.g. "Show projects"): EXECUTE sp_GetDistribution.
-    - If user asks for data you DON'T have: output next_action="FINALIZE".
-    - NEVER output next_action="QUERY_KG".
-
-    [IF Intent = DIAGNOSTIC]
-    - (Note: The testing loop is handled automatically. You only start the process.)
-    - IF no hypotheses and no findings: Output next_action="QUERY_KG".
-    
-    Output strictly as JSON matching PlannerOutput.
     """
 
     # 5. Run Agent
@@ -97,13 +119,13 @@ async def agent_planner_node(state: AgentState) -> Dict[str, Any]:
     else:
         user_input = str(last_msg)
 
-    agent = build_agent(
+    agent = get_agent(
         output_type_schema=PlannerOutput,
-        system_prompt=system_prompt,
+        instructions=PLANNER_INSTRUCTIONS,
         model_name=CHAT_MODEL_DEPLOYMENT['reasoning'],
     )
 
-    result = await agent.run(user_input)
+    result = await agent.run(user_input, deps=context)
     decision: PlannerOutput = result.output
 
     # --- GUARDRAIL: FORCE BLOCK KG ON DESCRIPTIVE ---
@@ -120,6 +142,17 @@ async def agent_planner_node(state: AgentState) -> Dict[str, Any]:
         "next_action": decision.next_action,
         "tool_params": decision.tool_params or {},
     }
+
+    # 7. Plan Cache: remember the first decision of a fresh question (key set by cache_lookup_node)
+    cache_key = state.get("plan_cache_key")
+    if cache_key and not confirmed_causes and get_plan_cache() is not None:
+        get_plan_cache().set(cache_key, decision.model_dump())
+        updates["plan_cache_key"] = None  # Later loops of this turn see other context
+
+        # Index the question too, so paraphrases skip Intent + Planner LLM calls
+        if get_semantic_cache() is not None:
+            tenant_id = state.get("user_info", {}).get("tenant_id", "")
+            get_semantic_cache().add(user_input, state.get("intent_status"), tenant_id, decision.model_dump())
     
     if decision.tool_name:
         updates["tool_params"]["tool_name"] = decision.tool_name
@@ -1,23 +1,53 @@
 from typing import Dict, Any
 from db_agent.graph.state import AgentState
+from db_agent.cache.plan_cache import get_plan_cache, plan_cache_key
+from db_agent.nlp.text_features import message_text
 
 def cache_lookup_node(state: AgentState) -> Dict[str, Any]:
     """
     Phase 1: Optimization
     Checks if a valid plan already exists for this query in the cache.
+    Key = hash(normalized last user message, intent, tenant); the Planner
+    stores its decision under the key on a miss.
     """
     print("--- [Node] Cache Lookup ---")
-    
-    # FUTURE IMPLEMENTATION:
-    # 1. Hash the user query (state["messages"][-1])
-    # 2. Check Redis/Postgres for existing plan
-    # 3. If found, load 'tool_params' and set plan_cache_hit=True
-    
-    # CURRENT PoC:
-    # Always assume cache miss (forces reasoning)
-    print("   > Cache Miss (Proceeding to Planner)")
-    
-    return {
+
+    cache = get_plan_cache()
+    miss = {
         "plan_cache_hit": False,
+        "plan_cache_key": None,
         "next_action": "PLAN" # Default signal to move forward
-    }
\ No newline at end of file
+    }
+
+    # Resumed turns (approval / clarification) and running investigations are stateful: never cached
+    if (cache is None
+            or state.get("next_action") in ("WAIT_FOR_APPROVAL", "CLARIFY")
+            or state.get("hypotheses_queue") or state.get("confirmed_causes")):
+        print("   > Cache Skipped (Proceeding to Planner)")
+        return miss
+
+    # Already resolved by the semantic cache in the Intent Identifier
+    if state.get("plan_cache_hit"):
+        print(f"   > Semantic Cache Hit: {state.get('next_action')} {state.get('tool_params', {}).get('tool_name') or ''}")
+        return {"plan_cache_hit": True, "plan_cache_key": None}
+
+    user_input = message_text(state["messages"][-1])
+    tenant_id = state.get("user_info", {}).get("tenant_id", "")
+    key = plan_cache_key(user_input, state.get("intent_status"), tenant_id)
+
+    plan = cache.get(key)
+    if plan is None:
+        print("   > Cache Miss (Proceeding to Planner)")
+        return {**miss, "plan_cache_key": key}
+
+    print(f"   > Cache Hit: {plan['next_action']} {plan.get('tool_name') or ''}")
+    tool_params = dict(plan.get("tool_params") or {})
+    if plan.get("tool_name"):
+        tool_params["tool_name"] = plan["tool_name"]
+
+    return {
+        "plan_cache_hit": True,
+        "plan_cache_key": None,
+        "next_action": plan["next_action"],
+        "tool_params": tool_params,
+    }
@@ -1,55 +1,127 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+from db_agent.config import KG_DEFAULT_TARGET, KG_MAX_DEPTH, DIAGNOSTIC_BATCH_QUERY, DIAGNOSTIC_STRATEGY
 from db_agent.graph.state import AgentState
-from db_agent.client.az_sql import SQLQueryExecutor
+from db_agent.client.az_sql import SQLQueryExecutor, run_sql_io
+from db_agent.cache.causal_graph import get_causal_graph
+from db_agent.graph.sp_executor_node import batchable_columns, fetch_distributions, fetch_joint_explained
+from db_agent.analytics.hypothesis_ranking import rank_hypotheses, get_hypothesis_history
+from db_agent.nlp.text_features import message_text
 
-def causal_discovery_node(state: AgentState) -> Dict[str, Any]:
-    """
-    Phase 4: Diagnostic Engine
-    Queries the Knowledge Graph to generate a list of hypotheses.
-    """
-    print("--- [Node] Causal Discovery (The Graph) ---")
-    current_buffer = state.get("stream_buffer", [])
-    
-    target_metric = "Cost" 
-    print(f"   > Investigating drivers for: {target_metric}")
+# (column, hop depth, path strength)
+Suspect = Tuple[str, int, float]
 
-    # Streaming Update
-    streaming_update = current_buffer + [f"Diagnostic: Querying Knowledge Graph for '{target_metric}' drivers..."]
+async def _graph_suspects(question: str) -> Tuple[str, List[Suspect]]:
+    """(target metric, suspects) from the in-memory graph: causes up to KG_MAX_DEPTH hops, nearest first."""
+    graph = await run_sql_io(get_causal_graph().current)  # Database I/O only when a version check is due
+    target = graph.find_target(question) or KG_DEFAULT_TARGET
+    suspects: List[Suspect] = []
+    for cause in graph.ancestors(target, KG_MAX_DEPTH):
+        if cause.column and cause.column not in {s[0] for s in suspects}:
+            suspects.append((cause.column, cause.depth, cause.strength))
+    return target, suspects
 
+async def _explained_estimates(columns: List[str], tenant_id: str) -> Dict[str, float]:
+    """Variance share per whitelisted column (the batched distribution scan, which the result cache keeps)."""
+    # The driver analysis computes its own variance shares from its slice
+    batchable = batchable_columns(columns) if DIAGNOSTIC_BATCH_QUERY and DIAGNOSTIC_STRATEGY != "drivers" else {}
+    if not batchable:
+        return {}
+    try:
+        batch = await fetch_distributions(list(batchable), tenant_id)
+    except Exception as e:
+        print(f"   > Variance estimates unavailable ({e}). Ranking by graph + history only.")
+        return {}
+    return {batchable[c]: share for c, share in batch.explained.items()}
+
+async def _joint_estimates(queue: List[str], tenant_id: str) -> Dict[str, float]:
+    """Joint variance share of the ranked queue up to each whitelisted hypothesis (the early stop's measure)."""
+    batchable = batchable_columns(queue) if DIAGNOSTIC_BATCH_QUERY and DIAGNOSTIC_STRATEGY != "drivers" else {}
+    if not batchable:
+        return {}
+    columns = list(batchable)  # Queue order
+    try:
+        joint = await fetch_joint_explained(columns, tenant_id)
+    except Exception as e:
+        print(f"   > Joint variance estimates unavailable ({e}). No early stop.")
+        return {}
+    return {batchable[c]: share for c, share in zip(columns, joint)}
+
+async def _sql_suspects(target_metric: str) -> List[str]:
+    """Direct drivers of `target_metric` via a SQL Graph MATCH (engine disabled or unavailable)."""
     graph_query = f"""
     SELECT SourceNode.MappedColumn 
     FROM KG_Node AS SourceNode, KG_CausalLink AS Link, KG_Node AS TargetNode
     WHERE MATCH(SourceNode-(Link)->TargetNode)
     AND TargetNode.NodeName = '{target_metric}'
     """
+    df = await SQLQueryExecutor().aexecute_query(graph_query)
+    if df.empty:
+        return []
+    # Get the first column (MappedColumn)
+    return [s for s in df.iloc[:, 0].tolist() if s]
+
+async def causal_discovery_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Phase 4: Diagnostic Engine
+    Queries the Knowledge Graph to generate a list of hypotheses
+    for the metric the question is about (multi-hop, from the in-memory graph).
+    """
+    print("--- [Node] Causal Discovery (The Graph) ---")
+    current_buffer = state.get("stream_buffer", [])
+    
+    question = message_text(state["messages"][-1]) if state.get("messages") else ""
+    target_metric = KG_DEFAULT_TARGET
 
     try:
-        with SQLQueryExecutor() as executor:
-            df = executor.execute_query(graph_query)
-            if not df.empty:
-                # Get the first column (MappedColumn)
-                suspects = df.iloc[:, 0].tolist()
-                suspects = [s for s in suspects if s]
-                
-                print(f"   > Graph found {len(suspects)} hypotheses (SQL Columns): {suspects}")
-                
-                return {
-                    "hypotheses_queue": suspects,
-                    "next_action": "PLAN",
-                    "stream_buffer": streaming_update + [f"Diagnostic: Found {len(suspects)} hypotheses."]
-                }
-            else:
-                print("   > Graph returned no leads.")
-                return {
-                    "hypotheses_queue": [], 
-                    "next_action": "PLAN",
-                    "stream_buffer": streaming_update + ["Diagnostic: No leads found in Graph."]
-                }
+        suspects = None
+        if get_causal_graph() is not None:
+            try:
+                target_metric, suspects = await _graph_suspects(question)
+            except Exception as e:
+                print(f"   > In-memory graph unavailable ({e}). Querying KG tables.")
+        print(f"   > Investigating drivers for: {target_metric}")
+
+        # Streaming Update
+        streaming_update = current_buffer + [f"Diagnostic: Querying Knowledge Graph for '{target_metric}' drivers..."]
+
+        if suspects is None:
+            suspects = [(column, 1, 1.0) for column in await _sql_suspects(target_metric)]
+
+        if suspects:
+            print(f"   > Graph found {len(suspects)} hypotheses (SQL Columns): {[s[0] for s in suspects]}")
+
+            # Most promising first: graph strength / hops, past hit rate, variance share
+            tenant_id = state.get("user_info", {}).get("tenant_id", "")
+            explained = await _explained_estimates([s[0] for s in suspects], tenant_id)
+            ranked = rank_hypotheses(suspects, explained, get_hypothesis_history())
+            print("   > Ranked: " + ", ".join(
+                f"{r.name} ({'?' if r.explained is None else f'{r.explained:.0%}'})" for r in ranked))
+            # Overlapping columns (CITY / LOCATION) explain the same variance: measure the queue's prefixes jointly
+            queue = [r.name for r in ranked]
+            cumulative = await _joint_estimates(queue, tenant_id)
+            if cumulative:
+                print("   > Jointly explained: " + ", ".join(f"+{h} {share:.0%}" for h, share in cumulative.items()))
+
+            return {
+                "hypotheses_queue": queue,
+                "hypothesis_scores": explained,
+                "explained_by_prefix": cumulative,
+                "explained_share": 0.0,
+                "next_action": "PLAN",
+                "stream_buffer": streaming_update + [f"Diagnostic: Found {len(suspects)} hypotheses."]
+            }
+        else:
+            print("   > Graph returned no leads.")
+            return {
+                "hypotheses_queue": [], 
+                "next_action": "PLAN",
+                "stream_buffer": streaming_update + ["Diagnostic: No leads found in Graph."]
+            }
                 
     except Exception as e:
         print(f"   > Error querying Graph: {e}")
         return {
             "error_type": "GRAPH_ERROR", 
             "next_action": "FINALIZE",
-            "stream_buffer": streaming_update + [f"Diagnostic: Graph Error - {e}"]
+            "stream_buffer": current_buffer + [f"Diagnostic: Graph Error - {e}"]
         }
\ No newline at end of file
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from langgraph.checkpoint.base import CheckpointTuple, copy_checkpoint
+from db_agent.config import CHECKPOINT_CACHE_SIZE, CHECKPOINT_CACHE_TTL
+
+
+class CheckpointCache:
+    """
+    Bounded LRU + TTL cache of the latest decoded CheckpointTuple per thread_id.
+
+    The saver updates it on put (and drops the entry when writes land on it),
+    so a session resumed by the same process needs no database read. Entries are copied on the way out because
+    LangGraph mutates channel_versions / versions_seen of the checkpoint it loads.
+    """
+
+    def __init__(self, max_size: int = CHECKPOINT_CACHE_SIZE, ttl: float = CHECKPOINT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[CheckpointTuple, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, thread_id: str, checkpoint_id: Optional[str] = None) -> Optional[CheckpointTuple]:
+        """Latest cached tuple for the thread (or only if it is `checkpoint_id`)."""
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            cached, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[thread_id]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            if checkpoint_id is not None and cached.config["configurable"]["checkpoint_id"] != checkpoint_id:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(thread_id)
+            self.hits += 1
+
+        return cached._replace(checkpoint=copy_checkpoint(cached.checkpoint),
+                               pending_writes=list(cached.pending_writes or []))
+
+    def put(self, thread_id: str, checkpoint_tuple: CheckpointTuple) -> None:
+        with self._lock:
+            current = self._entries.get(thread_id)
+            # Never replace a newer checkpoint (ids are time-ordered) with an older read
+            if current is not None and current[0].config["configurable"]["checkpoint_id"] > checkpoint_tuple.config["configurable"]["checkpoint_id"]:
+                return
+            self._entries[thread_id] = (checkpoint_tuple, time.monotonic())
+            self._entries.move_to_end(thread_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, thread_id: str, checkpoint_id: Optional[str] = None) -> None:
+        """Drops the thread's entry (only if it is `checkpoint_id`, when given)."""
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is not None and checkpoint_id in (None, entry[0].config["configurable"]["checkpoint_id"]):
+                del self._entries[thread_id]
+
+    def mark_stale(self, thread_id: str) -> None:
+        """Another process wrote a newer checkpoint for this thread."""
+        self.invalidate(thread_id)
+        with self._lock:
+            self.stale += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions,
+        }
+
+
+# -------------------------------------------------------------------------
+# PROCESS-WIDE CACHE
+# Savers are created per request (app_ui.run_agent), so the cache outlives them.
+# -------------------------------------------------------------------------
+_SHARED_CACHE: Optional[CheckpointCache] = None
+_SHARED_CACHE_LOCK = threading.Lock()
+
+def get_checkpoint_cache() -> CheckpointCache:
+    global _SHARED_CACHE
+    with _SHARED_CACHE_LOCK:
+        if _SHARED_CACHE is None:
+            _SHARED_CACHE = CheckpointCache()
+        return _SHARED_CACHE
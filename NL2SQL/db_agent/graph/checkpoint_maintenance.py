@@ -0,0 +1,317 @@
+import argparse
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+from db_agent.client.az_sql import SQLQueryExecutor
+from db_agent.graph.checkpoint_serde import CheckpointSerde
+from db_agent.config import CHECKPOINT_RETENTION_KEEP_LAST, CHECKPOINT_RETENTION_MODE, CHECKPOINT_RETENTION_MIN_AGE_H
+
+# =============================================================================
+# MANAGED SCHEMA (kept in sync with db_artefacts.sql)
+# Each statement is idempotent, so ensure_schema() is safe on every start-up.
+# =============================================================================
+SCHEMA_STATEMENTS = [
+    # Checkpoints: clustered on (thread_id, checkpoint_id DESC). Ids are time-ordered (uuid6),
+    # so "latest per thread" is a single seek, in creation order without DATETIME ties.
+    """
+    IF OBJECT_ID('agent_checkpoints', 'U') IS NULL
+    BEGIN
+        CREATE TABLE agent_checkpoints (
+            thread_id NVARCHAR(255) NOT NULL,
+            checkpoint_id NVARCHAR(255) NOT NULL,
+            parent_checkpoint_id NVARCHAR(255) NULL,
+            checkpoint_data NVARCHAR(MAX) NULL,
+            checkpoint_blob VARBINARY(MAX) NULL,
+            metadata NVARCHAR(MAX) NULL,
+            created_at DATETIME DEFAULT GETDATE(),
+            CONSTRAINT PK_agent_checkpoints PRIMARY KEY CLUSTERED (thread_id, checkpoint_id DESC)
+        );
+        CREATE INDEX IX_Checkpoints_Thread ON agent_checkpoints(thread_id, created_at DESC);
+    END
+    """,
+    """
+    IF COL_LENGTH('agent_checkpoints', 'checkpoint_blob') IS NULL
+    BEGIN
+        ALTER TABLE agent_checkpoints ADD checkpoint_blob VARBINARY(MAX) NULL;
+        ALTER TABLE agent_checkpoints ALTER COLUMN checkpoint_data NVARCHAR(MAX) NULL;
+    END
+    """,
+    # Pre-existing tables keyed (thread_id, checkpoint_id): move to the newest-first clustered key
+    # (one-off rebuild) that compact_checkpoints and the ROW_NUMBER ... DESC reads assume
+    """
+    IF OBJECT_ID('agent_checkpoints', 'U') IS NOT NULL AND NOT EXISTS (
+        SELECT 1
+        FROM sys.indexes AS i
+        JOIN sys.index_columns AS ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+        JOIN sys.columns AS c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+        WHERE i.object_id = OBJECT_ID('agent_checkpoints') AND i.is_primary_key = 1 AND i.type = 1
+          AND ic.key_ordinal = 2 AND c.name = 'checkpoint_id' AND ic.is_descending_key = 1
+    )
+    BEGIN
+        DECLARE @pk SYSNAME = (SELECT name FROM sys.key_constraints
+                               WHERE parent_object_id = OBJECT_ID('agent_checkpoints') AND type = 'PK');
+        IF @pk IS NOT NULL
+        BEGIN
+            DECLARE @drop NVARCHAR(400) = N'ALTER TABLE agent_checkpoints DROP CONSTRAINT ' + QUOTENAME(@pk);
+            EXEC sp_executesql @drop;
+        END
+        ALTER TABLE agent_checkpoints
+            ADD CONSTRAINT PK_agent_checkpoints PRIMARY KEY CLUSTERED (thread_id, checkpoint_id DESC);
+    END
+    """,
+    """
+    IF OBJECT_ID('agent_checkpoint_blobs', 'U') IS NULL
+        CREATE TABLE agent_checkpoint_blobs (
+            thread_id NVARCHAR(255) NOT NULL,
+            channel NVARCHAR(255) NOT NULL,
+            version NVARCHAR(255) NOT NULL,
+            base_version NVARCHAR(255) NULL,
+            blob VARBINARY(MAX) NOT NULL,
+            created_at DATETIME DEFAULT GETDATE(),
+            PRIMARY KEY (thread_id, channel, version)
+        );
+    """,
+    """
+    IF OBJECT_ID('agent_checkpoint_writes', 'U') IS NULL
+        CREATE TABLE agent_checkpoint_writes (
+            thread_id NVARCHAR(255) NOT NULL,
+            checkpoint_id NVARCHAR(255) NOT NULL,
+            task_id NVARCHAR(255) NOT NULL,
+            idx INT NOT NULL,
+            channel NVARCHAR(255) NOT NULL,
+            blob VARBINARY(MAX) NOT NULL,
+            task_path NVARCHAR(1000) NOT NULL DEFAULT '',
+            created_at DATETIME DEFAULT GETDATE(),
+            PRIMARY KEY (thread_id, checkpoint_id, task_id, idx)
+        );
+    """,
+    # Session catalog: one row per thread, maintained by the saver (sidebar reads this, not a DISTINCT scan)
+    """
+    IF OBJECT_ID('agent_sessions', 'U') IS NULL
+    BEGIN
+        CREATE TABLE agent_sessions (
+            thread_id NVARCHAR(255) NOT NULL PRIMARY KEY,
+            last_checkpoint_id NVARCHAR(255) NULL,
+            checkpoint_count INT NOT NULL DEFAULT 0,
+            created_at DATETIME DEFAULT GETDATE(),
+            updated_at DATETIME DEFAULT GETDATE()
+        );
+        CREATE INDEX IX_Sessions_Updated ON agent_sessions(updated_at DESC);
+
+        -- Backfill from existing history (one-off)
+        INSERT INTO agent_sessions (thread_id, last_checkpoint_id, checkpoint_count, created_at, updated_at)
+        SELECT thread_id, MAX(checkpoint_id), COUNT(*), MIN(created_at), MAX(created_at)
+        FROM agent_checkpoints
+        GROUP BY thread_id;
+    END
+    """,
+    # Archive targets for the retention job (same shape, no constraints beyond the key)
+    """
+    IF OBJECT_ID('agent_checkpoints_archive', 'U') IS NULL
+        CREATE TABLE agent_checkpoints_archive (
+            thread_id NVARCHAR(255) NOT NULL,
+            checkpoint_id NVARCHAR(255) NOT NULL,
+            parent_checkpoint_id NVARCHAR(255) NULL,
+            checkpoint_data NVARCHAR(MAX) NULL,
+            checkpoint_blob VARBINARY(MAX) NULL,
+            metadata NVARCHAR(MAX) NULL,
+            created_at DATETIME NULL,
+            archived_at DATETIME DEFAULT GETDATE(),
+            PRIMARY KEY (thread_id, checkpoint_id)
+        );
+    """,
+    """
+    IF OBJECT_ID('agent_checkpoint_blobs_archive', 'U') IS NULL
+        CREATE TABLE agent_checkpoint_blobs_archive (
+            thread_id NVARCHAR(255) NOT NULL,
+            channel NVARCHAR(255) NOT NULL,
+            version NVARCHAR(255) NOT NULL,
+            base_version NVARCHAR(255) NULL,
+            blob VARBINARY(MAX) NOT NULL,
+            created_at DATETIME NULL,
+            archived_at DATETIME DEFAULT GETDATE(),
+            PRIMARY KEY (thread_id, channel, version)
+        );
+    """,
+]
+
+_SCHEMA_READY = False
+_SCHEMA_LOCK = threading.Lock()
+
+def ensure_schema(force: bool = False) -> None:
+    """Creates / migrates the saver tables once per process."""
+    global _SCHEMA_READY
+    with _SCHEMA_LOCK:
+        if _SCHEMA_READY and not force:
+            return
+        print("--- [Checkpoint] Ensuring schema ---")
+        with SQLQueryExecutor() as executor:
+            for statement in SCHEMA_STATEMENTS:
+                executor.execute_query(statement, fetch=False)
+        _SCHEMA_READY = True
+
+
+# =============================================================================
+# RETENTION / COMPACTION
+# =============================================================================
+# Threads with more than @keep checkpoints; the oldest kept checkpoint is the cut-off
+_SELECT_CUTOFFS = """
+SELECT thread_id, checkpoint_id AS cutoff_id
+FROM (
+    SELECT thread_id, checkpoint_id,
+           ROW_NUMBER() OVER (PARTITION BY thread_id ORDER BY checkpoint_id DESC) AS rn
+    FROM agent_checkpoints
+) AS ranked
+WHERE rn = ?
+  AND EXISTS (SELECT 1 FROM agent_checkpoints AS older
+              WHERE older.thread_id = ranked.thread_id AND older.checkpoint_id < ranked.checkpoint_id
+                AND older.created_at < DATEADD(HOUR, -?, GETDATE()))
+"""
+
+_PRUNE_CHECKPOINTS = """
+DELETE FROM agent_checkpoints
+{output}
+WHERE thread_id = ? AND checkpoint_id < ? AND created_at < DATEADD(HOUR, -?, GETDATE());
+SELECT @@ROWCOUNT AS pruned;
+"""
+
+_PRUNE_WRITES = """
+DELETE w FROM agent_checkpoint_writes AS w
+WHERE w.thread_id = ?
+  AND NOT EXISTS (SELECT 1 FROM agent_checkpoints AS c WHERE c.thread_id = w.thread_id AND c.checkpoint_id = w.checkpoint_id);
+SELECT @@ROWCOUNT AS pruned;
+"""
+
+# Per channel, keep everything from the full snapshot that the oldest kept checkpoint's
+# value is rebuilt from (its append-delta chain starts there). Older versions are dropped
+# unless a kept delta still points at them (chains written by another process).
+_PRUNE_BLOBS = """
+WITH keep AS (
+    SELECT w.channel, ISNULL(MAX(s.version), w.version) AS keep_from
+    FROM OPENJSON(?) WITH (channel NVARCHAR(255) '$.c', version NVARCHAR(255) '$.v') AS w
+    LEFT JOIN agent_checkpoint_blobs AS s
+      ON s.thread_id = ? AND s.channel = w.channel AND s.version <= w.version AND s.base_version IS NULL
+    GROUP BY w.channel, w.version
+), reachable AS (
+    SELECT b.channel, b.base_version
+    FROM agent_checkpoint_blobs AS b
+    JOIN keep AS k ON b.channel = k.channel
+    WHERE b.thread_id = ? AND b.version >= k.keep_from AND b.base_version < k.keep_from
+    UNION ALL
+    SELECT b.channel, b.base_version
+    FROM agent_checkpoint_blobs AS b
+    JOIN reachable AS r ON b.channel = r.channel AND b.version = r.base_version
+    WHERE b.thread_id = ? AND b.base_version IS NOT NULL
+)
+DELETE b {output}
+FROM agent_checkpoint_blobs AS b
+JOIN keep AS k ON b.channel = k.channel
+WHERE b.thread_id = ? AND b.version < k.keep_from
+  AND NOT EXISTS (SELECT 1 FROM reachable AS r WHERE r.channel = b.channel AND r.base_version = b.version);
+SELECT @@ROWCOUNT AS pruned;
+"""
+
+_SYNC_SESSION = """
+UPDATE agent_sessions
+SET checkpoint_count = (SELECT COUNT(*) FROM agent_checkpoints WHERE thread_id = ?)
+WHERE thread_id = ?
+"""
+
+_CHECKPOINT_ARCHIVE_OUTPUT = (
+    "OUTPUT deleted.thread_id, deleted.checkpoint_id, deleted.parent_checkpoint_id, deleted.checkpoint_data, "
+    "deleted.checkpoint_blob, deleted.metadata, deleted.created_at "
+    "INTO agent_checkpoints_archive (thread_id, checkpoint_id, parent_checkpoint_id, checkpoint_data, "
+    "checkpoint_blob, metadata, created_at)"
+)
+_BLOB_ARCHIVE_OUTPUT = (
+    "OUTPUT deleted.thread_id, deleted.channel, deleted.version, deleted.base_version, deleted.blob, deleted.created_at "
+    "INTO agent_checkpoint_blobs_archive (thread_id, channel, version, base_version, blob, created_at)"
+)
+
+# Cumulative metrics for this process (exposed via retention_stats())
+_RETENTION_STATS = {"runs": 0, "threads": 0, "checkpoints_pruned": 0, "blobs_pruned": 0, "writes_pruned": 0}
+
+def compact_checkpoints(keep_last: int = CHECKPOINT_RETENTION_KEEP_LAST,
+                        mode: str = CHECKPOINT_RETENTION_MODE,
+                        min_age_hours: int = CHECKPOINT_RETENTION_MIN_AGE_H,
+                        serde: Optional[CheckpointSerde] = None,
+                        ) -> Dict[str, Any]:
+    """
+    Keeps the newest `keep_last` checkpoints per thread (and anything younger
+    than `min_age_hours`), archiving or deleting older checkpoints, their pending
+    writes and the channel blobs no kept checkpoint can reach. Returns run metrics.
+    """
+    if keep_last < 1:
+        raise ValueError("keep_last must be >= 1 (the latest checkpoint is needed to resume).")
+    if mode not in ("archive", "delete"):
+        raise ValueError(f"Unsupported retention mode: {mode}")
+
+    serde = serde or CheckpointSerde()
+
+    ensure_schema()
+    print(f"--- [Checkpoint] Retention: keep last {keep_last}, mode={mode} ---")
+    start = time.perf_counter()
+    metrics = {"threads": 0, "checkpoints_pruned": 0, "blobs_pruned": 0, "writes_pruned": 0}
+
+    checkpoint_sql = _PRUNE_CHECKPOINTS.format(output=_CHECKPOINT_ARCHIVE_OUTPUT if mode == "archive" else "")
+    blob_sql = _PRUNE_BLOBS.format(output=_BLOB_ARCHIVE_OUTPUT if mode == "archive" else "")
+
+    with SQLQueryExecutor() as executor:
+        cutoffs = executor.execute_query(_SELECT_CUTOFFS, params=[keep_last, min_age_hours])
+
+        for row in cutoffs.itertuples(index=False):
+            thread_id = row.thread_id
+            checkpoints = executor.execute_query(checkpoint_sql, params=[thread_id, row.cutoff_id, min_age_hours])
+            writes = executor.execute_query(_PRUNE_WRITES, params=[thread_id])
+
+            # Channel versions of the oldest surviving checkpoint bound which blobs are still reachable
+            oldest = executor.execute_query(
+                "SELECT TOP 1 checkpoint_blob FROM agent_checkpoints WHERE thread_id = ? ORDER BY checkpoint_id ASC",
+                params=[thread_id],
+            )
+            blob = oldest.iloc[0]["checkpoint_blob"] if not oldest.empty else None
+            blobs = None
+            if blob is not None:  # Legacy JSON checkpoints have no channel table to compact against
+                versions = serde.loads(blob).get("channel_versions", {})
+                blobs = executor.execute_query(blob_sql, params=[
+                    json.dumps([{"c": c, "v": str(v)} for c, v in versions.items()]),
+                    thread_id, thread_id, thread_id, thread_id,
+                ])
+            executor.execute_query(_SYNC_SESSION, fetch=False, params=[thread_id, thread_id])  # commits the thread
+
+            metrics["threads"] += 1
+            metrics["checkpoints_pruned"] += _rowcount(checkpoints)
+            metrics["writes_pruned"] += _rowcount(writes)
+            metrics["blobs_pruned"] += _rowcount(blobs)
+
+    metrics["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    _RETENTION_STATS["runs"] += 1
+    for key in ("threads", "checkpoints_pruned", "blobs_pruned", "writes_pruned"):
+        _RETENTION_STATS[key] += metrics[key]
+
+    print(f"   > Pruned {metrics['checkpoints_pruned']} checkpoints, {metrics['blobs_pruned']} blobs, "
+          f"{metrics['writes_pruned']} writes across {metrics['threads']} threads in {metrics['duration_ms']} ms")
+    return metrics
+
+def retention_stats() -> Dict[str, int]:
+    return dict(_RETENTION_STATS)
+
+def _rowcount(df) -> int:
+    return int(df.iloc[0]["pruned"]) if df is not None and not df.empty else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint schema setup and retention compaction.")
+    parser.add_argument("--keep-last", type=int, default=CHECKPOINT_RETENTION_KEEP_LAST)
+    parser.add_argument("--mode", choices=["archive", "delete"], default=CHECKPOINT_RETENTION_MODE)
+    parser.add_argument("--min-age-hours", type=int, default=CHECKPOINT_RETENTION_MIN_AGE_H)
+    parser.add_argument("--schema-only", action="store_true", help="Only create / migrate the tables.")
+    args = parser.parse_args()
+
+    ensure_schema(force=True)
+    if not args.schema_only:
+        compact_checkpoints(args.keep_last, args.mode, args.min_age_hours)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import atexit
+import base64
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from db_agent.config import (
+    CHECKPOINT_QUEUE_MAX_SIZE, CHECKPOINT_FLUSH_INTERVAL, CHECKPOINT_MAX_ATTEMPTS, CHECKPOINT_DEAD_LETTER_LOG,
+)
+
+
+class CheckpointWriteError(RuntimeError):
+    """A queued operation of this thread kept failing and was moved to the dead-letter log."""
+
+
+class CheckpointWriteQueue:
+    """
+    Write-behind buffer for SQLServerSaver.
+
+    Operations are kept in an ordered queue per thread_id and handed to
+    `flush_fn` by a background flusher thread, one batch (and commit) per
+    thread. Operations stay visible (see `pending`) until their batch is
+    committed, so readers can serve their own writes from memory.
+
+    Failures stay with their thread: a failed batch is retried op by op, the
+    committed prefix is dropped, and an op that fails `max_attempts` times
+    while other writes succeed is moved to `dead_letter_path` together with
+    the thread's later queued ops (they may be deltas against it), and
+    `on_dead_letter(thread_id)` is called so the producer stops building on
+    them. Its thread's next submit (rejected, nothing is queued) / flush raises
+    CheckpointWriteError; other threads never see it.
+
+    Backpressure: once `max_size` operations are queued, the producer
+    flushes synchronously instead of growing the queue. Ops that fail stay
+    queued for the flusher; only a dead-lettered thread raises.
+    """
+
+    def __init__(self,
+                 flush_fn: Callable[[List[Any]], None],
+                 max_size: int = CHECKPOINT_QUEUE_MAX_SIZE,
+                 interval: float = CHECKPOINT_FLUSH_INTERVAL,
+                 max_attempts: int = CHECKPOINT_MAX_ATTEMPTS,
+                 dead_letter_path: Optional[str] = CHECKPOINT_DEAD_LETTER_LOG,
+                 on_dead_letter: Optional[Callable[[str], None]] = None,
+                 ):
+        self._flush_fn = flush_fn
+        self._on_dead_letter = on_dead_letter
+        self.max_size = max_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path
+
+        self._pending: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One batch in flight at a time keeps per-thread order
+        self._wake = threading.Event()
+        self._closed = False
+        self._worker: Optional[threading.Thread] = None
+        self._failures: Dict[int, Tuple[int, int]] = {}     # id(op) -> (attempts, successes seen at the last failure)
+        self._errors: Dict[str, CheckpointWriteError] = {}  # thread_id -> dead-lettered ops not yet reported
+        self._successes = 0
+        self._last_error: Optional[Exception] = None
+
+        self.flushes = 0
+        self.flushed_ops = 0
+        self.backpressure_flushes = 0
+        self.failed_flushes = 0
+        self.dead_lettered = 0
+
+    def submit(self, thread_id: str, op: Any) -> None:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Checkpoint write queue is closed.")
+            dead = self._errors.pop(thread_id, None)
+            if dead is None:
+                self._pending.setdefault(thread_id, []).append(op)
+                self._size += 1
+                full = self._size >= self.max_size
+                if self._worker is None:
+                    self._start_worker()
+        if dead is not None:
+            # Reject before queueing: the op may build on writes that were dropped
+            raise dead
+
+        if full:
+            self.backpressure_flushes += 1
+            failures = self._flush_all(None)
+            self._raise_dead_letter(thread_id, failures.get(thread_id))
+        else:
+            self._wake.set()
+
+    def pending(self, thread_id: str) -> List[Any]:
+        """Queued (not yet committed) operations for a thread, oldest first."""
+        with self._lock:
+            return list(self._pending.get(thread_id, ()))
+
+    def is_full(self) -> bool:
+        return self._size >= self.max_size
+
+    def flush(self, thread_id: Optional[str] = None) -> None:
+        """
+        Synchronously write everything queued (or only one thread's operations).
+        Raises only for `thread_id`: its write error, or an op of it dead-lettered earlier.
+        """
+        failures = self._flush_all(thread_id)
+        failure = failures.get(thread_id)
+        self._raise_dead_letter(thread_id, failure)
+        if failure is not None:
+            raise failure
+
+    def _flush_all(self, thread_id: Optional[str]) -> Dict[str, Exception]:
+        """Writes and commits thread by thread; returns the threads whose write failed."""
+        failures: Dict[str, Exception] = {}
+        with self._flush_lock:
+            with self._lock:
+                batch = {t: list(ops) for t, ops in self._pending.items() if thread_id in (None, t)}
+            for t, ops in batch.items():
+                error = self._flush_thread(t, ops)
+                if error is not None:
+                    failures[t] = error
+        return failures
+
+    def _flush_thread(self, thread_id: str, ops: List[Any]) -> Optional[Exception]:
+        written = self._write(ops)
+        if written is None:
+            # Find the failing op: commit the batch one by one, in order, up to it
+            written = 0
+            for op in ops if len(ops) > 1 else ():
+                if self._write([op]) is None:
+                    break
+                written += 1
+        error = self._last_error if written < len(ops) else None
+
+        dead, attempts = False, 0
+        if error is not None:
+            self.failed_flushes += 1
+            attempts = self._count_failure(ops[written])
+            print(f"   > [Checkpoint] Write failed for thread {thread_id} "
+                  f"(attempt {attempts}/{self.max_attempts}): {error}")
+            dead = attempts >= self.max_attempts
+
+        # Drop exactly the committed prefix (newer ops may have arrived meanwhile); on a
+        # dead letter also everything after it: later puts may be deltas against the failed op
+        with self._lock:
+            queued = self._pending.get(thread_id, [])
+            dropped = queued[written:] if dead else []
+            remaining = [] if dead else queued[written:]
+            if remaining:
+                self._pending[thread_id] = remaining
+            else:
+                self._pending.pop(thread_id, None)
+            self._size -= written + len(dropped)
+            for op in queued[:written] + dropped:
+                self._failures.pop(id(op), None)
+            if dead:
+                self._errors[thread_id] = CheckpointWriteError(
+                    f"A checkpoint write of thread {thread_id} failed {attempts} times and was dead-lettered "
+                    f"with {len(dropped) - 1} later queued op(s): {error}")
+        if dead:
+            self._dead_letter(thread_id, dropped, error, attempts)
+            if self._on_dead_letter is not None:
+                self._on_dead_letter(thread_id)
+        if written:
+            self.flushes += 1
+            self.flushed_ops += written
+        return error
+
+    def _write(self, ops: List[Any]) -> Optional[int]:
+        """flush_fn(ops): the number written, or None (error kept in _last_error)."""
+        try:
+            self._flush_fn(ops)
+        except Exception as e:
+            self._last_error = e
+            return None
+        self._successes += 1
+        return len(ops)
+
+    def _count_failure(self, op: Any) -> int:
+        attempts, seen = self._failures.get(id(op), (0, -1))
+        # Only failures while the database accepts other writes count: an outage must not dead-letter the queue
+        if seen != self._successes:
+            attempts += 1
+        self._failures[id(op)] = (attempts, self._successes)
+        return attempts
+
+    def _dead_letter(self, thread_id: str, ops: List[Any], error: Exception, attempts: int) -> None:
+        """Logs the failed op (first) and the later ops dropped with it, for replay."""
+        self.dead_lettered += len(ops)
+        timestamp = datetime.now().isoformat()
+        lines = []
+        for i, op in enumerate(ops):
+            try:
+                payload = base64.b64encode(pickle.dumps(op)).decode("ascii")
+            except Exception:
+                payload = None
+            lines.append(json.dumps({
+                "timestamp": timestamp,
+                "thread_id": thread_id,
+                "op": type(op).__name__,
+                "attempts": attempts if i == 0 else 0,
+                "error": str(error) if i == 0 else "dropped: queued after a dead-lettered op",
+                "payload": payload,  # base64 pickle of the op, for replay
+            }))
+        if self.dead_letter_path:
+            try:
+                with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                    f.write("".join(line + "\n" for line in lines))
+            except OSError as e:
+                print(f"   > [Checkpoint] Dead-letter log failed: {e}")
+        print(f"   > [Checkpoint] Dropped a {type(ops[0]).__name__} of thread {thread_id} after {attempts} attempts "
+              f"and {len(ops) - 1} op(s) queued after it (-> {self.dead_letter_path}).")
+
+    def _raise_dead_letter(self, thread_id: Optional[str], cause: Optional[Exception]) -> None:
+        if thread_id is None:
+            return
+        with self._lock:
+            dead = self._errors.pop(thread_id, None)
+        if dead is not None:
+            raise dead from cause
+
+    def close(self) -> None:
+        """Stops the flusher and writes whatever is left."""
+        with self._lock:
+            self._closed = True
+            worker = self._worker
+        self._wake.set()
+        if worker is not None:
+            worker.join()
+        self._flush_all(None)
+        atexit.unregister(self.close)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._size,
+            "threads": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_ops": self.flushed_ops,
+            "backpressure_flushes": self.backpressure_flushes,
+            "failed_flushes": self.failed_flushes,
+            "dead_lettered": self.dead_lettered,
+        }
+
+    # ---------------------------------------------------------
+    # Background flusher
+    # ---------------------------------------------------------
+    def _start_worker(self) -> None:
+        self._worker = threading.Thread(target=self._run, name="checkpoint-flusher", daemon=True)
+        self._worker.start()
+        # Daemon threads die with the interpreter: make sure the tail is written
+        atexit.register(self.close)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                break
+            # Give the current superstep a moment so its put + put_writes share a batch
+            time.sleep(self.interval)
+            if self._flush_all(None):
+                # Failed ops stay queued (until dead-lettered); retry after a pause
+                self._wake.set()
+                time.sleep(max(self.interval, 1.0))
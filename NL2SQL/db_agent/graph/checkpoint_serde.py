@@ -0,0 +1,102 @@
+import zlib
+from typing import Any, Optional
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from db_agent.config import CHECKPOINT_COMPRESSION, CHECKPOINT_COMPRESS_THRESHOLD, CHECKPOINT_COMPRESSION_LEVEL
+from db_agent.schema.columnar_result import ColumnarResult
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency: fall back to zlib
+    zstandard = None
+
+# Envelope layout: [codec:1][len(type):1][type][payload]
+_CODEC_NONE = 0
+_CODEC_ZLIB = 1
+_CODEC_ZSTD = 2
+_COLUMNAR_TAG = "__columnar__"
+
+
+class CheckpointSerde:
+    """
+    Binary serde layer for SQLServerSaver.
+
+    Values are encoded with a LangGraph serializer (msgpack via JsonPlusSerializer
+    by default, so messages and other objects round-trip losslessly), then
+    optionally compressed with zlib/zstd when the payload exceeds a size threshold.
+    The result is a single self-describing bytes envelope for a VARBINARY column.
+    """
+
+    def __init__(self,
+                 serde: Optional[SerializerProtocol] = None,
+                 compression: Optional[str] = CHECKPOINT_COMPRESSION,
+                 threshold: int = CHECKPOINT_COMPRESS_THRESHOLD,
+                 level: int = CHECKPOINT_COMPRESSION_LEVEL,
+                 ):
+        if compression not in (None, "zlib", "zstd"):
+            raise ValueError(f"Unsupported checkpoint compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            print("   > [Checkpoint] zstandard not installed, falling back to zlib.")
+            compression = "zlib"
+
+        self.serde = serde or JsonPlusSerializer()
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+
+    def dumps(self, obj: Any) -> bytes:
+        type_, payload = self.serde.dumps_typed(_pack_columnar(obj))
+        codec = _CODEC_NONE
+
+        if self.compression and len(payload) > self.threshold:
+            if self.compression == "zstd":
+                compressed = zstandard.ZstdCompressor(level=self.level).compress(payload)
+                candidate = _CODEC_ZSTD
+            else:
+                compressed = zlib.compress(payload, self.level)
+                candidate = _CODEC_ZLIB
+            # Only keep the compressed form if it actually pays off
+            if len(compressed) < len(payload):
+                payload, codec = compressed, candidate
+
+        type_bytes = type_.encode("ascii")
+        return bytes((codec, len(type_bytes))) + type_bytes + payload
+
+    def loads(self, blob: Optional[bytes]) -> Any:
+        if blob is None:
+            return None
+        blob = bytes(blob)
+        codec, type_len = blob[0], blob[1]
+        type_ = blob[2:2 + type_len].decode("ascii")
+        payload = blob[2 + type_len:]
+
+        if codec == _CODEC_ZLIB:
+            payload = zlib.decompress(payload)
+        elif codec == _CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("Checkpoint is zstd-compressed but `zstandard` is not installed.")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+
+        return _unpack_columnar(self.serde.loads_typed((type_, payload)))
+
+
+# -------------------------------------------------------------------------
+# ColumnarResult <-> compact payload (walks nested dicts such as channel_values)
+# -------------------------------------------------------------------------
+def _pack_columnar(obj: Any) -> Any:
+    if isinstance(obj, ColumnarResult):
+        return {_COLUMNAR_TAG: obj.to_payload()}
+    if isinstance(obj, dict):
+        if any(isinstance(v, (ColumnarResult, dict)) for v in obj.values()):
+            return {k: _pack_columnar(v) if isinstance(v, (ColumnarResult, dict)) else v for k, v in obj.items()}
+    return obj
+
+
+def _unpack_columnar(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        if len(obj) == 1 and _COLUMNAR_TAG in obj:
+            return ColumnarResult.from_payload(obj[_COLUMNAR_TAG])
+        if any(isinstance(v, dict) for v in obj.values()):
+            return {k: _unpack_columnar(v) if isinstance(v, dict) else v for k, v in obj.items()}
+    return obj
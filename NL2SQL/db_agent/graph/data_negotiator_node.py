@@ -1,4 +1,5 @@
 from typing import Dict, Any
+from db_agent.config import RESULT_CELL_LIMIT
 from db_agent.graph.state import AgentState
 
 def data_negotiator_node(state: AgentState) -> Dict[str, Any]:
@@ -9,15 +10,14 @@ def data_negotiator_node(state: AgentState) -> Dict[str, Any]:
     print("--- [Node] Data Negotiator ---")
     
     results = state.get("sql_result", [])
-    row_count = len(results)
-    col_count = len(results[0]) if row_count > 0 else 0
+    # The executor reports the true size; sql_result itself may be a bounded sample
+    row_count = state.get("sql_row_count", len(results))
+    col_count = state.get("sql_col_count", len(results[0]) if results else 0)
     
     # Example: 10 rows * 5 columns = 50 cells
-    CELL_LIMIT = 50
-
     total_cells = row_count * col_count 
     
-    if total_cells > CELL_LIMIT:
+    if total_cells > RESULT_CELL_LIMIT:
         print(f"   > Dataset too large ({row_count} rows). Triggering negotiation.")
         return {
             "user_negotiated": False, # Flag that we need user input
@@ -0,0 +1,75 @@
+import time
+from typing import Dict, Any, List
+import pandas as pd
+from db_agent.config import (
+    DIAGNOSTIC_BATCH_COLUMNS, DRIVER_ALL_COLUMNS, DRIVER_MAX_FINDINGS, DRIVER_MAX_SLICE_ROWS,
+)
+from db_agent.graph.state import AgentState
+from db_agent.client.az_sql import SQLQueryExecutor
+from db_agent.cache.result_cache import get_result_cache
+from db_agent.graph.sp_executor_node import batchable_columns
+from db_agent.analytics.driver_analysis import build_driver_slice_query, analyze_drivers, format_findings
+
+async def driver_analysis_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Phase 5: Diagnostic (Driver Analysis)
+    Pulls one slice for all suspect dimensions and ranks them locally (share-of-change,
+    variance explained, top members). Only the numeric driver table reaches an LLM,
+    in the Synthesizer. Suspects it cannot cover go on to parallel_investigation_node.
+    """
+    print("--- [Node] Driver Analysis ---")
+    current_buffer = state.get("stream_buffer", [])
+    queue: List[str] = state.get("hypotheses_queue", [])
+    tenant_id = state.get("user_info", {}).get("tenant_id", "")
+
+    columns = batchable_columns(DIAGNOSTIC_BATCH_COLUMNS if DRIVER_ALL_COLUMNS else queue)
+    leftover = [h for h in queue if h.strip().upper() not in columns]
+    if not columns:
+        print("   > No suspect is a whitelisted column. Testing hypotheses individually.")
+        return {"next_action": "INVESTIGATE_ALL"}
+
+    dimensions = sorted(columns)
+    start = time.perf_counter()
+    try:
+        fetch = lambda: SQLQueryExecutor().afetch_rows(build_driver_slice_query(dimensions), max_rows=DRIVER_MAX_SLICE_ROWS)
+        result_cache = get_result_cache()
+        if result_cache is not None:
+            fetched = await result_cache.get_or_fetch("driver_slice", {"Columns": ",".join(dimensions)}, tenant_id, fetch)
+        else:
+            fetched = await fetch()
+        if fetched.truncated:
+            raise ValueError(f"slice exceeds {DRIVER_MAX_SLICE_ROWS} rows")
+        if not fetched.rows:
+            raise ValueError("slice is empty")
+
+        slice_df = pd.DataFrame.from_records(fetched.rows, columns=["Period", "PeriodKey", *dimensions,
+                                                                    "Metric", "Records", "MetricSquares"])
+        report = analyze_drivers(slice_df, dimensions)
+    except Exception as e:
+        print(f"   > Driver analysis unavailable ({e}). Testing hypotheses individually.")
+        return {"next_action": "INVESTIGATE_ALL"}
+
+    findings = format_findings(report, DRIVER_MAX_FINDINGS)
+    print(f"   > {len(dimensions)} dimensions ranked from {len(fetched.rows)} slice rows "
+          f"in {(time.perf_counter() - start) * 1e3:.0f} ms (jointly explain ~{report.joint_explained:.0%}).")
+    for line in findings:
+        print(f"   > {line}")
+
+    # Per-dimension shares rank; the joint share of the whole slice feeds the early stop for the leftover suspects
+    scores = dict(state.get("hypothesis_scores") or {})
+    scores.update({columns[d.dimension]: d.explained for d in report.drivers if d.dimension in columns})
+    analyzed = [columns[d] for d in dimensions]
+    existing_causes = state.get("confirmed_causes", []) or []
+
+    return {
+        "confirmed_causes": existing_causes + findings,
+        "hypotheses_queue": leftover,
+        "hypothesis_scores": scores,
+        "tested_hypotheses": (state.get("tested_hypotheses") or []) + analyzed,
+        "explained_share": max(state.get("explained_share", 0.0) or 0.0, report.joint_explained),
+        "next_action": "INVESTIGATE_ALL" if leftover else "PLAN",
+        "stream_buffer": current_buffer + [
+            f"Diagnostic: Ranked {len(dimensions)} dimensions from one slice. Top driver: "
+            f"{report.drivers[0].dimension}." if report.drivers else "Diagnostic: No drivers found."
+        ],
+    }
@@ -1,9 +1,22 @@
 from typing import Dict, Any
 from db_agent.graph.state import AgentState
 from db_agent.config import CHAT_MODEL_DEPLOYMENT
-from db_agent.client.az_llm import build_agent
+from db_agent.client.az_llm import get_agent
 from db_agent.schema.pydantic_models import PlannerOutput
 
+RECOVERY_INSTRUCTIONS = """
+    You are a SQL Expert Debugger. 
+    A stored procedure call failed; its parameters and error message are given below.
+    
+    COMMON FIXES:
+    - If "Invalid column name 'DATE'", try removing the Date params or checking the schema.
+    - If "Error converting data type", check if a string ('Last Month') was passed to a Date field.
+    - If "Invalid object name", check table names.
+    
+    YOUR GOAL:
+    Output a corrected 'PlannerOutput' with the SAME action (EXECUTE) but fixed parameters.
+    """
+
 async def error_recovery_node(state: AgentState) -> Dict[str, Any]:
     """
     Phase 6: Execution (Safety)
@@ -17,9 +30,8 @@ async def error_recovery_node(state: AgentState) -> Dict[str, Any]:
     
     print(f"   > Attempting to fix error: {error_msg}")
 
-    # System Prompt: acts as a SQL Expert Debugger
-    system_prompt = f"""
-    You are a SQL Expert Debugger. 
+    # The failed call (static debugging rules live in RECOVERY_INSTRUCTIONS)
+    context = f"""
     The previous attempt to run '{tool_name}' failed.
     
     PARAMETERS USED:
@@ -27,24 +39,17 @@ async def error_recovery_node(state: AgentState) -> Dict[str, Any]:
     
     ERROR MESSAGE:
     {error_msg}
-    
-    COMMON FIXES:
-    - If "Invalid column name 'DATE'", try removing the Date params or checking the schema.
-    - If "Error converting data type", check if a string ('Last Month') was passed to a Date field.
-    - If "Invalid object name", check table names.
-    
-    YOUR GOAL:
-    Output a corrected 'PlannerOutput' with the SAME action (EXECUTE) but fixed parameters.
     """
 
-    agent = build_agent(
+    agent = get_agent(
         output_type_schema=PlannerOutput,
-        system_prompt=system_prompt,
+        instructions=RECOVERY_INSTRUCTIONS,
         model_name=CHAT_MODEL_DEPLOYMENT['reasoning'],
+        memoize=True,  # Identical error + params: reuse the earlier fix
     )
 
     # We ask the LLM to fix it
-    result = await agent.run("Fix the parameters based on the error.")
+    result = await agent.run("Fix the parameters based on the error.", deps=context)
     decision = result.output
 
     print(f"   > Fix Proposed: {decision.tool_params}")
@@ -3,6 +3,8 @@ import os
 from datetime import datetime
 from typing import Dict, Any
 from db_agent.graph.state import AgentState
+from db_agent.nlp.text_features import message_text
+from db_agent.analytics.hypothesis_ranking import cited_hypotheses
 
 LOG_FILE = "chat_logs.jsonl"
 
@@ -16,7 +18,12 @@ def feedback_logger_node(state: AgentState) -> Dict[str, Any]:
     try:
         # 1. Gather Data
         messages = state["messages"]
-        user_query = messages[0].content if messages else "Unknown"
+        # The latest user turn (messages[0] is the oldest message of the whole thread)
+        user_query = next(
+            (message_text(m) for m in reversed(messages)
+             if getattr(m, "type", None) == "human" or (isinstance(m, (list, tuple)) and m[0] in ("user", "human"))),
+            "Unknown",
+        )
         final_response = messages[-1].content if messages else "Unknown"
         tool_params = state.get("tool_params", {})
         intent = state.get("intent_status", "Unknown")
@@ -26,7 +33,10 @@ def feedback_logger_node(state: AgentState) -> Dict[str, Any]:
             "intent": intent,
             "query": user_query,
             "response": final_response,
-            "tools_used": tool_params
+            "tools_used": tool_params,
+            # Hit-rate history for the diagnostic hypothesis ranking
+            "hypotheses_tested": state.get("tested_hypotheses") or [],
+            "hypotheses_cited": cited_hypotheses(state.get("tested_hypotheses") or [], str(final_response)),
         }
         
         # 2. Append to Log File (JSON Lines format)
@@ -1,8 +1,9 @@
 from typing import Dict, Any, List
 from db_agent.graph.state import AgentState
-from db_agent.client.az_sql import SQLQueryExecutor
+from db_agent.client.az_sql import run_sql_io
+from db_agent.cache.value_index import VALIDATION_MAP, get_value_index
 
-def handle_ambiguity_categorical_node(state: AgentState) -> Dict[str, Any]:
+async def handle_ambiguity_categorical_node(state: AgentState) -> Dict[str, Any]:
     """
     Phase 4: Socratic Helper
     Validates categorical parameters.
@@ -19,47 +20,32 @@ def handle_ambiguity_categorical_node(state: AgentState) -> Dict[str, Any]:
     if not tool_params:
         return {"next_action": "EXECUTE"} 
 
-    validation_map = {
-        "ProjectName": {"Table": "SEMANTIC.COST_PER_PERSON", "Col": "PROJECT_NAME"},
-        "CustomerName": {"Table": "SEMANTIC.COST_PER_PERSON", "Col": "CUSTOMER_NAME"},
-        "Location":    {"Table": "SEMANTIC.COST_PER_PERSON", "Col": "LOCATION"}
-    }
+    index = get_value_index()
+    if index is None or not await run_sql_io(index.ensure_loaded):
+        print("   > Value index unavailable. Skipping validation.")
+        return {"next_action": "EXECUTE", "tool_params": tool_params}
 
+    # Exact / substring / fuzzy resolution against the in-memory distinct values
     issues = []
-    
+    tenant_id = state.get("user_info", {}).get("tenant_id", "")
+
     for param, value in tool_params.items():
-        if param in validation_map and value:
-            table = validation_map[param]["Table"]
-            col = validation_map[param]["Col"]
-            
-            query = f"""
-            SELECT DISTINCT {col} 
-            FROM {table} 
-            WHERE {col} LIKE '%{value}%'
-            """
-            
-            try:
-                with SQLQueryExecutor() as executor:
-                    df = executor.execute_query(query)
-                    matches = df.iloc[:, 0].tolist() if not df.empty else []
-                    
-                    if len(matches) == 0:
-                        issues.append(f"Could not find any '{param}' matching '{value}'.")
-                        
-                    elif len(matches) > 1:
-                        if value not in matches:
-                            options = ", ".join(matches[:5])
-                            issues.append(f"'{value}' is ambiguous. Did you mean: {options}?")
-                        else:
-                            tool_params[param] = value 
+        if param not in VALIDATION_MAP or not value:
+            continue
+        match = index.resolve(tenant_id, param, str(value))
+        if match is None:
+            continue
+
+        if match.status == "missing":
+            issues.append(f"Could not find any '{param}' matching '{value}'.")
 
-                    elif len(matches) == 1:
-                        if value != matches[0]:
-                            print(f"   > Auto-correcting '{value}' -> '{matches[0]}'")
-                            tool_params[param] = matches[0]
+        elif match.status == "ambiguous":
+            options = ", ".join(match.options)
+            issues.append(f"'{value}' is ambiguous. Did you mean: {options}?")
 
-            except Exception as e:
-                print(f"   > Validation Error for {param}: {e}")
+        elif match.value != value:
+            print(f"   > Auto-correcting '{value}' -> '{match.value}' ({match.status})")
+            tool_params[param] = match.value
 
     if issues:
         print(f"   > Ambiguity Detected: {issues}")
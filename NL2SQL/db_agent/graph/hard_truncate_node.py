@@ -1,4 +1,5 @@
 from typing import Dict, Any
+from db_agent.config import RESULT_TRUNCATE_ROWS
 from db_agent.graph.state import AgentState
 
 def hard_truncate_node(state: AgentState) -> Dict[str, Any]:
@@ -9,13 +10,13 @@ def hard_truncate_node(state: AgentState) -> Dict[str, Any]:
     print("--- [Node] Hard Truncate ---")
     
     results = state.get("sql_result", [])
-    limit = 5 # Must match the Negotiator threshold
+    total_rows = state.get("sql_row_count", len(results))
     
-    truncated_results = results[:limit]
+    truncated_results = results[:RESULT_TRUNCATE_ROWS]
     
-    print(f"   > Truncated data from {len(results)} to {len(truncated_results)} rows.")
+    print(f"   > Truncated data from {total_rows} to {len(truncated_results)} rows.")
     
     return {
-        "sql_result": truncated_results,
+        "sql_result": truncated_results,  # sql_row_count keeps the true total: the digest labels this a sample
         "next_action": "ANALYZE" # Now it is safe to go to the Analyzer
     }
\ No newline at end of file
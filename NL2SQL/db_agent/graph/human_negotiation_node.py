@@ -1,5 +1,6 @@
 from typing import Dict, Any
 from langchain_core.messages import AIMessage
+from db_agent.config import RESULT_TRUNCATE_ROWS
 from db_agent.graph.state import AgentState
 
 def human_negotiation_node(state: AgentState) -> Dict[str, Any]:
@@ -9,12 +10,12 @@ def human_negotiation_node(state: AgentState) -> Dict[str, Any]:
     """
     print("--- [Node] Human Negotiation ---")
     
-    row_count = len(state.get("sql_result", []))
+    row_count = state.get("sql_row_count", len(state.get("sql_result", [])))
     
     msg = (
         f"I retrieved {row_count} rows, which is too much data to analyze at once.\n"
         "How would you like to proceed?\n"
-        "1. Analyze the Top 5 only\n"
+        f"1. Analyze the Top {RESULT_TRUNCATE_ROWS} only\n"
         "2. Cancel this step"
     )
     
@@ -1,9 +1,28 @@
 import asyncio
 from typing import Dict, Any, List
-from db_agent.config import CHAT_MODEL_DEPLOYMENT
+from db_agent.config import CHAT_MODEL_DEPLOYMENT, INTENT_LOCAL_THRESHOLD
 from db_agent.graph.state import AgentState
-from db_agent.client.az_llm import build_agent
+from db_agent.client.az_llm import get_agent
 from db_agent.schema.pydantic_models import IntentClassification
+from db_agent.cache.semantic_cache import get_semantic_cache
+from db_agent.nlp.intent_classifier import get_intent_classifier, log_intent_agreement
+
+INTENT_INSTRUCTIONS = """
+    You are an SQL Agent for analyzing SQL data.
+    Classify the user's query into one of these categories:
+
+    1. DESCRIPTIVE: Questions about 'What', 'How much', 'List', 'Show me'.
+       Example: "What is the cost of Project X?", "Show top 5 accounts."
+    
+    2. DIAGNOSTIC: Questions about 'Why', 'Cause', 'Reason', 'Explain'.
+       Example: "Why did cost go up?", "What drives attrition?"
+    
+    3. AMBIGUOUS: The query is vague or lacks context.
+       Example: "It is high.", "Check that."
+
+    4. INVALID: Off-topic queries (Weather, Coding, Jokes).
+       Example: "Write a python script", "Who are you?"
+    """
 
 async def intent_identifier_node(state: AgentState) -> Dict[str, Any]:
     """
@@ -54,41 +73,59 @@ async def intent_identifier_node(state: AgentState) -> Dict[str, Any]:
         "hypotheses_queue": [],      # Clear old hypotheses
         "confirmed_causes": [],      # Clear old findings
         "current_hypothesis": None,  # Clear active focus
+        "tested_hypotheses": [],
+        "hypothesis_scores": {},
+        "explained_share": 0.0,
+        "explained_by_prefix": {},
         "tool_params": {},           # Clear old params
-        "sql_result": []             # Clear old data
+        "sql_result": [],            # Clear old data
+        "sql_row_count": 0,
+        "plan_cache_hit": False
     }
     print("   > New Query Detected. Wiping transient diagnostic state.")
 
-    # 2. Define System Prompt
-    system_prompt = """
-    You are an SQL Agent for analyzing SQL data.
-    Classify the user's query into one of these categories:
+    # 1b. Paraphrase of a question we already planned? Reuse intent + plan, skip both LLM calls
+    semantic_cache = get_semantic_cache()
+    tenant_id = state.get("user_info", {}).get("tenant_id", "")
+    cached = semantic_cache.lookup(user_input, tenant_id) if semantic_cache is not None else None
+    if cached:
+        plan = cached["plan"]
+        print(f"   > Semantic Cache Hit ({cached['score']:.2f}): '{cached['question']}' -> {cached['intent']}")
+        tool_params = dict(plan.get("tool_params") or {})
+        if plan.get("tool_name"):
+            tool_params["tool_name"] = plan["tool_name"]
+        state_reset_updates.update({
+            "intent_status": cached["intent"],
+            "plan_cache_hit": True,
+            "next_action": plan["next_action"],
+            "tool_params": tool_params,
+        })
+        return state_reset_updates
 
-    1. DESCRIPTIVE: Questions about 'What', 'How much', 'List', 'Show me'.
-       Example: "What is the cost of Project X?", "Show top 5 accounts."
-    
-    2. DIAGNOSTIC: Questions about 'Why', 'Cause', 'Reason', 'Explain'.
-       Example: "Why did cost go up?", "What drives attrition?"
-    
-    3. AMBIGUOUS: The query is vague or lacks context.
-       Example: "It is high.", "Check that."
-
-    4. INVALID: Off-topic queries (Weather, Coding, Jokes).
-       Example: "Write a python script", "Who are you?"
-    """
+    # 1c. Local fast path: rules + naive Bayes; the LLM only sees low-confidence turns
+    classifier = get_intent_classifier()
+    local = classifier.predict(user_input) if classifier is not None else None
+    if local and local.confidence >= INTENT_LOCAL_THRESHOLD:
+        print(f"   > Local Intent: {local.category} ({local.source}, confidence {local.confidence:.2f})")
+        state_reset_updates["intent_status"] = local.category
+        return state_reset_updates
 
-    # 3. Build Agent
-    agent = build_agent(
+    # 2. Reusable Agent (prompt is static, see INTENT_INSTRUCTIONS)
+    agent = get_agent(
         output_type_schema=IntentClassification,
-        system_prompt=system_prompt,
+        instructions=INTENT_INSTRUCTIONS,
         model_name=CHAT_MODEL_DEPLOYMENT['reasoning'],
+        memoize=True,  # Repeated questions classify the same way
     )
 
-    # 4. Run Inference
+    # 3. Run Inference
     result = await agent.run(str(user_input))
     response: IntentClassification = result.output
 
     print(f"   > Detected Intent: {response.category} ({response.reasoning})")
+    if local:
+        # Labelled example for the next `python -m db_agent.nlp.intent_classifier` run
+        log_intent_agreement(user_input, local, response.category)
     
     # Merge the Intent status with the Reset updates
     state_reset_updates["intent_status"] = response.category
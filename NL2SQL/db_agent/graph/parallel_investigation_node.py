@@ -0,0 +1,122 @@
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from db_agent.client.az_sql import BoundedResult
+from db_agent.config import (
+    DIAGNOSTIC_MAX_CONCURRENCY, DIAGNOSTIC_BATCH_QUERY, DIAGNOSTIC_EXPLAINED_THRESHOLD,
+    ANALYZER_BATCH_ENABLED, RESULT_CELL_LIMIT, RESULT_TRUNCATE_ROWS,
+)
+from db_agent.graph.state import AgentState
+from db_agent.graph.sp_executor_node import hypothesis_test, fetch_tool_result, batchable_columns, fetch_distributions
+from db_agent.graph.result_analyzer_node import AnalysisItem, analyze_result, analyze_results_batch
+from db_agent.analytics.hypothesis_ranking import hypotheses_to_test, joint_explained
+from db_agent.schema.columnar_result import ColumnarResult
+
+async def _prefetch(hypotheses: List[str], tenant_id: str) -> Dict[str, BoundedResult]:
+    """Distributions of every whitelisted hypothesis from one scan (empty if disabled or failed)."""
+    columns = batchable_columns(hypotheses) if DIAGNOSTIC_BATCH_QUERY else {}
+    if not columns:
+        return {}
+    try:
+        start = time.perf_counter()
+        batch = await fetch_distributions(list(columns), tenant_id)
+        print(f"   > Batched distribution query: {len(batch.results)} columns in one scan "
+              f"({(time.perf_counter() - start) * 1e3:.0f} ms).")
+        return {columns[c]: result for c, result in batch.results.items()}
+    except Exception as e:
+        print(f"   > Batched distribution query failed, testing one by one: {e}")
+        return {}
+
+async def _fetch(hypothesis: str, tenant_id: str, semaphore: asyncio.Semaphore,
+                 prefetched: Optional[BoundedResult] = None) -> Tuple[Optional[AnalysisItem], Optional[Tuple[str, str]]]:
+    """
+    Executor -> (truncate) for one hypothesis. Returns the Analyzer's input, or the
+    finished (finding, UI log line) when there is nothing to analyze.
+    """
+    async with semaphore:
+        tool_name, params = hypothesis_test(hypothesis)
+        try:
+            fetched = prefetched if prefetched is not None else await fetch_tool_result(tool_name, params, tenant_id)
+        except Exception as e:
+            # No per-hypothesis recovery loop here: record it and let the other tests finish
+            print(f"   > [{hypothesis}] Execution Error: {e}")
+            return None, (f"{hypothesis}: Could not be tested ({e}).", f"Executor: Error testing {hypothesis} - {e}")
+
+    if not fetched.rows:
+        msg = f"No data found for {hypothesis}."
+        return None, (msg, f"Analyzer: {msg}")
+
+    # No human negotiation mid fan-out: oversized results get hard_truncate_node's treatment
+    result = ColumnarResult.from_rows(fetched.columns, fetched.rows)
+    if fetched.total_rows * len(fetched.columns) > RESULT_CELL_LIMIT:
+        result = result[:RESULT_TRUNCATE_ROWS]
+    return (hypothesis, {"tool_name": tool_name, **params}, result, fetched.total_rows), None
+
+async def _analyze(items: List[AnalysisItem], semaphore: asyncio.Semaphore) -> Dict[str, str]:
+    if not items:
+        return {}
+    if ANALYZER_BATCH_ENABLED:
+        return await analyze_results_batch(items)
+
+    async def one(item: AnalysisItem) -> str:
+        async with semaphore:
+            return await analyze_result(*item)
+    answers = await asyncio.gather(*(one(item) for item in items))
+    return {item[0]: answer for item, answer in zip(items, answers)}
+
+async def parallel_investigation_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Phase 5: Diagnostic (Fan-out)
+    Tests every queued hypothesis concurrently and joins the findings before the Planner,
+    instead of one Planner -> Executor -> Analyzer loop per hypothesis.
+    """
+    print("--- [Node] Parallel Investigation ---")
+    current_buffer = state.get("stream_buffer", [])
+    queue: List[str] = state.get("hypotheses_queue", [])
+    tenant_id = state.get("user_info", {}).get("tenant_id", "")
+
+    # The queue is ranked: stop where the hypotheses before already explain enough of the variance together
+    cumulative = state.get("explained_by_prefix") or {}
+    already = state.get("explained_share", 0.0) or 0.0
+    hypotheses, skipped = hypotheses_to_test(queue, cumulative, DIAGNOSTIC_EXPLAINED_THRESHOLD, already)
+    explained = joint_explained(hypotheses, cumulative, already)
+    if skipped:
+        print(f"   > Early stop: {hypotheses} explain ~{explained:.0%} jointly. Skipping {skipped}.")
+
+    print(f"   > Testing {len(hypotheses)} hypotheses (max {DIAGNOSTIC_MAX_CONCURRENCY} at a time): {hypotheses}")
+    start = time.perf_counter()
+
+    # One GROUPING SETS scan covers the whitelisted columns; the rest run sp_GetDistribution.
+    # Same column set as causal_discovery_node's estimates, so the result cache answers it.
+    prefetched = await _prefetch(queue, tenant_id)
+
+    semaphore = asyncio.Semaphore(DIAGNOSTIC_MAX_CONCURRENCY)
+    # gather keeps queue order, so findings read the same as the sequential loop's
+    tested = await asyncio.gather(*(_fetch(h, tenant_id, semaphore, prefetched.get(h)) for h in hypotheses))
+    insights = await _analyze([item for item, _ in tested if item is not None], semaphore)
+
+    outcomes = []
+    for item, done in tested:
+        if done is None:
+            hypothesis, insight = item[0], insights[item[0]]
+            print(f"   > [{hypothesis}] Insight: {insight}")
+            done = (f"{hypothesis}: {insight}", f"🔍 Insight found for [{hypothesis}]: {insight}")
+        outcomes.append(done)
+
+    print(f"   > All hypotheses tested in {(time.perf_counter() - start) * 1e3:.0f} ms.")
+
+    existing_causes = state.get("confirmed_causes", []) or []
+    return {
+        "confirmed_causes": existing_causes + [finding for finding, _ in outcomes],
+        "hypotheses_queue": [],
+        "current_hypothesis": None,
+        "tested_hypotheses": (state.get("tested_hypotheses") or []) + hypotheses,
+        "explained_share": explained,
+        "sql_result": [],
+        "sql_row_count": 0,
+        "next_action": "PLAN",
+        "stream_buffer": current_buffer
+            + [f"Diagnostic: Testing {len(hypotheses)} hypotheses in parallel..."]
+            + [log for _, log in outcomes]
+            + ([f"Diagnostic: Skipped {len(skipped)} lower-ranked hypotheses (enough variance explained)."] if skipped else []),
+    }
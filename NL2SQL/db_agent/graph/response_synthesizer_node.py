@@ -2,8 +2,26 @@ from typing import Dict, Any
 from langchain_core.messages import AIMessage
 from db_agent.config import CHAT_MODEL_DEPLOYMENT
 from db_agent.graph.state import AgentState
-from db_agent.client.az_llm import build_agent
+from db_agent.client.az_llm import get_agent
 from db_agent.schema.pydantic_models import ResponseOutput
+from db_agent.nlp.text_features import message_text
+
+SYNTHESIZER_INSTRUCTIONS = """
+    You are Sherlock, an AI Data Analyst.
+    
+    CRITICAL INSTRUCTION: 
+    Use the 'CURRENT SNAPSHOT' below as the ground truth for *what* was analyzed.
+    Ignore any conflicting names or typos in the 'User Query' if they differ from the Snapshot.
+
+    INSTRUCTIONS:
+    1. Answer the user's question using ONLY the Findings.
+    2. If the Snapshot Name differs from the User Query Name, politely clarify: 
+       "I searched for [Snapshot Name] and found..."
+    3. If findings include specific metrics (like Cost or Headcount), mention them explicitly.
+    4. If the user asked for a derived metric (like Cost Per Person) and you have the raw numbers (Total Cost, FTE), CALCULATE IT.
+
+    Generate a helpful, professional response.
+    """
 
 async def response_synthesizer_node(state: AgentState) -> Dict[str, Any]:
     """
@@ -23,15 +41,10 @@ async def response_synthesizer_node(state: AgentState) -> Dict[str, Any]:
     intent = state.get("intent_status")
     
     # 4. Load History (Only for conversational flow, NOT for facts)
-    latest_user_msg = state["messages"][-1]
-
-    system_prompt = f"""
-    You are Sherlock, an AI Data Analyst.
-    
-    CRITICAL INSTRUCTION: 
-    Use the 'CURRENT SNAPSHOT' below as the ground truth for *what* was analyzed.
-    Ignore any conflicting names or typos in the 'User Query' if they differ from the Snapshot.
+    latest_user_msg = message_text(state["messages"][-1])
 
+    # Per-call facts (static answering rules live in SYNTHESIZER_INSTRUCTIONS)
+    context = f"""
     --- CURRENT SNAPSHOT (The Active Context) ---
     Parameters Used: {snapshot}
     (Example: If User asked for 'Project X' but Snapshot says 'Project Y', answer for 'Project Y'.)
@@ -42,24 +55,15 @@ async def response_synthesizer_node(state: AgentState) -> Dict[str, Any]:
     --- USER GOAL ---
     Intent: {intent}
     Original Query: "{latest_user_msg}"
-
-    INSTRUCTIONS:
-    1. Answer the user's question using ONLY the Findings.
-    2. If the Snapshot Name differs from the User Query Name, politely clarify: 
-       "I searched for [Snapshot Name] and found..."
-    3. If findings include specific metrics (like Cost or Headcount), mention them explicitly.
-    4. If the user asked for a derived metric (like Cost Per Person) and you have the raw numbers (Total Cost, FTE), CALCULATE IT.
-
-    Generate a helpful, professional response.
     """
 
-    agent = build_agent(
+    agent = get_agent(
         output_type_schema=ResponseOutput,
-        system_prompt=system_prompt,
+        instructions=SYNTHESIZER_INSTRUCTIONS,
         model_name=CHAT_MODEL_DEPLOYMENT['reasoning'],
     )
 
-    result = await agent.run(latest_user_msg)
+    result = await agent.run(latest_user_msg, deps=context)
     final_text = result.output.final_response
 
     print(f"   > Final Answer: {final_text}")
@@ -1,8 +1,127 @@
-from typing import Dict, Any
-from db_agent.config import CHAT_MODEL_DEPLOYMENT
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+from db_agent.config import CHAT_MODEL_DEPLOYMENT, ANALYZER_BATCH_TOKEN_BUDGET, ANALYZER_CHARS_PER_TOKEN
 from db_agent.graph.state import AgentState
-from db_agent.client.az_llm import build_agent
-from db_agent.schema.pydantic_models import NaturalAnswerOutput 
+from db_agent.client.az_llm import get_agent
+from db_agent.schema.pydantic_models import NaturalAnswerOutput, BatchAnalysisOutput
+from db_agent.analytics.result_summary import summarize_result
+
+ANALYZER_INSTRUCTIONS = """
+    You are a Data Analyst. 
+    Summarize the key finding of the SQL data in the context in 1 sentence.
+    The data comes as a digest whose totals, shares, outliers and changes are already computed: quote them, do not recompute.
+    Figures marked "shown rows" cover a sample only: never present them as overall totals or shares.
+    
+    OUTPUT:
+    Just the insight. Example: "Attrition is 20% higher in India than US."
+    """
+
+BATCH_ANALYZER_INSTRUCTIONS = """
+    You are a Data Analyst.
+    The context holds the SQL data of several hypotheses, one section each.
+    For EVERY section, summarize the key finding of its data in 1 sentence.
+    Each section's data is a digest whose totals, shares, outliers and changes are already computed: quote them, do not recompute.
+    Figures marked "shown rows" cover a sample only: never present them as overall totals or shares.
+    
+    OUTPUT:
+    One entry per hypothesis, with the hypothesis name exactly as given.
+    Example insight: "Attrition is 20% higher in India than US."
+    """
+
+# (hypothesis, tool params, sql result, true row count: sql_result may be a sample)
+AnalysisItem = Tuple[str, Dict[str, Any], Any, Optional[int]]
+
+def _batch_section(item: AnalysisItem) -> str:
+    hypothesis, tool_params, sql_result, total_rows = item
+    return f"""
+    ### Hypothesis: {hypothesis}
+    - Tool Used: {tool_params}
+    - Data Digest:
+    {summarize_result(sql_result, total_rows)}
+    """
+
+def _chunk_by_budget(items: List[AnalysisItem]) -> List[List[AnalysisItem]]:
+    """Greedy packing into chunks whose estimated prompt stays under ANALYZER_BATCH_TOKEN_BUDGET."""
+    budget = ANALYZER_BATCH_TOKEN_BUDGET - len(BATCH_ANALYZER_INSTRUCTIONS) // ANALYZER_CHARS_PER_TOKEN
+    chunks, current, used = [], [], 0
+    for item in items:
+        tokens = len(_batch_section(item)) // ANALYZER_CHARS_PER_TOKEN + 1
+        if current and used + tokens > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(item)  # An item over the budget on its own still gets a call
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def _analyze_chunk(chunk: List[AnalysisItem]) -> Dict[str, str]:
+    agent = get_agent(
+        output_type_schema=BatchAnalysisOutput,
+        instructions=BATCH_ANALYZER_INSTRUCTIONS,
+        model_name=CHAT_MODEL_DEPLOYMENT['reasoning'],
+        memoize=True,
+    )
+    context = "".join(_batch_section(item) for item in chunk)
+    result = await agent.run(f"Analyze these {len(chunk)} hypotheses.", deps=context)
+
+    wanted = {hypothesis.strip().lower(): hypothesis for hypothesis, *_ in chunk}
+    insights = {}
+    for entry in result.output.insights:
+        hypothesis = wanted.get(entry.hypothesis.strip().lower())
+        if hypothesis is not None:
+            insights[hypothesis] = entry.insight
+    return insights
+
+async def analyze_results_batch(items: List[AnalysisItem]) -> Dict[str, str]:
+    """
+    hypothesis -> insight for many (non-empty) results, in one Analyzer call per
+    token-budget chunk instead of one per hypothesis. Hypotheses the model skipped
+    (or a failed chunk) are analyzed one by one.
+    """
+    if len(items) == 1:
+        return {items[0][0]: await analyze_result(*items[0])}
+
+    chunks = _chunk_by_budget(items)
+    print(f"   > Batched analysis: {len(items)} results in {len(chunks)} call(s).")
+    outcomes = await asyncio.gather(*(_analyze_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+    insights: Dict[str, str] = {}
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            print(f"   > Batched analysis call failed: {outcome}")
+            continue
+        insights.update(outcome)
+
+    missing = [item for item in items if item[0] not in insights]
+    if missing:
+        print(f"   > {len(missing)} hypotheses missing from the batched answer. Analyzing individually.")
+        answers = await asyncio.gather(*(analyze_result(*item) for item in missing))
+        insights.update({item[0]: answer for item, answer in zip(missing, answers)})
+    return insights
+
+async def analyze_result(hypothesis: str, tool_params: Dict[str, Any], sql_result,
+                         total_rows: Optional[int] = None) -> str:
+    """One-sentence insight for a (non-empty) SQL result; `total_rows` marks `sql_result` as a sample."""
+    # Per-call data (static role + output rules live in ANALYZER_INSTRUCTIONS)
+    context = f"""
+    Analyze the SQL data below regarding '{hypothesis}'.
+    
+    CONTEXT:
+    - Tool Used: {tool_params}
+    - Data Digest:
+    {summarize_result(sql_result, total_rows)}
+    """
+
+    agent = get_agent(
+        output_type_schema=NaturalAnswerOutput,
+        instructions=ANALYZER_INSTRUCTIONS,
+        model_name=CHAT_MODEL_DEPLOYMENT['reasoning'],
+        memoize=True,  # Identical data, identical insight
+    )
+
+    result = await agent.run("Analyze this.", deps=context)
+    return result.output.answer
 
 async def result_analyzer_node(state: AgentState) -> Dict[str, Any]:
     """
@@ -24,28 +143,7 @@ async def result_analyzer_node(state: AgentState) -> Dict[str, Any]:
             "stream_buffer": current_buffer + [f"Analyzer: {msg}"]
         }
 
-    # System Prompt for Analysis
-    system_prompt = f"""
-    You are a Data Analyst. 
-    Analyze the raw SQL data below regarding '{hypothesis}'.
-    Summarize the key finding in 1 sentence.
-    
-    CONTEXT:
-    - Tool Used: {tool_params}
-    - Raw Data: {str(sql_result)[:2000]} 
-    
-    OUTPUT:
-    Just the insight. Example: "Attrition is 20% higher in India than US."
-    """
-
-    agent = build_agent(
-        output_type_schema=NaturalAnswerOutput,
-        system_prompt=system_prompt,
-        model_name=CHAT_MODEL_DEPLOYMENT['reasoning']
-    )
-
-    result = await agent.run("Analyze this.")
-    insight = result.output.answer
+    insight = await analyze_result(hypothesis, tool_params, sql_result, state.get("sql_row_count"))
 
     print(f"   > Insight: {insight}")
 
@@ -58,5 +156,6 @@ async def result_analyzer_node(state: AgentState) -> Dict[str, Any]:
     return {
         "confirmed_causes": existing_causes + [new_cause],
         "sql_result": [],
+        "sql_row_count": 0,
         "stream_buffer": current_buffer + [log_msg] # <--- Update UI
     }
\ No newline at end of file
@@ -1,8 +1,176 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, NamedTuple, Tuple
+from db_agent.config import (
+    RESULT_CELL_LIMIT, RESULT_TRUNCATE_ROWS,
+    DIAGNOSTIC_BATCH_TABLE, DIAGNOSTIC_BATCH_METRIC, DIAGNOSTIC_BATCH_COLUMNS,
+)
 from db_agent.graph.state import AgentState
-from db_agent.client.az_sql import SQLQueryExecutor
+from db_agent.client.az_sql import SQLQueryExecutor, BoundedResult
+from db_agent.schema.columnar_result import ColumnarResult
+from db_agent.cache.result_cache import get_result_cache
+from db_agent.analytics.hypothesis_ranking import explained_share
 
-def sp_executor_node(state: AgentState) -> Dict[str, Any]:
+HYPOTHESIS_TOP_N = 5
+
+def hypothesis_test(hypothesis: str) -> Tuple[str, Dict[str, Any]]:
+    """Tool + params that test one Knowledge Graph suspect (its value distribution)."""
+    return "sp_GetDistribution", {"ColumnName": hypothesis, "TopN": HYPOTHESIS_TOP_N}
+
+def build_sp_query(tool_name: str, params: Dict[str, Any]) -> str:
+    """EXEC sp_Name @Param='Val', ... ('tool_name' in params is not a SQL parameter)."""
+    param_str_parts = []
+    for k, v in params.items():
+        if k == "tool_name": continue
+        if v is None:
+            param_str_parts.append(f"@{k}=NULL")
+        elif isinstance(v, str):
+            param_str_parts.append(f"@{k}='{v}'")
+        else:
+            param_str_parts.append(f"@{k}={v}")
+    return f"EXEC {tool_name} {', '.join(param_str_parts)}"
+
+async def fetch_tool_result(tool_name: str, params: Dict[str, Any], tenant_id: str) -> BoundedResult:
+    """Runs the procedure through the result cache, keeping a bounded sample of the rows."""
+    sql_query = build_sp_query(tool_name, params)
+    # Enforce the cell budget during the fetch: keep a bounded sample, only count the rest
+    fetch = lambda: SQLQueryExecutor().afetch_bounded(
+        sql_query, RESULT_CELL_LIMIT, min_rows=RESULT_TRUNCATE_ROWS
+    )
+
+    # Same tool + params for the same tenant: reuse (or join) an earlier call
+    result_cache = get_result_cache()
+    if result_cache is not None:
+        return await result_cache.get_or_fetch(tool_name, params, tenant_id, fetch)
+    return await fetch()
+
+def batchable_columns(hypotheses: List[str]) -> Dict[str, str]:
+    """Whitelisted column (upper case) -> hypothesis, for the hypotheses the batched query can test."""
+    allowed = {c.upper() for c in DIAGNOSTIC_BATCH_COLUMNS}
+    return {h.strip().upper(): h for h in hypotheses if h and h.strip().upper() in allowed}
+
+class DistributionBatch(NamedTuple):
+    results: Dict[str, BoundedResult]  # column -> its top values (sp_GetDistribution's shape)
+    explained: Dict[str, float]        # column -> share of the metric's variance its groups explain
+
+def build_distribution_batch_query(columns: List[str], top_n: int = HYPOTHESIS_TOP_N) -> str:
+    """
+    Top `top_n` values of every column from ONE scan of the base table:
+    GROUP BY GROUPING SETS ((c1), (c2), ..., ()) aggregates each column separately,
+    GROUPING() tells the rows apart. The grand total () and the per-group sums also give
+    each column's between-group / total sum of squares. Columns must already be whitelisted.
+    """
+    quoted = [f"[{c}]" for c in columns]
+    metric = f"[{DIAGNOSTIC_BATCH_METRIC}]"
+    dimension = " ".join(f"WHEN GROUPING({q}) = 0 THEN '{c}'" for c, q in zip(columns, quoted))
+    value = " ".join(f"WHEN GROUPING({q}) = 0 THEN CAST({q} AS NVARCHAR(400))" for q in quoted)
+    return f"""
+    WITH grouped AS (
+        SELECT CASE {dimension} END AS Dimension,
+               CASE {value} END AS Value,
+               SUM({metric}) AS TotalMetric,
+               COUNT(*) AS RecordCount,
+               COUNT({metric}) AS MetricCount,
+               SUM(CAST({metric} AS FLOAT) * {metric}) AS MetricSquares
+        FROM {DIAGNOSTIC_BATCH_TABLE}
+        GROUP BY GROUPING SETS ({", ".join(f"({q})" for q in quoted)}, ())
+    ), totals AS (
+        SELECT CAST(TotalMetric AS FLOAT) AS S, CAST(MetricCount AS FLOAT) AS N, MetricSquares AS Q
+        FROM grouped WHERE Dimension IS NULL
+    ), ranked AS (
+        SELECT Dimension, Value, TotalMetric, RecordCount,
+               ROW_NUMBER() OVER (PARTITION BY Dimension ORDER BY RecordCount DESC, Value) AS RowRank,
+               COUNT(*) OVER (PARTITION BY Dimension) AS DistinctValues,
+               SUM(CASE WHEN MetricCount > 0 THEN SQUARE(CAST(TotalMetric AS FLOAT)) / MetricCount ELSE 0 END)
+                   OVER (PARTITION BY Dimension) AS GroupSquares
+        FROM grouped WHERE Dimension IS NOT NULL
+    )
+    SELECT r.Dimension, r.Value, r.TotalMetric, r.RecordCount, r.DistinctValues,
+           r.GroupSquares - t.S * t.S / NULLIF(t.N, 0) AS BetweenSS,
+           t.Q - t.S * t.S / NULLIF(t.N, 0) AS TotalSS,
+           t.N AS MetricCount
+    FROM ranked r CROSS JOIN totals t
+    WHERE r.RowRank <= {int(top_n)}
+    ORDER BY r.Dimension, r.RowRank"""
+
+async def fetch_distributions(columns: List[str], tenant_id: str) -> DistributionBatch:
+    """
+    Per-column distributions (the shape sp_GetDistribution answers one column with)
+    and explained-variance estimates from a single round trip.
+    `columns` must come from batchable_columns().
+    """
+    columns = sorted(set(columns))
+    fetch = lambda: SQLQueryExecutor().afetch_rows(build_distribution_batch_query(columns))
+
+    result_cache = get_result_cache()
+    if result_cache is not None:
+        params = {"Columns": ",".join(columns), "TopN": HYPOTHESIS_TOP_N}
+        fetched = await result_cache.get_or_fetch("distribution_batch", params, tenant_id, fetch)
+    else:
+        fetched = await fetch()
+
+    # Split the stacked result back into one result per column
+    names = ["Value", f"Total{DIAGNOSTIC_BATCH_METRIC.title()}", "RecordCount"]
+    rows: Dict[str, List[tuple]] = {c: [] for c in columns}
+    distinct: Dict[str, int] = {c: 0 for c in columns}
+    explained: Dict[str, float] = {}
+    for dimension, value, metric, count, distinct_values, between_ss, total_ss, n in fetched.rows:
+        rows[dimension].append((value, metric, count))
+        distinct[dimension] = distinct_values
+        explained[dimension] = explained_share(between_ss, total_ss, distinct_values, n)
+    return DistributionBatch({c: BoundedResult(names, rows[c], distinct[c]) for c in columns}, explained)
+
+def build_joint_explained_query(columns: List[str]) -> str:
+    """
+    Between-group / total sum of squares of every prefix of `columns` grouped together,
+    from ONE scan: GROUPING SETS ((c1), (c1, c2), ..., ()). GROUPING_ID() numbers the
+    prefixes (c1..ck -> 2^(m-k) - 1, the grand total -> 2^m - 1); one row comes back
+    per prefix. Columns must already be whitelisted; their order matters.
+    """
+    quoted = [f"[{c}]" for c in columns]
+    metric = f"[{DIAGNOSTIC_BATCH_METRIC}]"
+    prefixes = ", ".join(f"({', '.join(quoted[:k])})" for k in range(1, len(quoted) + 1))
+    total_id = 2 ** len(columns) - 1
+    return f"""
+    WITH grouped AS (
+        SELECT GROUPING_ID({", ".join(quoted)}) AS SetId,
+               CAST(SUM({metric}) AS FLOAT) AS S,
+               CAST(COUNT({metric}) AS FLOAT) AS N,
+               SUM(CAST({metric} AS FLOAT) * {metric}) AS Q
+        FROM {DIAGNOSTIC_BATCH_TABLE}
+        GROUP BY GROUPING SETS ({prefixes}, ())
+    ), totals AS (
+        SELECT S, N, Q FROM grouped WHERE SetId = {total_id}
+    )
+    SELECT g.SetId,
+           SUM(CASE WHEN g.N > 0 THEN g.S * g.S / g.N ELSE 0 END) - MAX(t.S * t.S / NULLIF(t.N, 0)) AS BetweenSS,
+           MAX(t.Q - t.S * t.S / NULLIF(t.N, 0)) AS TotalSS,
+           COUNT(*) AS Groups,
+           MAX(t.N) AS MetricCount
+    FROM grouped g CROSS JOIN totals t
+    WHERE g.SetId <> {total_id}
+    GROUP BY g.SetId"""
+
+async def fetch_joint_explained(columns: List[str], tenant_id: str) -> List[float]:
+    """
+    Share of the metric's variance explained by columns[:1], columns[:2], ... grouped
+    together (epsilon squared), from a single round trip. Unlike a sum of one-way shares,
+    overlapping columns (CITY within LOCATION) are not counted twice.
+    `columns` must come from batchable_columns(), in test order.
+    """
+    fetch = lambda: SQLQueryExecutor().afetch_rows(build_joint_explained_query(columns))
+
+    result_cache = get_result_cache()
+    if result_cache is not None:
+        fetched = await result_cache.get_or_fetch("joint_explained", {"Columns": ",".join(columns)}, tenant_id, fetch)
+    else:
+        fetched = await fetch()
+
+    joint = [0.0] * len(columns)
+    for set_id, between_ss, total_ss, groups, n in fetched.rows:
+        k = len(columns) - (int(set_id) + 1).bit_length() + 1
+        joint[k - 1] = explained_share(between_ss, total_ss, int(groups), n)
+    return joint
+
+async def sp_executor_node(state: AgentState) -> Dict[str, Any]:
     """
     Phase 6: Execution
     Runs the Stored Procedure defined by the Planner.
@@ -20,8 +188,7 @@ def sp_executor_node(state: AgentState) -> Dict[str, Any]:
     
     if next_action == "TEST_HYPOTHESIS" and current_hypothesis:
         # Default Strategy: Check the distribution of the suspect factor
-        tool_name = "sp_GetDistribution"
-        params = {"ColumnName": current_hypothesis, "TopN": 5}
+        tool_name, params = hypothesis_test(current_hypothesis)
         print(f"   > Strategy: Auto-generating test for '{current_hypothesis}'")
     
     elif not tool_name:
@@ -30,46 +197,34 @@ def sp_executor_node(state: AgentState) -> Dict[str, Any]:
 
     print(f"   > Executing: {tool_name} with {params}")
 
-    # 2. Build SQL String (EXEC sp_Name @Param='Val'...)
-    param_str_parts = []
-    # Make a copy to iterate so we don't modify the dict while iterating (if we popped tool_name)
-    # Note: If 'tool_name' is in params, we should skip adding it as a SQL parameter
-    for k, v in params.items():
-        if k == "tool_name": continue 
-        
-        if v is None:
-            param_str_parts.append(f"@{k}=NULL")
-        elif isinstance(v, str):
-            param_str_parts.append(f"@{k}='{v}'")
-        else:
-            param_str_parts.append(f"@{k}={v}")
-    
-    param_str = ", ".join(param_str_parts)
-    sql_query = f"EXEC {tool_name} {param_str}"
-
     # Streaming Update: "Executing..."
     streaming_update = current_buffer + [f"Executor: Running {tool_name}..."]
 
-    # 3. Execute
+    # 2. Execute
     try:
-        with SQLQueryExecutor() as executor:
-            df = executor.execute_query(sql_query)
-            
-            result_list = df.to_dict(orient="records") if not df.empty else []
-            print(f"   > Success! Retrieved {len(result_list)} rows.")
-            
-            return {
-                "sql_result": result_list,
-                "error_message": None, 
-                "next_action": "ANALYZE",
-                "stream_buffer": streaming_update + [f"Executor: Success. Got {len(result_list)} rows."]
-            }
+        tenant_id = state.get("user_info", {}).get("tenant_id", "")
+        fetched = await fetch_tool_result(tool_name, params, tenant_id)
+
+        # Column names once + typed arrays, instead of one dict per row
+        result_list = ColumnarResult.from_rows(fetched.columns, fetched.rows)
+        print(f"   > Success! {fetched.total_rows} rows ({len(result_list)} kept in memory).")
+
+        return {
+            "sql_result": result_list,
+            "sql_row_count": fetched.total_rows,
+            "sql_col_count": len(fetched.columns),
+            "error_message": None, 
+            "next_action": "ANALYZE",
+            "stream_buffer": streaming_update + [f"Executor: Success. Got {fetched.total_rows} rows."]
+        }
 
     except Exception as e:
         error_msg = str(e)
         print(f"   > Execution Error: {error_msg}")
         return {
             "sql_result": [],
+            "sql_row_count": 0,
+            "sql_col_count": 0,
             "error_message": error_msg,
             "next_action": "ERROR",
             "stream_buffer": streaming_update + [f"Executor: Error - {error_msg}"]
@@ -1,51 +1,205 @@
 import json
-from typing import Any, Optional, AsyncIterator, Dict, List, Tuple
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, AsyncIterator, Dict, Iterator, List, NamedTuple, Tuple
 from langchain_core.runnables import RunnableConfig
-from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointMetadata, CheckpointTuple
-from db_agent.client.az_sql import SQLQueryExecutor
+from langgraph.checkpoint.base import (
+    INTERRUPT, WRITES_IDX_MAP, BaseCheckpointSaver, Checkpoint, CheckpointMetadata, CheckpointTuple, copy_checkpoint,
+    get_checkpoint_id,
+)
+from db_agent.client.az_sql import SQLQueryExecutor, run_sql_io
+from db_agent.config import (
+    CHECKPOINT_DELTA_MAX_CHAIN, CHECKPOINT_DELTA_CACHE_SIZE, CHECKPOINT_WRITE_BEHIND, CHECKPOINT_CACHE_VALIDATE,
+)
+from db_agent.schema.columnar_result import ColumnarResult
+from db_agent.graph.checkpoint_serde import CheckpointSerde
+from db_agent.graph.checkpoint_queue import CheckpointWriteError, CheckpointWriteQueue
+from db_agent.graph.checkpoint_cache import CheckpointCache, get_checkpoint_cache
+from db_agent.graph.checkpoint_maintenance import ensure_schema
+
+def _json_object_hook(obj: Dict[str, Any]) -> Any:
+    # Reads legacy NVARCHAR checkpoints that stored SQL results as tagged column payloads
+    if "__columnar__" in obj and len(obj) == 1:
+        return ColumnarResult.from_payload(obj["__columnar__"])
+    return obj
+
+# Zero-length blob marks a channel that was emptied (absent from channel_values)
+_EMPTY_CHANNEL = b""
+
+# base_version NULL = full value; otherwise the blob only holds items appended to base_version
+_INSERT_CHANNEL_BLOB = """
+MERGE INTO agent_checkpoint_blobs WITH (HOLDLOCK) AS Target
+USING (SELECT ? AS thread_id, ? AS channel, ? AS version, ? AS base_version, ? AS blob) AS Source
+ON (Target.thread_id = Source.thread_id AND Target.channel = Source.channel AND Target.version = Source.version)
+WHEN NOT MATCHED THEN
+    INSERT (thread_id, channel, version, base_version, blob)
+    VALUES (Source.thread_id, Source.channel, Source.version, Source.base_version, Source.blob);
+"""
+
+# For every requested (channel, version): all blobs since the latest full snapshot at or
+# before that version, so append-chains are rebuilt in a single round trip.
+_SELECT_CHANNEL_BLOBS = """
+SELECT w.channel AS wanted_channel, w.version AS wanted_version, b.version, b.base_version, b.blob
+FROM OPENJSON(?) WITH (channel NVARCHAR(255) '$.c', version NVARCHAR(255) '$.v') AS w
+CROSS APPLY (
+    SELECT MAX(s.version) AS snapshot_version
+    FROM agent_checkpoint_blobs AS s
+    WHERE s.thread_id = ? AND s.channel = w.channel AND s.version <= w.version AND s.base_version IS NULL
+) AS snap
+JOIN agent_checkpoint_blobs AS b
+  ON b.thread_id = ? AND b.channel = w.channel
+ AND b.version <= w.version AND b.version >= ISNULL(snap.snapshot_version, w.version)
+"""
+
+_INSERT_CHECKPOINT = """
+MERGE INTO agent_checkpoints AS Target
+USING (SELECT ? AS thread_id, ? AS checkpoint_id) AS Source
+ON (Target.thread_id = Source.thread_id AND Target.checkpoint_id = Source.checkpoint_id)
+WHEN NOT MATCHED THEN
+    INSERT (thread_id, checkpoint_id, parent_checkpoint_id, checkpoint_blob, metadata)
+    VALUES (Source.thread_id, Source.checkpoint_id, ?, ?, ?);
+"""
+
+# Session catalog: one row per thread, bumped once per flushed batch
+_UPSERT_SESSION = """
+MERGE INTO agent_sessions WITH (HOLDLOCK) AS Target
+USING (SELECT ? AS thread_id, ? AS last_checkpoint_id, ? AS added) AS Source
+ON (Target.thread_id = Source.thread_id)
+WHEN MATCHED THEN
+    UPDATE SET last_checkpoint_id = CASE WHEN Source.last_checkpoint_id > Target.last_checkpoint_id
+                                         THEN Source.last_checkpoint_id ELSE Target.last_checkpoint_id END,
+               checkpoint_count = Target.checkpoint_count + Source.added,
+               updated_at = GETDATE()
+WHEN NOT MATCHED THEN
+    INSERT (thread_id, last_checkpoint_id, checkpoint_count)
+    VALUES (Source.thread_id, Source.last_checkpoint_id, Source.added);
+"""
+
+_CHECKPOINT_COLUMNS = "thread_id, checkpoint_id, parent_checkpoint_id, checkpoint_blob, checkpoint_data, metadata"
+
+# Regular task writes are first-write-wins (a retried task must not clobber a finished one);
+# special channels (errors, interrupts, resume values) overwrite their fixed slot.
+_INSERT_WRITE = """
+MERGE INTO agent_checkpoint_writes WITH (HOLDLOCK) AS Target
+USING (SELECT ? AS thread_id, ? AS checkpoint_id, ? AS task_id, ? AS idx, ? AS channel, ? AS blob, ? AS task_path) AS Source
+ON (Target.thread_id = Source.thread_id AND Target.checkpoint_id = Source.checkpoint_id
+    AND Target.task_id = Source.task_id AND Target.idx = Source.idx)
+WHEN NOT MATCHED THEN
+    INSERT (thread_id, checkpoint_id, task_id, idx, channel, blob, task_path)
+    VALUES (Source.thread_id, Source.checkpoint_id, Source.task_id, Source.idx, Source.channel, Source.blob, Source.task_path);
+"""
+
+_UPSERT_WRITE = """
+MERGE INTO agent_checkpoint_writes WITH (HOLDLOCK) AS Target
+USING (SELECT ? AS thread_id, ? AS checkpoint_id, ? AS task_id, ? AS idx, ? AS channel, ? AS blob, ? AS task_path) AS Source
+ON (Target.thread_id = Source.thread_id AND Target.checkpoint_id = Source.checkpoint_id
+    AND Target.task_id = Source.task_id AND Target.idx = Source.idx)
+WHEN MATCHED THEN
+    UPDATE SET channel = Source.channel, blob = Source.blob
+WHEN NOT MATCHED THEN
+    INSERT (thread_id, checkpoint_id, task_id, idx, channel, blob, task_path)
+    VALUES (Source.thread_id, Source.checkpoint_id, Source.task_id, Source.idx, Source.channel, Source.blob, Source.task_path);
+"""
+
+_SELECT_WRITES = """
+SELECT checkpoint_id, task_id, channel, blob
+FROM agent_checkpoint_writes
+WHERE thread_id = ? AND checkpoint_id IN (SELECT value FROM OPENJSON(?))
+ORDER BY checkpoint_id, task_id, idx
+"""
+
+class _CheckpointOp(NamedTuple):
+    """One put(): SQL rows plus the in-memory checkpoint (serves reads while queued)."""
+    checkpoint_id: str
+    parent_id: Optional[str]
+    checkpoint: Checkpoint
+    metadata: Dict[str, Any]
+    blob_rows: List[tuple]
+    params: list
+
+class _WritesOp(NamedTuple):
+    """One put_writes(): SQL rows plus (task_id, idx, channel, value) for reads while queued."""
+    checkpoint_id: str
+    upsert: bool
+    rows: List[tuple]
+    writes: List[Tuple[str, int, str, Any]]
 
 class SQLServerSaver(BaseCheckpointSaver):
     """
     Custom LangGraph Checkpointer that saves state to Azure SQL.
     Implements both Sync and Async interfaces.
+    Checkpoints are stored as binary envelopes (see CheckpointSerde) in a VARBINARY column.
+    Channel values are stored separately, one row per (thread_id, channel, version),
+    and only channels that changed in a superstep are written. Growing list channels
+    (messages, stream_buffer, confirmed_causes) are written as append-deltas.
+
+    With write_behind=True, put/put_writes only enqueue and a background flusher
+    writes them in batches; get_tuple reads its own queued writes, and
+    flush()/aflush() force them out (call at graph end).
+
+    The latest checkpoint per thread is also kept in a process-wide LRU
+    (CheckpointCache), so hot sessions resume without a database read.
     """
     
-    def __init__(self, serde=None):
+    def __init__(self,
+                 serde=None,
+                 checkpoint_serde: Optional[CheckpointSerde] = None,
+                 write_behind: bool = CHECKPOINT_WRITE_BEHIND,
+                 cache: Optional[CheckpointCache] = None,
+                 validate_cache: bool = CHECKPOINT_CACHE_VALIDATE,
+                 ):
         super().__init__(serde=serde)
+        # Pluggable binary layer: msgpack (LangGraph serde) + optional zlib/zstd
+        self.checkpoint_serde = checkpoint_serde or CheckpointSerde(self.serde)
+        # (thread_id, channel) -> (version, list value, chain depth) of the last list we wrote
+        self._last_lists: "OrderedDict[Tuple[str, str], Tuple[str, list, int]]" = OrderedDict()
+        self._last_lists_lock = threading.Lock()
+        self.write_queue = CheckpointWriteQueue(self._write_ops, on_dead_letter=self._forget_thread) if write_behind else None
+        self.cache = cache if cache is not None else get_checkpoint_cache()
+        self.validate_cache = validate_cache
 
     # =========================================================
     # SYNCHRONOUS METHODS
     # =========================================================
     def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
-        """Load the latest checkpoint for a given thread."""
+        """Load a checkpoint (the one in config, else the latest) with its pending writes."""
+        in_memory = self._memory_tuple(config, validate=self.validate_cache)
+        if in_memory is not None:
+            return in_memory
+        return self._load_tuple(config)
+
+    def _load_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
         thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = get_checkpoint_id(config)
+
+        if self.write_queue is not None and self.write_queue.pending(thread_id):
+            # Target is already in SQL but some of its writes may not be yet
+            self.write_queue.flush(thread_id)
         
-        query = f"""
-        SELECT TOP 1 checkpoint_data, checkpoint_id, parent_checkpoint_id, metadata
-        FROM agent_checkpoints
-        WHERE thread_id = '{thread_id}'
-        ORDER BY created_at DESC
-        """
+        # Checkpoint ids are time-ordered (uuid6), so the PK (thread_id, checkpoint_id) serves both lookups
+        if checkpoint_id:
+            query = f"SELECT {_CHECKPOINT_COLUMNS} FROM agent_checkpoints WHERE thread_id = ? AND checkpoint_id = ?"
+            params = [thread_id, checkpoint_id]
+        else:
+            query = f"SELECT TOP 1 {_CHECKPOINT_COLUMNS} FROM agent_checkpoints WHERE thread_id = ? ORDER BY checkpoint_id DESC"
+            params = [thread_id]
         
         with SQLQueryExecutor() as executor:
-            df = executor.execute_query(query)
-            
-        if df.empty:
-            return None
+            df = executor.execute_query(query, params=params)
             
-        row = df.iloc[0]
-        
-        # Parse JSON
-        checkpoint = json.loads(row["checkpoint_data"])
-        metadata = json.loads(row["metadata"]) if row["metadata"] else {}
-        parent_id = row["parent_checkpoint_id"]
-        
-        return CheckpointTuple(
-            config=config,
-            checkpoint=checkpoint,
-            metadata=metadata,
-            parent_config={"configurable": {"thread_id": thread_id, "checkpoint_id": parent_id}} if parent_id else None
-        )
+            if df.empty:
+                return None
+                
+            row = df.iloc[0]
+            writes = self._load_pending_writes(executor, thread_id, [row["checkpoint_id"]])
+            result = self._row_to_tuple(executor, row, writes.get(row["checkpoint_id"], []))
+
+        if checkpoint_id is None:
+            self.cache.put(thread_id, result)
+            # Hand out a copy: LangGraph mutates the checkpoint it resumes from
+            result = result._replace(checkpoint=copy_checkpoint(result.checkpoint))
+        return result
 
     def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: dict) -> RunnableConfig:
         """Save the current state to SQL."""
@@ -53,24 +207,32 @@ class SQLServerSaver(BaseCheckpointSaver):
         checkpoint_id = checkpoint["id"]
         parent_id = config["configurable"].get("checkpoint_id")
         
-        # Serialize
-        data_str = json.dumps(checkpoint, default=str).replace("'", "''") 
-        meta_str = json.dumps(metadata, default=str).replace("'", "''")
-        
-        # MERGE / UPSERT Query
-        query = f"""
-        MERGE INTO agent_checkpoints AS Target
-        USING (SELECT '{thread_id}' AS thread_id, '{checkpoint_id}' AS checkpoint_id) AS Source
-        ON (Target.thread_id = Source.thread_id AND Target.checkpoint_id = Source.checkpoint_id)
-        WHEN NOT MATCHED THEN
-            INSERT (thread_id, checkpoint_id, parent_checkpoint_id, checkpoint_data, metadata)
-            VALUES ('{thread_id}', '{checkpoint_id}', 
-                    {'NULL' if not parent_id else f"'{parent_id}'"}, 
-                    '{data_str}', '{meta_str}');
-        """
-        
-        with SQLQueryExecutor() as executor:
-            executor.execute_query(query, fetch=False)
+        # Split: channel values go to their own table, and only for channels in new_versions
+        skeleton = {k: v for k, v in checkpoint.items() if k != "channel_values"}
+        channel_values = checkpoint.get("channel_values", {})
+        blob_rows = [
+            self._channel_blob_row(thread_id, channel, str(version), channel_values)
+            for channel, version in new_versions.items()
+        ]
+
+        # Serialize (metadata stays JSON so it can be filtered in SQL)
+        data_blob = self.checkpoint_serde.dumps(skeleton)
+        meta_str = json.dumps(metadata, default=str)
+
+        op = _CheckpointOp(checkpoint_id, parent_id, checkpoint, json.loads(meta_str), blob_rows,
+                           [thread_id, checkpoint_id, parent_id, data_blob, meta_str])
+        if self.write_queue is not None:
+            try:
+                self.write_queue.submit(thread_id, op)
+            except CheckpointWriteError:
+                # This op may already be a delta against a dropped write: its versions must not be a base either
+                self._forget_thread(thread_id)
+                raise
+        else:
+            self._write_ops([op])
+
+        # The next run on this thread resumes from here without a database read
+        self.cache.put(thread_id, self._op_to_tuple(thread_id, op, []))
             
         return {
             "configurable": {
@@ -79,29 +241,370 @@ class SQLServerSaver(BaseCheckpointSaver):
             }
         }
 
-    def put_writes(self, config: RunnableConfig, writes: List[Tuple[str, Any]], task_id: str) -> None:
-        """Store intermediate writes. (Not used in this MVP, but required by interface)."""
-        pass
+    def get_next_version(self, current: Optional[Any], channel: None = None) -> str:
+        """Zero-padded string versions: monotonic and sortable as text in SQL."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(str(current).split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def _channel_blob_row(self, thread_id: str, channel: str, version: str, channel_values: Dict[str, Any]) -> tuple:
+        """(thread_id, channel, version, base_version, blob) for one changed channel."""
+        if channel not in channel_values:
+            return (thread_id, channel, version, None, _EMPTY_CHANNEL)
+
+        value = channel_values[channel]
+        if not isinstance(value, list):
+            return (thread_id, channel, version, None, self.checkpoint_serde.dumps(value))
+
+        key = (thread_id, channel)
+        with self._last_lists_lock:
+            previous = self._last_lists.get(key)
+
+        base_version, tail, depth = None, value, 0
+        if previous is not None:
+            prev_version, prev_value, prev_depth = previous
+            # Append-only growth (operator.add reducers): store just the new items
+            if (prev_version < version and prev_depth < CHECKPOINT_DELTA_MAX_CHAIN
+                    and len(value) >= len(prev_value) and value[:len(prev_value)] == prev_value):
+                base_version, tail, depth = prev_version, value[len(prev_value):], prev_depth + 1
+
+        with self._last_lists_lock:
+            self._last_lists[key] = (version, list(value), depth)
+            self._last_lists.move_to_end(key)
+            while len(self._last_lists) > CHECKPOINT_DELTA_CACHE_SIZE:
+                self._last_lists.popitem(last=False)
+
+        return (thread_id, channel, version, base_version, self.checkpoint_serde.dumps(tail))
+
+    def _forget_thread(self, thread_id: str) -> None:
+        """
+        Queued writes of the thread were dropped (dead-lettered): the next put writes full
+        list snapshots instead of deltas against them, and reads go back to SQL.
+        """
+        with self._last_lists_lock:
+            for key in [k for k in self._last_lists if k[0] == thread_id]:
+                del self._last_lists[key]
+        self.cache.invalidate(thread_id)
+
+    def _load_channel_values(self, executor: SQLQueryExecutor, thread_id: str, channel_versions: Dict[str, Any]) -> Dict[str, Any]:
+        if not channel_versions:
+            return {}
+        wanted = json.dumps([{"c": c, "v": str(v)} for c, v in channel_versions.items()])
+        df = executor.execute_query(_SELECT_CHANNEL_BLOBS, params=[wanted, thread_id, thread_id])
+
+        # channel -> {version: (base_version, blob)}
+        candidates: Dict[str, Dict[str, Tuple[Optional[str], bytes]]] = {}
+        for row in df.itertuples(index=False):
+            base_version = row.base_version if isinstance(row.base_version, str) else None  # NULL may surface as NaN
+            candidates.setdefault(row.wanted_channel, {})[row.version] = (base_version, row.blob)
+
+        values = {}
+        for channel, version in channel_versions.items():
+            blobs = candidates.get(channel, {})
+            # Walk base pointers back to the full snapshot, then replay the appends
+            chain, current = [], str(version)
+            while current is not None:
+                if current not in blobs:
+                    blobs[current] = self._fetch_channel_blob(executor, thread_id, channel, current)
+                base_version, blob = blobs[current]
+                chain.append(blob)
+                current = base_version
+
+            if len(chain[-1]) == 0:
+                continue  # empty blob = channel had no value at that version
+            value = self.checkpoint_serde.loads(chain[-1])
+            for delta in reversed(chain[:-1]):
+                value = value + self.checkpoint_serde.loads(delta)
+            values[channel] = value
+        return values
+
+    @staticmethod
+    def _fetch_channel_blob(executor: SQLQueryExecutor, thread_id: str, channel: str, version: str) -> Tuple[Optional[str], bytes]:
+        # Rare path: a delta whose base lies outside the snapshot window (e.g. a forked thread)
+        df = executor.execute_query(
+            "SELECT base_version, blob FROM agent_checkpoint_blobs WHERE thread_id = ? AND channel = ? AND version = ?",
+            params=[thread_id, channel, version],
+        )
+        if df.empty:
+            raise KeyError(f"Missing checkpoint blob for {thread_id}/{channel}@{version}")
+        base_version = df.iloc[0]["base_version"]
+        return (base_version if isinstance(base_version, str) else None), df.iloc[0]["blob"]
+
+    def put_writes(self, config: RunnableConfig, writes: List[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        """
+        Store the writes of a finished task against the current checkpoint.
+        On resume they come back as pending_writes, so completed tasks in an
+        interrupted superstep are not re-run.
+        """
+        if not writes:
+            return
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        # Special channels (error/interrupt/resume) have fixed negative slots and replace earlier values
+        upsert = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        indexed = [(task_id, WRITES_IDX_MAP.get(channel, idx), channel, value) for idx, (channel, value) in enumerate(writes)]
+        rows = [
+            (thread_id, checkpoint_id, task_id, idx, channel, self.checkpoint_serde.dumps(value), task_path)
+            for task_id, idx, channel, value in indexed
+        ]
+        op = _WritesOp(checkpoint_id, upsert, rows, indexed)
+        # Cached tuple would miss these pending writes; the next read reassembles them
+        self.cache.invalidate(thread_id, checkpoint_id)
+
+        if self.write_queue is None:
+            self._write_ops([op])
+            return
+        self.write_queue.submit(thread_id, op)
+        # The run is pausing for a human: the state must be durable before we return
+        if any(channel == INTERRUPT for channel, _ in writes):
+            self.write_queue.flush(thread_id)
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None, before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        """
+        Checkpoints newest first, optionally scoped to a thread / checkpoint.
+        `filter` matches top-level metadata keys (scalars via JSON_VALUE in SQL),
+        `before` keeps checkpoints older than the given one.
+        """
+        if self.write_queue is not None:
+            self.write_queue.flush(config["configurable"]["thread_id"] if config else None)
+
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+
+        # Scalars are pushed down to SQL; lists/dicts/None are matched after decoding
+        post_filter = {}
+        for key, value in (filter or {}).items():
+            if isinstance(value, (str, int, float, bool)):
+                clauses.append("JSON_VALUE(metadata, ?) = ?")
+                params.extend([_json_path(key), value if isinstance(value, str) else json.dumps(value)])
+            else:
+                post_filter[key] = value
+
+        top = f"TOP ({int(limit)}) " if limit is not None and not post_filter else ""
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT {top}{_CHECKPOINT_COLUMNS} FROM agent_checkpoints {where} ORDER BY thread_id, checkpoint_id DESC"
+
+        results = []
+        with SQLQueryExecutor() as executor:
+            df = executor.execute_query(query, params=params)
+            if df is None or df.empty:
+                return
+
+            rows = [row for _, row in df.iterrows()]
+            if post_filter:
+                rows = [row for row in rows
+                        if all(_metadata(row).get(k) == v for k, v in post_filter.items())][:limit]
+
+            # One round trip for the pending writes of every listed checkpoint, per thread
+            writes: Dict[Tuple[str, str], list] = {}
+            for thread_id in dict.fromkeys(row["thread_id"] for row in rows):
+                ids = [row["checkpoint_id"] for row in rows if row["thread_id"] == thread_id]
+                for cid, items in self._load_pending_writes(executor, thread_id, ids).items():
+                    writes[(thread_id, cid)] = items
+
+            for row in rows:
+                results.append(self._row_to_tuple(executor, row, writes.get((row["thread_id"], row["checkpoint_id"]), [])))
+        yield from results
+
+    def setup(self) -> None:
+        """Creates / migrates the checkpoint tables and session catalog (once per process)."""
+        ensure_schema()
+
+    def flush(self, thread_id: Optional[str] = None) -> None:
+        """Write out queued checkpoints now (no-op without write-behind)."""
+        if self.write_queue is not None:
+            self.write_queue.flush(thread_id)
+
+    def close(self) -> None:
+        """Flush and stop the background flusher."""
+        if self.write_queue is not None:
+            self.write_queue.close()
+
+    def _write_ops(self, ops: List[Any]) -> None:
+        """
+        Persists queued puts/writes in order, one executemany per statement, all in one
+        transaction: a failed batch leaves no orphan blobs and a retry never counts a
+        checkpoint twice in agent_sessions.
+        """
+        blob_rows, checkpoint_rows, insert_rows, upsert_rows = [], [], [], []
+        sessions: Dict[str, Tuple[str, int]] = {}
+        for op in ops:
+            if isinstance(op, _CheckpointOp):
+                blob_rows.extend(op.blob_rows)
+                checkpoint_rows.append(op.params)
+                thread_id = op.params[0]
+                latest, added = sessions.get(thread_id, (op.checkpoint_id, 0))
+                sessions[thread_id] = (max(latest, op.checkpoint_id), added + 1)
+            else:
+                (upsert_rows if op.upsert else insert_rows).extend(op.rows)
+
+        with SQLQueryExecutor() as executor:
+            # Blobs first: a checkpoint row never references channel versions that are missing
+            executor.execute_many(_INSERT_CHANNEL_BLOB, blob_rows, commit=False)
+            executor.execute_many(_INSERT_CHECKPOINT, checkpoint_rows, commit=False)
+            executor.execute_many(_INSERT_WRITE, insert_rows, commit=False)
+            executor.execute_many(_UPSERT_WRITE, upsert_rows, commit=False)
+            executor.execute_many(_UPSERT_SESSION, [(t, latest, added) for t, (latest, added) in sessions.items()],
+                                  commit=False)
+            executor.commit()
+
+    def _queued_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Read-your-writes: the requested (or latest) checkpoint if it has not been flushed yet."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = get_checkpoint_id(config)
+        ops = self.write_queue.pending(thread_id)
+
+        target = next((op for op in reversed(ops) if isinstance(op, _CheckpointOp)
+                       and checkpoint_id in (None, op.checkpoint_id)), None)
+        if target is None:
+            return None
+
+        # Its writes were queued after it, so none of them can have been flushed yet
+        writes: Dict[Tuple[str, int], Tuple[str, str, Any]] = {}
+        for op in ops:
+            if isinstance(op, _WritesOp) and op.checkpoint_id == target.checkpoint_id:
+                for task_id, idx, channel, value in op.writes:
+                    if op.upsert or (task_id, idx) not in writes:
+                        writes[(task_id, idx)] = (task_id, channel, value)
+
+        queued = self._op_to_tuple(thread_id, target, [writes[key] for key in sorted(writes)])
+        return queued._replace(checkpoint=copy_checkpoint(target.checkpoint))
+
+    @staticmethod
+    def _op_to_tuple(thread_id: str, op: _CheckpointOp, pending_writes: list) -> CheckpointTuple:
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": "", "checkpoint_id": op.checkpoint_id}},
+            checkpoint=op.checkpoint,
+            metadata=op.metadata,
+            parent_config={"configurable": {"thread_id": thread_id, "checkpoint_ns": "", "checkpoint_id": op.parent_id}} if op.parent_id else None,
+            pending_writes=pending_writes,
+        )
+
+    def _memory_tuple(self, config: RunnableConfig, validate: bool) -> Optional[CheckpointTuple]:
+        """Queued (write-behind) checkpoint first, then the LRU cache; None means go to SQL."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_id = get_checkpoint_id(config)
+
+        if self.write_queue is not None and self.write_queue.pending(thread_id):
+            queued = self._queued_tuple(config)
+            if queued is not None:
+                return queued
+
+        cached = self.cache.get(thread_id, checkpoint_id)
+        if cached is None or not validate or checkpoint_id is not None:
+            return cached
+
+        # Another process may have advanced the thread: PK seek on ids only, no blob decoding
+        with SQLQueryExecutor() as executor:
+            df = executor.execute_query(
+                "SELECT TOP 1 checkpoint_id FROM agent_checkpoints WHERE thread_id = ? ORDER BY checkpoint_id DESC",
+                params=[thread_id],
+            )
+        if not df.empty and df.iloc[0]["checkpoint_id"] > cached.config["configurable"]["checkpoint_id"]:
+            self.cache.mark_stale(thread_id)
+            return None
+        return cached
 
-    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None, before: Optional[RunnableConfig] = None, limit: Optional[int] = None):
-        """Not implemented for MVP."""
-        return []
+    def _row_to_tuple(self, executor: SQLQueryExecutor, row, pending_writes: list) -> CheckpointTuple:
+        thread_id = row["thread_id"]
+
+        # Decode only the selected row; decompression happens only if the envelope says so
+        if row["checkpoint_blob"] is not None:
+            checkpoint = self.checkpoint_serde.loads(row["checkpoint_blob"])
+        else:
+            # Legacy rows written before the binary format
+            checkpoint = json.loads(row["checkpoint_data"], object_hook=_json_object_hook)
+
+        # Delta rows: reassemble channel_values from the per-channel table
+        if "channel_values" not in checkpoint:
+            checkpoint["channel_values"] = self._load_channel_values(
+                executor, thread_id, checkpoint.get("channel_versions", {})
+            )
+        parent_id = row["parent_checkpoint_id"]
+        parent_id = parent_id if isinstance(parent_id, str) else None  # NULL may surface as NaN
+
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": "", "checkpoint_id": row["checkpoint_id"]}},
+            checkpoint=checkpoint,
+            metadata=_metadata(row),
+            parent_config={"configurable": {"thread_id": thread_id, "checkpoint_ns": "", "checkpoint_id": parent_id}} if parent_id else None,
+            pending_writes=pending_writes,
+        )
+
+    def _load_pending_writes(self, executor: SQLQueryExecutor, thread_id: str, checkpoint_ids: List[str]) -> Dict[str, list]:
+        """checkpoint_id -> [(task_id, channel, value)] in write order."""
+        if not checkpoint_ids:
+            return {}
+        df = executor.execute_query(_SELECT_WRITES, params=[thread_id, json.dumps(list(checkpoint_ids))])
+        writes: Dict[str, list] = {}
+        if df is None or df.empty:
+            return writes
+        for row in df.itertuples(index=False):
+            writes.setdefault(row.checkpoint_id, []).append(
+                (row.task_id, row.channel, self.checkpoint_serde.loads(row.blob))
+            )
+        return writes
 
     # =========================================================
     # ASYNCHRONOUS METHODS (Required for app.ainvoke)
+    # Offloaded to the dedicated SQL threads so DB latency never blocks the event loop.
     # =========================================================
     async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
         """Async wrapper for get_tuple"""
-        return self.get_tuple(config)
+        if self.validate_cache:
+            return await run_sql_io(self.get_tuple, config)
+        # Queued / cached checkpoints are served from memory without a thread hop
+        in_memory = self._memory_tuple(config, validate=False)
+        if in_memory is not None:
+            return in_memory
+        return await run_sql_io(self._load_tuple, config)
 
     async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: dict) -> RunnableConfig:
         """Async wrapper for put"""
-        return self.put(config, checkpoint, metadata, new_versions)
+        # Enqueueing is in-memory; only a full queue (synchronous flush) needs the SQL threads
+        if self.write_queue is not None and not self.write_queue.is_full():
+            return self.put(config, checkpoint, metadata, new_versions)
+        return await run_sql_io(self.put, config, checkpoint, metadata, new_versions)
 
-    async def aput_writes(self, config: RunnableConfig, writes: List[Tuple[str, Any]], task_id: str) -> None:
+    async def aput_writes(self, config: RunnableConfig, writes: List[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
         """Async wrapper for put_writes"""
-        return self.put_writes(config, writes, task_id)
+        if (self.write_queue is not None and not self.write_queue.is_full()
+                and not any(channel == INTERRUPT for channel, _ in writes)):
+            return self.put_writes(config, writes, task_id, task_path)
+        return await run_sql_io(self.put_writes, config, writes, task_id, task_path)
+
+    async def aflush(self, thread_id: Optional[str] = None) -> None:
+        """Async wrapper for flush"""
+        if self.write_queue is not None:
+            await run_sql_io(self.write_queue.flush, thread_id)
 
     async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None, before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
         """Async wrapper for list"""
-        if False: yield
\ No newline at end of file
+        tuples = await run_sql_io(lambda: [*self.list(config, filter=filter, before=before, limit=limit)])
+        for item in tuples:
+            yield item
+
+
+# -------------------------------------------------------------------------
+# HELPERS
+# -------------------------------------------------------------------------
+def _metadata(row) -> Dict[str, Any]:
+    return json.loads(row["metadata"]) if row["metadata"] else {}
+
+
+def _json_path(key: str) -> str:
+    # Quoted member name, so keys like "run-id" are valid JSON paths
+    return '$."' + key.replace('"', '\\"') + '"'
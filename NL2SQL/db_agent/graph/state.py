@@ -1,4 +1,5 @@
-from typing import TypedDict, List, Dict, Any, Optional
+from typing import TypedDict, List, Dict, Any, Optional, Union
+from db_agent.schema.columnar_result import ColumnarResult
 
 class AgentState(TypedDict):
     """
@@ -11,10 +12,13 @@ class AgentState(TypedDict):
     intent_status: str           # "VALID", "INVALID", "DIAGNOSTIC", "DESCRIPTIVE" [cite: 72]
     next_action: str             # "GET_STATS", "QUERY_KG", "EXECUTE", "FINALIZE" [cite: 73]
     plan_cache_hit: bool         # Optimization: Did we skip planning? [cite: 71]
+    plan_cache_key: Optional[str] # Key the Planner stores its decision under (set on a cache miss)
 
     # --- 2. EXECUTION STATE (The "Hands") ---
     tool_params: Dict[str, Any]      # Active Stored Procedure parameters [cite: 76]
-    sql_result: Optional[List[Dict]] # Raw data returned from DB [cite: 77]
+    sql_result: Optional[Union[ColumnarResult, List[Dict]]] # Raw data returned from DB (columnar) [cite: 77]
+    sql_row_count: int               # True row count of the last result (sql_result may be a sample)
+    sql_col_count: int               # Column count of the last result
     error_type: Optional[str]        # "TIMEOUT", "SYNTAX", etc. [cite: 81]
     
     # Negotiation State (Handling large data)
@@ -25,6 +29,10 @@ class AgentState(TypedDict):
     hypotheses_queue: List[str]  # List of "Suspects" from Knowledge Graph [cite: 85]
     confirmed_causes: List[str]  # Validated findings [cite: 86]
     current_hypothesis: str      # The factor currently being tested [cite: 87]
+    tested_hypotheses: List[str]         # Hypotheses tested this turn (logged for the ranking's hit rates)
+    hypothesis_scores: Dict[str, float]  # Estimated share of the metric's variance per hypothesis
+    explained_share: float               # Joint variance share of the hypotheses tested so far (early stop)
+    explained_by_prefix: Dict[str, float]  # Joint variance share of the ranked queue up to each hypothesis
 
     # --- 4. SAFETY & UX ---
     loop_count: int              # Circuit Breaker: Current iterations [cite: 89]
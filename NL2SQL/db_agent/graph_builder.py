@@ -20,6 +20,8 @@ from db_agent.graph.error_recovery_node import error_recovery_node
 from db_agent.graph.causal_discovery_node import causal_discovery_node
 from db_agent.graph.investigation_approval_node import investigation_approval_node 
 from db_agent.graph.result_analyzer_node import result_analyzer_node
+from db_agent.graph.parallel_investigation_node import parallel_investigation_node
+from db_agent.graph.driver_analysis_node import driver_analysis_node
 # Phase 6: Presentation
 from db_agent.graph.data_negotiator_node import data_negotiator_node
 from db_agent.graph.human_negotiation_node import human_negotiation_node
@@ -30,6 +32,8 @@ from db_agent.graph.refusal_responder_node import refusal_responder_node
 from db_agent.graph.feedback_logger_node import feedback_logger_node
 # Phase 8: Utilities
 from db_agent.graph.sql_checkpointer import SQLServerSaver
+from db_agent.client.az_llm import close_shared_models
+from db_agent.cache.value_index import get_value_index
 
 # =============================================================================
 # 2. ROUTING LOGIC
@@ -40,7 +44,8 @@ def route_intent(state: AgentState):
     return "cache_lookup_node"
 
 def route_cache(state: AgentState):
-    if state.get("plan_cache_hit"): return END 
+    # Cached plan: continue exactly where the Planner would have sent us
+    if state.get("plan_cache_hit"): return route_planner(state)
     return "agent_planner_node"
 
 def route_planner(state: AgentState):
@@ -50,6 +55,8 @@ def route_planner(state: AgentState):
     if action == "QUERY_KG": return "causal_discovery_node"
     # -----------------------------------------------------------------------
     
+    if action == "ANALYZE_DRIVERS": return "driver_analysis_node"
+    if action == "INVESTIGATE_ALL": return "parallel_investigation_node"
     if action == "TEST_HYPOTHESIS": return "handle_ambiguity_continuous_node"
     if action == "EXECUTE": return "handle_ambiguity_continuous_node"
     if action == "FINALIZE": return "response_synthesizer_node"
@@ -62,6 +69,11 @@ def route_approval(state: AgentState):
         return END 
     return "agent_planner_node" # <--- Changed from causal_discovery to planner
 
+def route_drivers(state: AgentState):
+    # Suspects the driver slice could not cover (or a failed slice) are tested one by one
+    if state.get("next_action") == "INVESTIGATE_ALL": return "parallel_investigation_node"
+    return "agent_planner_node"
+
 def route_ambiguity(state: AgentState):
     action = state.get("next_action")
     if action == "CLARIFY": return "human_clarification_node"
@@ -92,6 +104,8 @@ def build_graph():
     workflow.add_node("investigation_approval_node", investigation_approval_node)
     workflow.add_node("causal_discovery_node", causal_discovery_node)
     workflow.add_node("result_analyzer_node", result_analyzer_node)
+    workflow.add_node("parallel_investigation_node", parallel_investigation_node)
+    workflow.add_node("driver_analysis_node", driver_analysis_node)
     workflow.add_node("handle_ambiguity_continuous_node", handle_ambiguity_continuous_node)
     workflow.add_node("handle_ambiguity_categorical_node", handle_ambiguity_categorical_node)
     workflow.add_node("human_clarification_node", human_clarification_node)
@@ -114,12 +128,23 @@ def build_graph():
 
     # 2. Planning
     workflow.add_conditional_edges("cache_lookup_node", route_cache, 
-        {"agent_planner_node": "agent_planner_node", END: END})
+        {
+            "agent_planner_node": "agent_planner_node",
+            "causal_discovery_node": "causal_discovery_node",
+            "parallel_investigation_node": "parallel_investigation_node",
+            "driver_analysis_node": "driver_analysis_node",
+            "handle_ambiguity_continuous_node": "handle_ambiguity_continuous_node",
+            "response_synthesizer_node": "response_synthesizer_node",
+            END: END
+        }
+    )
 
     # 3. Planner Routing
     workflow.add_conditional_edges("agent_planner_node", route_planner, 
         {
             "causal_discovery_node": "causal_discovery_node", # <--- Direct link
+            "parallel_investigation_node": "parallel_investigation_node",
+            "driver_analysis_node": "driver_analysis_node",
             "handle_ambiguity_continuous_node": "handle_ambiguity_continuous_node",
             "response_synthesizer_node": "response_synthesizer_node",
             END: END
@@ -152,6 +177,10 @@ def build_graph():
     
     # 8. Loop Back (Analysis -> Planner)
     workflow.add_edge("result_analyzer_node", "agent_planner_node")
+    # Parallel mode: all hypotheses joined in one step, the Planner then finalizes
+    workflow.add_edge("parallel_investigation_node", "agent_planner_node")
+    workflow.add_conditional_edges("driver_analysis_node", route_drivers,
+        {"parallel_investigation_node": "parallel_investigation_node", "agent_planner_node": "agent_planner_node"})
 
     # 9. Finalization
     workflow.add_edge("response_synthesizer_node", "feedback_logger_node")
@@ -167,6 +196,11 @@ async def main():
     
     # 1. Initialize SQL Saver (Persistence)
     checkpointer = SQLServerSaver()
+    checkpointer.setup()
+
+    # Categorical value index: loads in the background, refreshes on data changes
+    if get_value_index() is not None:
+        get_value_index().start()
 
     # 2. Compile Graph WITH Saver
     workflow = build_graph()
@@ -194,6 +228,8 @@ async def main():
 
         # The app will now check SQL for 'session_user_1' state automatically!
         result = await app.ainvoke(inputs, config=config, recursion_limit=10000)
+        # Graph end: queued (write-behind) checkpoints must be durable before the next turn
+        await checkpointer.aflush(thread_id)
         
         if result.get("messages"):
             resp = result["messages"][-1].content
@@ -207,5 +243,9 @@ async def main():
                 print(f"\nSherlock: {resp}")
                 chat_history.append(("assistant", resp))
 
+    # Stop the background flusher (writes anything still queued)
+    checkpointer.close()
+    await close_shared_models()
+
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
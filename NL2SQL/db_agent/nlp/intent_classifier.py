@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from db_agent.config import (
+    INTENT_LOCAL_ENABLED, INTENT_MODEL_PATH, INTENT_AGREEMENT_LOG, INTENT_TRAINING_LOGS,
+)
+from db_agent.nlp.text_features import normalize_text, stem
+
+CATEGORIES = ("DESCRIPTIVE", "DIAGNOSTIC", "AMBIGUOUS", "INVALID")
+
+# Bootstrap examples (mirrors the LLM prompt), so the model works before any logs exist
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("What is the cost of Project X?", "DESCRIPTIVE"),
+    ("Show top 5 accounts.", "DESCRIPTIVE"),
+    ("How much did we spend on AI Agent Deployment?", "DESCRIPTIVE"),
+    ("List all projects for customer Optum", "DESCRIPTIVE"),
+    ("Show me headcount by location", "DESCRIPTIVE"),
+    ("What is the FTE count for SYF EXT BUILD SETPAY", "DESCRIPTIVE"),
+    ("Give me the total cost per person for Atlas", "DESCRIPTIVE"),
+    ("How many employees work on Project Zeus?", "DESCRIPTIVE"),
+    ("Why did cost go up?", "DIAGNOSTIC"),
+    ("What drives attrition?", "DIAGNOSTIC"),
+    ("Why is the cost per head so high for Atlas?", "DIAGNOSTIC"),
+    ("What is the reason for the increase in FTE cost?", "DIAGNOSTIC"),
+    ("Explain the cost variance for AI Agent Deployment", "DIAGNOSTIC"),
+    ("What caused the spike in headcount last month?", "DIAGNOSTIC"),
+    ("It is high.", "AMBIGUOUS"),
+    ("Check that.", "AMBIGUOUS"),
+    ("What about the other one?", "AMBIGUOUS"),
+    ("Is it ok?", "AMBIGUOUS"),
+    ("Hmm, and that?", "AMBIGUOUS"),
+    ("Write a python script", "INVALID"),
+    ("Who are you?", "INVALID"),
+    ("What is the weather today?", "INVALID"),
+    ("Tell me a joke", "INVALID"),
+    ("Write a poem about the ocean", "INVALID"),
+]
+
+# Compiled rules: (category, confidence, pattern). First stage, checked before the model.
+_RULES = [
+    ("DIAGNOSTIC", 0.95, re.compile(
+        r"\b(why|root cause|caus(e|ed|es|ing)|reasons?|explain\w*|driv(e|es|ing|ers?)|what'?s behind|attribut\w+ to)\b")),
+    ("INVALID", 0.9, re.compile(
+        r"\b(weather|jokes?|poems?|recipes?|who are you|(write|generate) (a |some )?(python|code|script|program)\w*|"
+        r"translate|song|lyrics)\b")),
+    ("DESCRIPTIVE", 0.9, re.compile(
+        r"^(what (is|are|was|were)|how (much|many)|list|show|give me|top \d+|total|count)\b.*\b"
+        r"(cost|spend|fte|headcount|head count|employees?|projects?|customers?|accounts?|locations?|grades?)")),
+    ("DESCRIPTIVE", 0.88, re.compile(
+        r"^(total )?(cost|spend|fte|headcount|head count|cost per (person|head))( of| for| by| in| per)\b")),
+]
+_VAGUE = re.compile(r"^(it|that|this|those|these|they|and|so|hmm|ok|check)\b")
+_VAGUE_CONFIDENCE = 0.8   # Below INTENT_LOCAL_THRESHOLD: "and for Atlas?" is a follow-up, the LLM sees the history
+_UNTRUSTED = 0.5          # Cap for model guesses the fast path must not act on
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class IntentPrediction(NamedTuple):
+    category: str
+    confidence: float
+    source: str  # "rule" or "model"
+
+
+def _features(text: str) -> List[str]:
+    # Unlike tokenize(), question words ("what", "how", "show") are the signal here
+    words = [stem(w) for w in _WORD.findall(normalize_text(text).replace("'", ""))]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class NaiveBayesIntentModel:
+    """Multinomial naive Bayes over word uni/bigrams (NumPy only; trains in milliseconds)."""
+
+    def __init__(self, vocab: Dict[str, int], log_prior: np.ndarray, log_likelihood: np.ndarray):
+        self.vocab = vocab
+        self.log_prior = log_prior
+        self.log_likelihood = log_likelihood  # (categories, vocab)
+
+    @classmethod
+    def fit(cls, examples: Iterable[Tuple[str, str]], alpha: float = 0.5) -> "NaiveBayesIntentModel":
+        docs = [(_features(text), CATEGORIES.index(label)) for text, label in examples if label in CATEGORIES]
+        vocab: Dict[str, int] = {}
+        for features, _ in docs:
+            for f in features:
+                vocab.setdefault(f, len(vocab))
+
+        counts = np.zeros((len(CATEGORIES), len(vocab)), dtype=np.float64)
+        class_docs = np.zeros(len(CATEGORIES), dtype=np.float64)
+        for features, label in docs:
+            class_docs[label] += 1
+            np.add.at(counts[label], [vocab[f] for f in features], 1.0)
+
+        smoothed = counts + alpha
+        log_likelihood = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+        log_prior = np.log((class_docs + 1.0) / (class_docs.sum() + len(CATEGORIES)))
+        return cls(vocab, log_prior, log_likelihood)
+
+    def predict_proba(self, text: str) -> Tuple[np.ndarray, int]:
+        """Class probabilities and how many features of `text` the model knows."""
+        idx = [self.vocab[f] for f in _features(text) if f in self.vocab]
+        scores = self.log_prior + (self.log_likelihood[:, idx].sum(axis=1) if idx else 0.0)
+        probs = np.exp(scores - scores.max())
+        return probs / probs.sum(), len(idx)
+
+    def save(self, path: str) -> None:
+        words = np.array(sorted(self.vocab, key=self.vocab.get), dtype=str)
+        np.savez_compressed(path, words=words, log_prior=self.log_prior, log_likelihood=self.log_likelihood)
+
+    @classmethod
+    def load(cls, path: str) -> "NaiveBayesIntentModel":
+        data = np.load(path, allow_pickle=False)
+        vocab = {w: i for i, w in enumerate(data["words"].tolist())}
+        return cls(vocab, data["log_prior"], data["log_likelihood"])
+
+
+class IntentClassifier:
+    """
+    Local first stage of intent_identifier_node: compiled rules, then naive Bayes.
+    `confidence` is the rule's fixed confidence or the model's class probability;
+    callers fall back to the LLM below their threshold. The model alone never
+    rejects a question (INVALID / AMBIGUOUS), and is only trusted at all when
+    `trained` (a model file fitted on the logs, not just the seed examples).
+    """
+
+    def __init__(self, model: NaiveBayesIntentModel, trained: bool = False):
+        self.model = model
+        self.trained = trained
+
+    def predict(self, text: str) -> IntentPrediction:
+        normalized = normalize_text(text)
+
+        fired = [(category, confidence) for category, confidence, rule in _RULES if rule.search(normalized)]
+        if len({category for category, _ in fired}) == 1:
+            return IntentPrediction(fired[0][0], fired[0][1], "rule")
+
+        if not fired and len(_WORD.findall(normalized)) <= 4 and _VAGUE.match(normalized):
+            return IntentPrediction("AMBIGUOUS", _VAGUE_CONFIDENCE, "rule")
+
+        probs, known = self.model.predict_proba(normalized)
+        best = int(np.argmax(probs))
+        confidence = float(probs[best])
+        # Conflicting rules, mostly unseen words, a seed-only model or a rejection no rule backs:
+        # the probability means little, let the LLM decide
+        if fired or known < 2 or not self.trained or CATEGORIES[best] in ("INVALID", "AMBIGUOUS"):
+            confidence = min(confidence, _UNTRUSTED)
+        return IntentPrediction(CATEGORIES[best], round(confidence, 3), "model")
+
+
+# -------------------------------------------------------------------------
+# TRAINING DATA
+# -------------------------------------------------------------------------
+def load_training_examples(paths: Iterable[str] = INTENT_TRAINING_LOGS) -> List[Tuple[str, str]]:
+    """
+    Seed examples + labelled rows from the logs:
+      - agreement log rows: the LLM's label (`llm`) for the query,
+      - chat logs: the graph's final intent for the query. Rows whose query equals
+        the response were written before feedback_logger_node logged the user turn.
+    """
+    examples = list(SEED_EXAMPLES)
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                query = row.get("query")
+                label = row.get("llm") or row.get("intent")
+                if not query or label not in CATEGORIES or query == row.get("response"):
+                    continue
+                examples.append((query, label))
+    return examples
+
+def log_intent_agreement(query: str, local: IntentPrediction, llm_category: str) -> None:
+    """Appends the local guess and the LLM's answer (the training label) to the agreement log."""
+    entry = {
+        "timestamp": datetime.now().isoformat(),
+        "query": query,
+        "local": local.category,
+        "confidence": local.confidence,
+        "source": local.source,
+        "llm": llm_category,
+        "agree": local.category == llm_category,
+    }
+    try:
+        with open(INTENT_AGREEMENT_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"   > [Intent] Agreement log failed: {e}")
+
+
+_CLASSIFIER: Optional[IntentClassifier] = None
+_CLASSIFIER_LOCK = threading.Lock()
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """Process-wide classifier: the trained model file if present, else fitted on seeds + logs."""
+    global _CLASSIFIER
+    if not INTENT_LOCAL_ENABLED:
+        return None
+    with _CLASSIFIER_LOCK:
+        if _CLASSIFIER is None:
+            if os.path.exists(INTENT_MODEL_PATH):
+                _CLASSIFIER = IntentClassifier(NaiveBayesIntentModel.load(INTENT_MODEL_PATH), trained=True)
+            else:
+                # Rules only: the seed-fitted model's guesses go to the LLM (and the agreement log)
+                _CLASSIFIER = IntentClassifier(NaiveBayesIntentModel.fit(load_training_examples()))
+        return _CLASSIFIER
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local intent classifier from the chat / agreement logs.")
+    parser.add_argument("--output", default=INTENT_MODEL_PATH)
+    parser.add_argument("--logs", nargs="*", default=INTENT_TRAINING_LOGS)
+    args = parser.parse_args()
+
+    examples = load_training_examples(args.logs)
+    model = NaiveBayesIntentModel.fit(examples)
+    model.save(args.output)
+
+    classifier = IntentClassifier(model, trained=True)
+    predictions = [classifier.predict(text) for text, _ in examples]
+    correct = sum(p.category == label for p, (_, label) in zip(predictions, examples))
+    print(f"Trained on {len(examples)} examples {dict(Counter(label for _, label in examples))}")
+    print(f"Training accuracy {correct / len(examples):.1%}, "
+          f"{sum(p.source == 'rule' for p in predictions)} decided by rules -> {args.output}")
+
+    if os.path.exists(INTENT_AGREEMENT_LOG):
+        with open(INTENT_AGREEMENT_LOG, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        if rows:
+            print(f"LLM agreement (low-confidence turns): {sum(r['agree'] for r in rows) / len(rows):.1%} of {len(rows)}")
+
+if __name__ == "__main__":
+    main()
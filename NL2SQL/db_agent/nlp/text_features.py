@@ -0,0 +1,85 @@
+import re
+import unicodedata
+import zlib
+from typing import List, Set
+
+import numpy as np
+
+_PUNCT_EDGES = re.compile(r"^[\s\W_]+|[\s\W_]+$")
+_WHITESPACE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT = re.compile(r"\s+([,.;:!?])")
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of a user question for cache keys.
+    Case, unicode variants, repeated whitespace and leading/trailing
+    punctuation are ignored: "What is the cost of Atlas?" == "what is the cost of  atlas".
+    """
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    text = _WHITESPACE.sub(" ", text)
+    text = _SPACE_BEFORE_PUNCT.sub(r"\1", text)
+    return _PUNCT_EDGES.sub("", text)
+
+def message_text(message) -> str:
+    """Text of a chat message in any of the shapes the graph carries (Message, dict, tuple, str)."""
+    if hasattr(message, "content"):
+        return str(message.content)
+    if isinstance(message, dict):
+        return str(message.get("content", ""))
+    if isinstance(message, (list, tuple)) and len(message) > 1:
+        return str(message[1])
+    return str(message)
+
+
+# =============================================================================
+# HASHING EMBEDDINGS (offline, no model download)
+# =============================================================================
+_TOKEN = re.compile(r"[a-z0-9]+")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can could did do does for from get give go going had has have how i in
+is it its me my of on or our please s show so tell than that the their them then there these this
+those to up us was we what whats when where which who will with would you your
+""".split())
+
+# Cue words that flip the question type (DIAGNOSTIC vs DESCRIPTIVE); must agree for reuse
+DIAGNOSTIC_CUES = frozenset(["why", "cause", "caus", "reason", "explain", "driv", "driver", "root"])
+
+_SUFFIXES = ("ings", "ing", "ies", "ed", "es", "s")
+
+def stem(token: str) -> str:
+    """Crude suffix stripping: enough for cost/costs/costing to share a feature."""
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)] + ("y" if suffix == "ies" else "")
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """Stemmed content tokens of a normalized question (stopwords removed)."""
+    words = _TOKEN.findall(normalize_text(text).replace("'", ""))
+    return [stem(w) for w in words if w not in STOPWORDS]
+
+def extract_numbers(text: str) -> Set[str]:
+    return set(_NUMBER.findall(str(text)))
+
+def hash_embed(text: str, dim: int) -> np.ndarray:
+    """
+    Signed feature hashing of word unigrams, word bigrams and char trigrams,
+    L2-normalized, so a dot product is a cosine similarity.
+    """
+    tokens = tokenize(text)
+    vec = np.zeros(dim, dtype=np.float32)
+
+    features = [(t, 1.0) for t in tokens]
+    features += [(f"{a}_{b}", 0.5) for a, b in zip(tokens, tokens[1:])]
+    for t in tokens:
+        padded = f"<{t}>"
+        features += [(padded[i:i + 3], 0.25) for i in range(len(padded) - 2)]
+
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % dim] += weight if h & 0x80000000 else -weight
+
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
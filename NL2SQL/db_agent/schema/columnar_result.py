@@ -0,0 +1,176 @@
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnarResult(Sequence):
+    """
+    Compact, column-oriented SQL result for AgentState.sql_result.
+
+    Column names are stored once and each column is a typed NumPy array
+    (int64 / float64 / bool, object only for text, dates and DECIMAL columns,
+    which keep exact Decimal values), instead of a list of dicts repeating
+    every key in every row.
+
+    Backward compatible with the old List[Dict] shape: len(), truthiness,
+    iteration and result[i] yield row dicts, and slicing returns a ColumnarResult.
+    """
+
+    __slots__ = ("columns", "arrays")
+
+    def __init__(self, columns: List[str], arrays: List[np.ndarray]):
+        self.columns = list(columns)
+        self.arrays = list(arrays)
+
+    # ---------------------------------------------------------
+    # Construction
+    # ---------------------------------------------------------
+    @classmethod
+    def from_rows(cls, columns: List[str], rows: List[tuple]) -> "ColumnarResult":
+        values = list(zip(*rows)) if rows else [() for _ in columns]
+        return cls(columns, [_to_array(col) for col in values])
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "ColumnarResult":
+        if not records:
+            return cls([], [])
+        columns = list(records[0].keys())
+        return cls.from_rows(columns, [tuple(r.get(c) for c in columns) for r in records])
+
+    # ---------------------------------------------------------
+    # Row-dict view (List[Dict] compatibility)
+    # ---------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.arrays[0]) if self.arrays else 0
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return ColumnarResult(self.columns, [arr[index] for arr in self.arrays])
+        return {col: _to_python(arr[index]) for col, arr in zip(self.columns, self.arrays)}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ColumnarResult):
+            return self.columns == other.columns and self.to_records() == other.to_records()
+        if isinstance(other, list):
+            return self.to_records() == other
+        return NotImplemented
+
+    def column(self, name: str) -> np.ndarray:
+        return self.arrays[self.columns.index(name)]
+
+    def numeric_columns(self) -> List[Tuple[str, np.ndarray]]:
+        """(name, float64 array) for every numeric column, DECIMAL included (NULL -> NaN)."""
+        numeric = []
+        for col, arr in zip(self.columns, self.arrays):
+            if arr.dtype.kind in "iuf":
+                numeric.append((col, arr.astype(np.float64)))
+            elif _is_decimal(arr):
+                numeric.append((col, np.array([np.nan if v is None else float(v) for v in arr], dtype=np.float64)))
+        return numeric
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def to_pandas(self) -> pd.DataFrame:
+        return pd.DataFrame({col: arr for col, arr in zip(self.columns, self.arrays)}, columns=self.columns)
+
+    def __str__(self) -> str:
+        # Header once, then one tuple per row (what the Analyzer prompt sees)
+        lines = [" | ".join(self.columns)]
+        for i in range(len(self)):
+            lines.append(" | ".join(str(_to_python(arr[i])) for arr in self.arrays))
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return f"ColumnarResult(columns={self.columns}, rows={len(self)})"
+
+    # ---------------------------------------------------------
+    # Compact serialization (used by the checkpointer)
+    # ---------------------------------------------------------
+    def to_payload(self) -> Dict[str, Any]:
+        return {
+            "c": self.columns,
+            "t": [_payload_type(arr) for arr in self.arrays],
+            "d": [_payload_data(arr) for arr in self.arrays],
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "ColumnarResult":
+        arrays = []
+        for dtype, data in zip(payload["t"], payload["d"]):
+            if dtype in ("O", "D"):
+                arr = np.empty(len(data), dtype=object)
+                arr[:] = data if dtype == "O" else [None if v is None else Decimal(v) for v in data]
+            else:
+                arr = np.array([np.nan if v is None else v for v in data], dtype=np.dtype(dtype))
+            arrays.append(arr)
+        return cls(payload["c"], arrays)
+
+
+# -------------------------------------------------------------------------
+# HELPERS
+# -------------------------------------------------------------------------
+def _to_array(values: tuple) -> np.ndarray:
+    """Infers the tightest dtype for one column; NULLs in numeric columns become NaN."""
+    non_null = [v for v in values if v is not None]
+
+    if non_null and all(isinstance(v, bool) for v in non_null) and len(non_null) == len(values):
+        return np.array(values, dtype=bool)
+    if non_null and all(isinstance(v, int) and not isinstance(v, bool) for v in non_null) and len(non_null) == len(values):
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            pass
+    if non_null and all(isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in non_null):
+        if any(isinstance(v, Decimal) for v in non_null):
+            # DECIMAL / NUMERIC (money): float64 would round it, so keep exact Decimals
+            arr = np.empty(len(values), dtype=object)
+            arr[:] = [v if v is None or isinstance(v, Decimal) else Decimal(str(v)) for v in values]
+            return arr
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+def _to_python(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:  # NaN marks a NULL
+        return None
+    return value
+
+
+def _is_decimal(arr: np.ndarray) -> bool:
+    """Object column holding Decimals (and NULLs) only."""
+    if arr.dtype != object:
+        return False
+    non_null = [v for v in arr if v is not None]
+    return bool(non_null) and all(isinstance(v, Decimal) for v in non_null)
+
+
+def _payload_type(arr: np.ndarray) -> str:
+    if arr.dtype != object:
+        return arr.dtype.str
+    return "D" if _is_decimal(arr) else "O"
+
+
+def _payload_data(arr: np.ndarray) -> List[Optional[Any]]:
+    if arr.dtype != object:
+        return _numeric_list(arr)
+    if _is_decimal(arr):
+        return [None if v is None else str(v) for v in arr]  # Exact digits and scale
+    return [_to_python(v) for v in arr]
+
+
+def _numeric_list(arr: np.ndarray) -> List[Optional[Any]]:
+    if arr.dtype.kind == "f":
+        return [None if v != v else v for v in arr.tolist()]
+    return arr.tolist()
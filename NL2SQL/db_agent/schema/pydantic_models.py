@@ -1,4 +1,4 @@
-from typing import Literal, Optional, Dict, Any
+from typing import Literal, Optional, Dict, Any, List
 from pydantic import BaseModel, Field
 
 ReasoningEffort = Literal["low", "medium", "high"]
@@ -9,6 +9,16 @@ class GreetIn(BaseModel):
 class NaturalAnswerOutput(BaseModel):
     answer: str
 
+class HypothesisInsight(BaseModel):
+    hypothesis: str = Field(..., description="The hypothesis name exactly as given in the context.")
+    insight: str = Field(..., description="The key finding of its SQL data in 1 sentence.")
+
+class BatchAnalysisOutput(BaseModel):
+    """
+    Structured output of the batched Result Analyzer: one insight per hypothesis.
+    """
+    insights: List[HypothesisInsight]
+
 class IntentClassification(BaseModel):
     """
     Structured output for the Intent Identifier Node.
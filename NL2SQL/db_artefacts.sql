@@ -148,9 +148,32 @@ BEGIN
 END
 GO
 
+-- =======================================================
+-- 4. RESULT CACHE INVALIDATION (db_agent/cache/result_cache.py)
+-- =======================================================
+-- The SP result cache probes the latest change version of SEMANTIC.COST_PER_PERSON
+-- (CHANGETABLE) and drops every cached aggregate once a data load commits to it.
+-- Change tracking needs a primary key on the table; without one, add a
+-- ROWVERSION column and point RESULT_CACHE_VERSION_QUERY at MAX() of it.
+IF NOT EXISTS (SELECT * FROM sys.change_tracking_databases WHERE database_id = DB_ID())
+BEGIN
+    DECLARE @sql NVARCHAR(400) = N'ALTER DATABASE ' + QUOTENAME(DB_NAME())
+        + N' SET CHANGE_TRACKING = ON (CHANGE_RETENTION = 2 DAYS, AUTO_CLEANUP = ON)';
+    EXEC(@sql);
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.change_tracking_tables WHERE object_id = OBJECT_ID(N'SEMANTIC.COST_PER_PERSON'))
+BEGIN
+    ALTER TABLE SEMANTIC.COST_PER_PERSON ENABLE CHANGE_TRACKING;
+END
+GO
+
 /*******************************************************
  * SHERLOCK AGENT - STATE PERSISTENCE TABLE
  * Stores serialized graph state for "Zombie Recovery"
+ * Managed copy: db_agent/graph/checkpoint_maintenance.py
+ * (SQLServerSaver.setup() applies the same statements)
  *******************************************************/
 IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'agent_checkpoints' AND type = 'U')
 BEGIN
@@ -158,13 +181,136 @@ BEGIN
         thread_id NVARCHAR(255) NOT NULL,
         checkpoint_id NVARCHAR(255) NOT NULL,
         parent_checkpoint_id NVARCHAR(255) NULL,
-        checkpoint_data NVARCHAR(MAX) NOT NULL, -- JSON/Serialized State
+        checkpoint_data NVARCHAR(MAX) NULL,     -- Legacy JSON state (pre-binary rows)
+        checkpoint_blob VARBINARY(MAX) NULL,    -- Binary state: msgpack + optional zlib/zstd
         metadata NVARCHAR(MAX) NULL,
         created_at DATETIME DEFAULT GETDATE(),
-        PRIMARY KEY (thread_id, checkpoint_id)
+        -- Clustered newest-first per thread: checkpoint ids are time-ordered (uuid6),
+        -- so get_tuple/list are single seeks without DATETIME ties on created_at
+        CONSTRAINT PK_agent_checkpoints PRIMARY KEY CLUSTERED (thread_id, checkpoint_id DESC)
     );
     
     -- Index for fast lookups by thread
     CREATE INDEX IX_Checkpoints_Thread ON agent_checkpoints(thread_id, created_at DESC);
 END
+GO
+
+-- Migration: binary checkpoint column for existing installations
+IF COL_LENGTH('agent_checkpoints', 'checkpoint_blob') IS NULL
+BEGIN
+    ALTER TABLE agent_checkpoints ADD checkpoint_blob VARBINARY(MAX) NULL;
+    ALTER TABLE agent_checkpoints ALTER COLUMN checkpoint_data NVARCHAR(MAX) NULL;
+END
+GO
+
+-- Migration: installations created with PRIMARY KEY (thread_id, checkpoint_id) get the
+-- newest-first clustered key that compaction and the latest-per-thread reads assume.
+-- Rebuilds the table once (run it in a quiet period on large installations).
+IF OBJECT_ID('agent_checkpoints', 'U') IS NOT NULL AND NOT EXISTS (
+    SELECT 1
+    FROM sys.indexes AS i
+    JOIN sys.index_columns AS ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+    JOIN sys.columns AS c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+    WHERE i.object_id = OBJECT_ID('agent_checkpoints') AND i.is_primary_key = 1 AND i.type = 1
+      AND ic.key_ordinal = 2 AND c.name = 'checkpoint_id' AND ic.is_descending_key = 1
+)
+BEGIN
+    DECLARE @pk SYSNAME = (SELECT name FROM sys.key_constraints
+                           WHERE parent_object_id = OBJECT_ID('agent_checkpoints') AND type = 'PK');
+    IF @pk IS NOT NULL
+    BEGIN
+        DECLARE @drop NVARCHAR(400) = N'ALTER TABLE agent_checkpoints DROP CONSTRAINT ' + QUOTENAME(@pk);
+        EXEC sp_executesql @drop;
+    END
+    ALTER TABLE agent_checkpoints
+        ADD CONSTRAINT PK_agent_checkpoints PRIMARY KEY CLUSTERED (thread_id, checkpoint_id DESC);
+END
+GO
+
+-- Per-channel values (delta storage): one row per (thread, channel, version).
+-- A checkpoint row only stores channel_versions; unchanged channels are shared,
+-- and growing lists are stored as append-deltas on top of an earlier version.
+IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'agent_checkpoint_blobs' AND type = 'U')
+BEGIN
+    CREATE TABLE agent_checkpoint_blobs (
+        thread_id NVARCHAR(255) NOT NULL,
+        channel NVARCHAR(255) NOT NULL,
+        version NVARCHAR(255) NOT NULL,         -- Zero-padded, sortable as text
+        base_version NVARCHAR(255) NULL,        -- NULL = full value, else items appended to this version
+        blob VARBINARY(MAX) NOT NULL,           -- Empty = channel had no value
+        created_at DATETIME DEFAULT GETDATE(),
+        PRIMARY KEY (thread_id, channel, version)
+    );
+END
+GO
+
+-- Pending writes of tasks that finished inside a superstep. On resume they are
+-- replayed instead of re-running the task (idx < 0 = error/interrupt/resume slots).
+IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'agent_checkpoint_writes' AND type = 'U')
+BEGIN
+    CREATE TABLE agent_checkpoint_writes (
+        thread_id NVARCHAR(255) NOT NULL,
+        checkpoint_id NVARCHAR(255) NOT NULL,
+        task_id NVARCHAR(255) NOT NULL,
+        idx INT NOT NULL,
+        channel NVARCHAR(255) NOT NULL,
+        blob VARBINARY(MAX) NOT NULL,           -- CheckpointSerde envelope
+        task_path NVARCHAR(1000) NOT NULL DEFAULT '',
+        created_at DATETIME DEFAULT GETDATE(),
+        PRIMARY KEY (thread_id, checkpoint_id, task_id, idx)
+    );
+END
+GO
+
+-- Session catalog: one row per thread, maintained by SQLServerSaver.
+-- The Streamlit sidebar reads this instead of scanning agent_checkpoints.
+IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'agent_sessions' AND type = 'U')
+BEGIN
+    CREATE TABLE agent_sessions (
+        thread_id NVARCHAR(255) NOT NULL PRIMARY KEY,
+        last_checkpoint_id NVARCHAR(255) NULL,
+        checkpoint_count INT NOT NULL DEFAULT 0,
+        created_at DATETIME DEFAULT GETDATE(),
+        updated_at DATETIME DEFAULT GETDATE()
+    );
+    CREATE INDEX IX_Sessions_Updated ON agent_sessions(updated_at DESC);
+
+    -- Backfill from existing history (one-off)
+    INSERT INTO agent_sessions (thread_id, last_checkpoint_id, checkpoint_count, created_at, updated_at)
+    SELECT thread_id, MAX(checkpoint_id), COUNT(*), MIN(created_at), MAX(created_at)
+    FROM agent_checkpoints
+    GROUP BY thread_id;
+END
+GO
+
+-- Retention archive (python -m db_agent.graph.checkpoint_maintenance, mode=archive)
+IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'agent_checkpoints_archive' AND type = 'U')
+BEGIN
+    CREATE TABLE agent_checkpoints_archive (
+        thread_id NVARCHAR(255) NOT NULL,
+        checkpoint_id NVARCHAR(255) NOT NULL,
+        parent_checkpoint_id NVARCHAR(255) NULL,
+        checkpoint_data NVARCHAR(MAX) NULL,
+        checkpoint_blob VARBINARY(MAX) NULL,
+        metadata NVARCHAR(MAX) NULL,
+        created_at DATETIME NULL,
+        archived_at DATETIME DEFAULT GETDATE(),
+        PRIMARY KEY (thread_id, checkpoint_id)
+    );
+END
+GO
+
+IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'agent_checkpoint_blobs_archive' AND type = 'U')
+BEGIN
+    CREATE TABLE agent_checkpoint_blobs_archive (
+        thread_id NVARCHAR(255) NOT NULL,
+        channel NVARCHAR(255) NOT NULL,
+        version NVARCHAR(255) NOT NULL,
+        base_version NVARCHAR(255) NULL,
+        blob VARBINARY(MAX) NOT NULL,
+        created_at DATETIME NULL,
+        archived_at DATETIME DEFAULT GETDATE(),
+        PRIMARY KEY (thread_id, channel, version)
+    );
+END
 GO
\ No newline at end of file
@@ -0,0 +1,186 @@
+import json
+import operator
+from typing import Annotated, TypedDict
+
+import pandas as pd
+import pytest
+
+from db_agent.graph.checkpoint_queue import CheckpointWriteError, CheckpointWriteQueue
+
+
+@pytest.fixture(autouse=True)
+def no_background_flusher(monkeypatch):
+    # Flushes happen only when a test asks for them
+    monkeypatch.setattr(CheckpointWriteQueue, "_start_worker", lambda self: None)
+
+
+def test_dead_letter_drops_the_threads_later_ops(tmp_path):
+    written, forgotten = [], []
+
+    def flush_fn(ops):
+        if "b" in ops:
+            raise RuntimeError("constraint violation")
+        written.extend(ops)
+
+    queue = CheckpointWriteQueue(flush_fn, max_attempts=1, dead_letter_path=str(tmp_path / "dead.jsonl"),
+                                 on_dead_letter=forgotten.append)
+    for thread_id, op in [("t1", "a"), ("t1", "b"), ("t1", "c"), ("t2", "x")]:
+        queue.submit(thread_id, op)
+
+    queue.flush()  # Other threads' failures are not raised here
+
+    assert written == ["a", "x"]
+    assert forgotten == ["t1"]
+    assert queue.pending("t1") == [] and queue.stats()["queued"] == 0
+    assert queue.stats()["dead_lettered"] == 2
+    assert [json.loads(line)["attempts"] for line in open(tmp_path / "dead.jsonl")] == [1, 0]
+
+    # The owner hears about it before anything else is queued, then the thread is usable again
+    with pytest.raises(CheckpointWriteError):
+        queue.submit("t1", "d")
+    assert queue.pending("t1") == []
+    queue.submit("t1", "e")
+    assert queue.pending("t1") == ["e"]
+
+
+def test_outage_does_not_dead_letter(tmp_path):
+    queue = CheckpointWriteQueue(lambda ops: (_ for _ in ()).throw(RuntimeError("server gone")),
+                                 max_attempts=2, dead_letter_path=str(tmp_path / "dead.jsonl"))
+    queue.submit("t1", "a")
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match="server gone"):
+            queue.flush("t1")
+    assert queue.pending("t1") == ["a"]
+    assert queue.stats()["dead_lettered"] == 0
+
+
+# -------------------------------------------------------------------------
+# SQLServerSaver on an in-memory stand-in for the checkpoint tables
+# -------------------------------------------------------------------------
+class _FakeDB:
+    """The saver's statements against dicts; execute_many(commit=False) buffers until commit()."""
+
+    def __init__(self):
+        self.checkpoints, self.blobs, self.writes = {}, {}, {}
+        self.fail_checkpoint = None
+
+    def executor(self, *args, **kwargs):
+        return _FakeExecutor(self)
+
+
+class _FakeExecutor:
+    def __init__(self, db):
+        self.db = db
+        self.staged = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.staged = []  # Uncommitted work is rolled back on release
+
+    def commit(self):
+        for query, row in self.staged:
+            self._apply(query, row)
+        self.staged = []
+
+    def execute_many(self, query, rows, fast=True, commit=True):
+        for row in rows:
+            if "INTO agent_checkpoints" in query and row[1] == self.db.fail_checkpoint:
+                self.staged = []
+                raise RuntimeError("checkpoint insert failed")
+            self.staged.append((query, tuple(row)))
+        if commit:
+            self.commit()
+
+    def _apply(self, query, row):
+        if "INTO agent_checkpoint_blobs" in query:
+            self.db.blobs.setdefault(row[:3], (row[3], row[4]))
+        elif "INTO agent_checkpoints" in query:
+            self.db.checkpoints.setdefault(row[:2], row)
+        elif "INTO agent_checkpoint_writes" in query:
+            self.db.writes[row[:4]] = row
+
+    def execute_query(self, query, fetch=True, params=None):
+        p = list(params or [])
+        if "OPENJSON" in query and "agent_checkpoint_blobs" in query:
+            rows = []
+            for wanted in json.loads(p[0]):
+                key = (p[1], wanted["c"])
+                snapshots = [k[2] for k, (base, _) in self.db.blobs.items()
+                             if k[:2] == key and k[2] <= wanted["v"] and base is None]
+                start = max(snapshots) if snapshots else wanted["v"]
+                rows += [(wanted["c"], wanted["v"], k[2], base, blob) for k, (base, blob) in self.db.blobs.items()
+                         if k[:2] == key and start <= k[2] <= wanted["v"]]
+            return pd.DataFrame(rows, columns=["wanted_channel", "wanted_version", "version", "base_version", "blob"])
+        if "FROM agent_checkpoint_blobs" in query:
+            hit = self.db.blobs.get(tuple(p))
+            return pd.DataFrame([hit] if hit else [], columns=["base_version", "blob"])
+        if "FROM agent_checkpoint_writes" in query:
+            ids = json.loads(p[1])
+            rows = [(r[1], r[2], r[4], r[5]) for k, r in sorted(self.db.writes.items()) if k[0] == p[0] and k[1] in ids]
+            return pd.DataFrame(rows, columns=["checkpoint_id", "task_id", "channel", "blob"])
+        if "FROM agent_checkpoints" in query:
+            rows = sorted((r for k, r in self.db.checkpoints.items() if k[0] == p[0]), key=lambda r: r[1], reverse=True)
+            columns = ["thread_id", "checkpoint_id", "parent_checkpoint_id", "checkpoint_blob", "checkpoint_data", "metadata"]
+            return pd.DataFrame([(t, c, parent, blob, None, meta) for t, c, parent, blob, meta in rows[:1]], columns=columns)
+        raise AssertionError(f"unexpected query: {query}")
+
+
+class _Chat(TypedDict):
+    messages: Annotated[list, operator.add]
+    turns: int
+
+
+def _chat_graph(checkpointer):
+    from langgraph.graph import END, START, StateGraph
+
+    def reply(state):
+        return {"messages": [f"answer {state.get('turns', 0)}"], "turns": state.get("turns", 0) + 1}
+
+    graph = StateGraph(_Chat)
+    graph.add_node("reply", reply)
+    graph.add_node("echo", lambda state: {"messages": ["echo"]})
+    graph.add_edge(START, "reply")
+    graph.add_edge("reply", "echo")
+    graph.add_edge("echo", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def test_dead_lettered_mid_chain_checkpoint_keeps_the_thread_loadable(monkeypatch, tmp_path):
+    pytest.importorskip("pyodbc")
+    pytest.importorskip("langgraph")
+    import db_agent.graph.sql_checkpointer as sql_checkpointer
+    from db_agent.graph.checkpoint_cache import CheckpointCache
+
+    db = _FakeDB()
+    monkeypatch.setattr(sql_checkpointer, "SQLQueryExecutor", db.executor)
+    saver = sql_checkpointer.SQLServerSaver(write_behind=True, cache=CheckpointCache(), validate_cache=False)
+    saver.write_queue.max_attempts = 1
+    saver.write_queue.dead_letter_path = str(tmp_path / "dead.jsonl")
+    app = _chat_graph(saver)
+    config = {"configurable": {"thread_id": "t1"}}
+
+    app.invoke({"messages": ["q1"]}, config)
+    saver.flush("t1")
+
+    # Second turn: its puts are append-deltas on messages; the second of them never reaches SQL
+    app.invoke({"messages": ["q2"]}, config)
+    queued = [op.checkpoint_id for op in saver.write_queue.pending("t1") if isinstance(op, sql_checkpointer._CheckpointOp)]
+    assert len(queued) >= 3
+    db.fail_checkpoint = queued[1]
+    with pytest.raises(CheckpointWriteError):
+        saver.flush("t1")
+    assert saver.write_queue.pending("t1") == []
+    assert ("t1", queued[2]) not in db.checkpoints
+
+    # A fresh process loads the thread from what was committed
+    reader = sql_checkpointer.SQLServerSaver(write_behind=False, cache=CheckpointCache(), validate_cache=False)
+    loaded = reader.get_tuple(config)
+    assert loaded.config["configurable"]["checkpoint_id"] == queued[0]
+
+    # The writer continues from SQL with full snapshots, and the result reloads intact
+    result = app.invoke({"messages": ["q3"]}, config)
+    saver.flush("t1")
+    reloaded = sql_checkpointer.SQLServerSaver(write_behind=False, cache=CheckpointCache(), validate_cache=False)
+    assert reloaded.get_tuple(config).checkpoint["channel_values"]["messages"] == result["messages"]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from db_agent.analytics.driver_analysis import analyze_drivers
+
+DIMENSIONS = ["EMP_TYPE", "LOCATION", "PROJECT_NAME"]
+
+
+def _slice(rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Two months of per-record cost where only India's cost triples. PROJECT_NAME is sparse
+    random noise (400 members, ~5 records per cell), EMP_TYPE has only two members.
+    """
+    n = 4000
+    records = pd.DataFrame({
+        "Period": rng.choice(["May-24", "Jun-24"], n),
+        "EMP_TYPE": rng.choice(["FTE", "Contractor"], n),
+        "LOCATION": rng.choice(["India", "US", "UK", "Germany", "Japan"], n),
+        "PROJECT_NAME": rng.choice([f"P{i:03d}" for i in range(400)], n),
+        "COST": rng.normal(100, 10, n),
+    })
+    records.loc[(records.Period == "Jun-24") & (records.LOCATION == "India"), "COST"] *= 3
+    grouped = (records.assign(Squares=records.COST ** 2)
+               .groupby(["Period", *DIMENSIONS])
+               .agg(Metric=("COST", "sum"), Records=("COST", "size"), MetricSquares=("Squares", "sum"))
+               .reset_index())
+    grouped.insert(1, "PeriodKey", grouped.Period.map({"May-24": "2024-05-01", "Jun-24": "2024-06-01"}))
+    return grouped
+
+
+def test_real_driver_beats_high_cardinality_noise():
+    report = analyze_drivers(_slice(np.random.default_rng(7)), DIMENSIONS)
+
+    top = report.drivers[0]
+    assert report.base_period == "May-24" and report.current_period == "Jun-24"
+    assert top.dimension == "LOCATION"
+    assert top.top[0].member == "India"
+    assert top.top[0].share > 0.9
+    assert top.explained > 0.9
+
+    # Divergence alone would rank the noise first; small dimensions carry all the change by construction
+    noise = next(d for d in report.drivers if d.dimension == "PROJECT_NAME")
+    assert noise.divergence > top.divergence
+    assert noise.change_share < 0.2
+    assert all(d.excess_share < top.excess_share / 2 for d in report.drivers[1:])
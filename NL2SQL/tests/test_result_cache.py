@@ -0,0 +1,151 @@
+import asyncio
+import sys
+
+from db_agent.cache.result_cache import SPResultCache
+
+
+class _Source:
+    """Counts fetches; each call returns a fresh value so reuse is visible."""
+
+    def __init__(self, size: int = 100, gate: asyncio.Event = None):
+        self.calls = 0
+        self.size = size
+        self.gate = gate
+
+    def fetch(self, name: str):
+        async def run():
+            self.calls += 1
+            if self.gate is not None:
+                await self.gate.wait()
+            return f"{name}:{self.calls}".ljust(self.size)
+        return run
+
+
+def test_concurrent_identical_calls_share_one_fetch():
+    async def scenario():
+        cache = SPResultCache(max_bytes=1 << 20, ttl=60)
+        source = _Source(gate=asyncio.Event())
+        calls = [asyncio.create_task(cache.get_or_fetch("sp_GetCost", {"ProjectName": "Atlas"}, "t", source.fetch("a")))
+                 for _ in range(5)]
+        await asyncio.sleep(0)  # Every call is now waiting on the leader
+        source.gate.set()
+        return cache, source, await asyncio.gather(*calls)
+
+    cache, source, results = asyncio.run(scenario())
+    assert source.calls == 1
+    assert len(set(results)) == 1
+    assert cache.stats()["misses"] == 1 and cache.stats()["coalesced"] == 4
+
+
+def test_failed_fetch_is_shared_but_not_cached():
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0)
+        raise RuntimeError("deadlock victim")
+
+    async def scenario():
+        cache = SPResultCache(max_bytes=1 << 20, ttl=60)
+        first = await asyncio.gather(*(cache.get_or_fetch("sp_GetCost", {}, "t", failing) for _ in range(3)),
+                                     return_exceptions=True)
+        return cache, first, await cache.get_or_fetch("sp_GetCost", {}, "t", _Source().fetch("ok"))
+
+    cache, first, retried = asyncio.run(scenario())
+    assert len(attempts) == 1 and all(isinstance(e, RuntimeError) for e in first)
+    assert retried.startswith("ok:1")
+    assert cache.stats()["entries"] == 1
+
+
+def test_equivalent_params_hit_the_same_entry():
+    async def scenario():
+        cache = SPResultCache(max_bytes=1 << 20, ttl=60)
+        source = _Source()
+        await cache.get_or_fetch("sp_GetCost", {"@ProjectName": " Atlas ", "TopN": 5.0}, "t", source.fetch("a"))
+        await cache.get_or_fetch("SP_GETCOST", {"projectname": "Atlas", "topn": 5}, "t", source.fetch("a"))
+        await cache.get_or_fetch("sp_GetCost", {"projectname": "Atlas", "topn": 5}, "other", source.fetch("a"))
+        return source
+
+    assert asyncio.run(scenario()).calls == 2  # Same call twice, then another tenant
+
+
+def test_data_version_change_drops_cached_results():
+    version = {"value": 1}
+
+    async def probe():
+        return version["value"]
+
+    async def scenario():
+        cache = SPResultCache(max_bytes=1 << 20, ttl=60, version_fn=probe, version_check_s=0)
+        source = _Source()
+        get = lambda: cache.get_or_fetch("sp_GetCost", {"ProjectName": "Atlas"}, "t", source.fetch("a"))
+        before = [await get(), await get()]
+        version["value"] = 2  # A data load committed
+        after = [await get(), await get()]
+        return cache, source, before, after
+
+    cache, source, before, after = asyncio.run(scenario())
+    assert source.calls == 2
+    assert before[0] == before[1] and after[0] == after[1] and before[0] != after[0]
+    assert cache.stats()["invalidations"] == 1 and cache.stats()["data_version"] == 2
+
+
+def test_failed_version_probe_falls_back_to_ttl():
+    async def probe():
+        raise RuntimeError("change tracking is off")
+
+    async def scenario():
+        cache = SPResultCache(max_bytes=1 << 20, ttl=60, version_fn=probe, version_check_s=0)
+        source = _Source()
+        for _ in range(3):
+            await cache.get_or_fetch("sp_GetCost", {}, "t", source.fetch("a"))
+        return source
+
+    assert asyncio.run(scenario()).calls == 1
+
+
+def test_byte_budget_evicts_least_recently_used():
+    item = sys.getsizeof("x".ljust(1000))
+
+    async def scenario():
+        cache = SPResultCache(max_bytes=int(item * 2.5), ttl=60)
+        source = _Source(size=1000)
+        get = lambda name: cache.get_or_fetch("sp_GetCost", {"ProjectName": name}, "t", source.fetch(name))
+        await get("a")
+        await get("b")
+        await get("a")  # Hit: "b" is now the least recently used
+        await get("c")  # Over budget: evicts "b" only
+        calls = source.calls
+        await get("a")
+        await get("c")
+        hits_kept = source.calls == calls
+        await get("b")
+        return cache, hits_kept, source.calls - calls
+
+    cache, hits_kept, refetched = asyncio.run(scenario())
+    assert hits_kept and refetched == 1
+    assert cache.stats()["bytes"] <= int(item * 2.5)
+    assert cache.stats()["evictions"] == 2  # "b" first, then "a" (LRU by then) to make room for "b"
+
+
+def test_result_larger_than_budget_is_not_stored():
+    async def scenario():
+        cache = SPResultCache(max_bytes=500, ttl=60)
+        source = _Source(size=1000)
+        for _ in range(2):
+            await cache.get_or_fetch("sp_GetCost", {}, "t", source.fetch("big"))
+        return cache, source
+
+    cache, source = asyncio.run(scenario())
+    assert source.calls == 2 and cache.stats()["entries"] == 0
+
+
+def test_expired_entries_are_refetched():
+    async def scenario():
+        cache = SPResultCache(max_bytes=1 << 20, ttl=0)
+        source = _Source()
+        for _ in range(2):
+            await cache.get_or_fetch("sp_GetCost", {}, "t", source.fetch("a"))
+        return source
+
+    assert asyncio.run(scenario()).calls == 2
@@ -0,0 +1,41 @@
+import pytest
+
+from db_agent.cache.semantic_cache import SemanticPlanCache
+
+ATLAS_PLAN = {
+    "next_action": "EXECUTE",
+    "tool_name": "sp_GetAggregatedCost",
+    "tool_params": {"ProjectName": "Atlas"},
+}
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticPlanCache(dim=2048, max_size=16, threshold=0.70)
+    cache.add("cost of Project Atlas", "DESCRIPTIVE", "tenant", ATLAS_PLAN)
+    return cache
+
+
+@pytest.mark.parametrize("question", [
+    "What is the cost of Project Atlas?",
+    "project atlas cost",
+    "Total cost of Project Atlas",
+])
+def test_paraphrase_reuses_the_plan(cache, question):
+    hit = cache.lookup(question, "tenant")
+    assert hit is not None and hit["plan"] == ATLAS_PLAN
+
+
+@pytest.mark.parametrize("question", [
+    "cost of project atlas in london",         # Extra filter, lower case
+    "cost of Project Atlas last month",         # Period
+    "cost of Project Atlas by location",        # Grouping
+    "cost of project atlas excluding contractors",
+])
+def test_added_filter_misses(cache, question):
+    assert cache.lookup(question, "tenant") is None
+    assert cache.stats()["rejected"] == 1  # Similar enough to be considered, then refused
+
+
+def test_other_tenant_misses(cache):
+    assert cache.lookup("cost of Project Atlas", "other") is None